@@ -9,6 +9,26 @@ class TradingBotBase:
     def __init__(self, trader_id, api_url=None):
         self.trader_id = trader_id
         self.api_url = api_url or os.environ.get('EXCHANGE_API_URL', 'http://localhost:5001')
+        # DBO delivery clock: id of the last market-data point seen and when it arrived (local clock)
+        self.last_data_id = None
+        self.last_data_time = None
+        # CloudEx synchronized clock: offset (s) to add to the local clock and its estimated error
+        self.clock_offset = float(os.environ.get('BOT_CLOCK_OFFSET', 0.0))
+        self.clock_error = None
+
+    def set_clock_sync(self, offset, error=None):
+        """Set the local clock's offset from exchange time and its estimated error (seconds)"""
+        self.clock_offset = offset
+        self.clock_error = error
+
+    def synced_time(self):
+        """Current time on the synchronized clock"""
+        return time.time() + self.clock_offset
+
+    def on_market_data(self, data_id):
+        """Record receipt of a market-data point; call as soon as it arrives"""
+        self.last_data_id = data_id
+        self.last_data_time = time.perf_counter()
 
     def submit_order(self, side, price, qty):
         order_id = f"{self.trader_id}-{int(time.time()*1000)}"
@@ -19,6 +39,14 @@ class TradingBotBase:
             'price': price,
             'qty': qty
         }
+        # CloudEx stamp: the exchange releases orders in synchronized-timestamp order
+        payload['client_timestamp'] = self.synced_time()
+        if self.clock_error is not None:
+            payload['clock_error'] = self.clock_error
+        if self.last_data_id is not None:
+            # Delivery clock stamp: the exchange ranks orders by (data id, response time)
+            payload['dc_id'] = self.last_data_id
+            payload['response_time'] = time.perf_counter() - self.last_data_time
         try:
             resp = requests.post(f'{self.api_url}/submit_order', json=payload, timeout=3)
             resp.raise_for_status()
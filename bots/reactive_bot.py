@@ -23,7 +23,10 @@ class ReactiveBot(TradingBotBase):
             data, _ = sock.recvfrom(1024)
             msg = data.decode()
             try:
-                price = float(msg.split(',')[2])
+                # "TICKER,PRICE,<price>,SEQ,<seq>"; SEQ is the feed's delivery-clock id
+                fields = msg.split(',')
+                price = float(fields[2])
+                self.on_market_data(int(fields[4]))
             except Exception:
                 continue
             print(f"Received market data: {msg}")
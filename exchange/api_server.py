@@ -2,17 +2,43 @@
 API Server for Exchange Order Entry and Market Data
 - Provides RESTful endpoints for bots/clients to submit orders and query market state
 - Integrates with OrderBook to match trades
+- Orders pass through a gateway before matching: a DBO delivery-clock sequencer
+  (default) or a CloudEx timestamp-ordered release buffer
 - Used in the SDN trading competition
 """
 from flask import Flask, request, jsonify
 from exchange.order_book import Order, OrderBook
+from exchange.sequencer import DeliveryClockSequencer
+from exchange.timestamp_buffer import TimestampOrderBuffer
 from competition.scoring import Scoring
+import os
 import time
 import threading
 
 app = Flask(__name__)
 order_book = OrderBook()
 scoring = Scoring()
+_execute_lock = threading.Lock()
+
+def execute_order(order):
+    """Add an order to the book and record any resulting trades for scoring"""
+    with _execute_lock:
+        # Book time priority follows release order, which the sequencer may have changed
+        order.timestamp = time.time()
+        order_book.add_order(order)
+        # After matching, record new trades for scoring
+        new_trades = order_book.get_trades()[len(scoring.trades):]
+        for trade in new_trades:
+            scoring.record_trade(trade)
+
+sequencer = DeliveryClockSequencer(execute_order)
+timestamp_buffer = TimestampOrderBuffer(execute_order)
+# Order gateway in front of the book: 'dbo', 'cloudex' or 'direct'
+gateways = {'dbo': sequencer, 'cloudex': timestamp_buffer}
+gateway_mode = os.environ.get('ORDER_GATEWAY', 'dbo')
+
+def _optional(data, key, cast):
+    return cast(data[key]) if data.get(key) is not None else None
 
 @app.errorhandler(Exception)
 def handle_exception(e):
@@ -22,8 +48,10 @@ def handle_exception(e):
 def submit_order():
     """
     Submit a new buy or sell order to the exchange.
-    Expects JSON: {"order_id", "trader_id", "side", "price", "qty"}
-    Returns: {"status", "order_id"}
+    Expects JSON: {"order_id", "trader_id", "side", "price", "qty"}, plus the optional
+    DBO delivery clock {"dc_id", "response_time"} and CloudEx synchronized-clock
+    {"client_timestamp", "clock_error"} stamped by the bot SDK
+    Returns: {"status", "order_id", "gateway"}
     """
     data = request.get_json(force=True)
     try:
@@ -33,14 +61,22 @@ def submit_order():
             side=data['side'],
             price=float(data['price']),
             qty=int(data['qty']),
-            timestamp=time.time()
+            timestamp=time.time(),
+            dc_id=_optional(data, 'dc_id', int),
+            response_time=_optional(data, 'response_time', float),
+            client_timestamp=_optional(data, 'client_timestamp', float),
+            clock_error=_optional(data, 'clock_error', float)
         )
-        order_book.add_order(order)
-        # After matching, record new trades for scoring
-        new_trades = order_book.get_trades()[len(scoring.trades):]
-        for trade in new_trades:
-            scoring.record_trade(trade)
-        return jsonify({'status': 'accepted', 'order_id': order.order_id})
+        order_book.validate(order)
+        gateway = gateways.get(gateway_mode)
+        if gateway is not None and gateway.enabled:
+            # Matched later, in the gateway's fair order
+            gateway.submit(order)
+            mode = gateway_mode
+        else:
+            execute_order(order)
+            mode = 'direct'
+        return jsonify({'status': 'accepted', 'order_id': order.order_id, 'gateway': mode})
     except Exception as e:
         return jsonify({'status': 'error', 'reason': str(e)}), 400
 
@@ -60,6 +96,54 @@ def get_trades():
     """
     return jsonify(order_book.get_trades())
 
+@app.route('/sequencer', methods=['GET', 'POST'])
+def sequencer_settings():
+    """
+    Get DBO sequencer statistics, or update its settings.
+    Expects JSON (POST, all optional): {"enabled", "batch_window_ms", "max_hold_ms"}
+    Returns: sequencer statistics
+    """
+    if request.method == 'POST':
+        data = request.get_json(force=True)
+        sequencer.configure(
+            batch_window=float(data['batch_window_ms']) / 1000 if 'batch_window_ms' in data else None,
+            max_hold=float(data['max_hold_ms']) / 1000 if 'max_hold_ms' in data else None,
+            enabled=bool(data['enabled']) if 'enabled' in data else None
+        )
+    return jsonify(sequencer.stats())
+
+@app.route('/timestamp_buffer', methods=['GET', 'POST'])
+def timestamp_buffer_settings():
+    """
+    Get CloudEx timestamp buffer statistics, or update its settings.
+    Expects JSON (POST, all optional): {"enabled", "quantile", "min_horizon_ms", "max_horizon_ms"}
+    Returns: buffer statistics
+    """
+    if request.method == 'POST':
+        data = request.get_json(force=True)
+        timestamp_buffer.configure(
+            quantile=float(data['quantile']) if 'quantile' in data else None,
+            min_horizon=float(data['min_horizon_ms']) / 1000 if 'min_horizon_ms' in data else None,
+            max_horizon=float(data['max_horizon_ms']) / 1000 if 'max_horizon_ms' in data else None,
+            enabled=bool(data['enabled']) if 'enabled' in data else None
+        )
+    return jsonify(timestamp_buffer.stats())
+
+@app.route('/gateway', methods=['GET', 'POST'])
+def gateway_settings():
+    """
+    Get or select the order gateway.
+    Expects JSON (POST): {"mode": "dbo" | "cloudex" | "direct"}
+    Returns: {"mode"}
+    """
+    global gateway_mode
+    if request.method == 'POST':
+        mode = request.get_json(force=True).get('mode')
+        if mode not in gateways and mode != 'direct':
+            return jsonify({'status': 'error', 'reason': f"unknown gateway mode: {mode}"}), 400
+        gateway_mode = mode
+    return jsonify({'mode': gateway_mode})
+
 @app.route('/leaderboard', methods=['GET'])
 def get_leaderboard():
     """
@@ -17,14 +17,23 @@ class Order:
         price (float): Order price
         qty (int): Order quantity
         timestamp (float): Time the order was placed
+        dc_id (int): DBO delivery clock - id of the last market-data point the bot saw (optional)
+        response_time (float): DBO delivery clock - seconds from that data point to the order (optional)
+        client_timestamp (float): CloudEx - send time on the bot's synchronized clock (optional)
+        clock_error (float): CloudEx - bot's estimated clock-sync error in seconds (optional)
     """
-    def __init__(self, order_id, trader_id, side, price, qty, timestamp):
+    def __init__(self, order_id, trader_id, side, price, qty, timestamp, dc_id=None, response_time=None,
+                 client_timestamp=None, clock_error=None):
         self.order_id = order_id
         self.trader_id = trader_id
         self.side = side  # 'buy' or 'sell'
         self.price = price
         self.qty = qty
         self.timestamp = timestamp
+        self.dc_id = dc_id
+        self.response_time = response_time
+        self.client_timestamp = client_timestamp
+        self.clock_error = clock_error
 
 class OrderBook:
     """
@@ -37,7 +46,8 @@ class OrderBook:
         self.bids = deque()  # buy orders, max price first
         self.asks = deque()  # sell orders, min price first
         self.trades = []
-        self._lock = threading.Lock()
+        # Reentrant: add_order holds it while calling match()
+        self._lock = threading.RLock()
 
     def add_order(self, order: 'Order'):
         """
@@ -45,8 +55,7 @@ class OrderBook:
         Args:
             order (Order): The order to add
         """
-        if order.price <= 0 or order.qty <= 0:
-            raise ValueError("Order price and quantity must be positive.")
+        self.validate(order)
         with self._lock:
             if order.side == 'buy':
                 self.bids.append(order)
@@ -56,6 +65,15 @@ class OrderBook:
                 self.asks = deque(sorted(self.asks, key=lambda o: (o.price, o.timestamp)))
             self.match()
 
+    def validate(self, order: 'Order'):
+        """
+        Check an order before it is queued or added.
+        Raises:
+            ValueError: If the price or quantity is not positive
+        """
+        if order.price <= 0 or order.qty <= 0:
+            raise ValueError("Order price and quantity must be positive.")
+
     def match(self):
         """
         Attempt to match top buy and sell orders. Executes trades if prices cross.
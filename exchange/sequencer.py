@@ -0,0 +1,133 @@
+"""
+DBO Delivery-Clock Order Sequencer
+- Sits in front of OrderBook.add_order at the exchange gateway
+- Orders carry a delivery clock: the last market-data id the bot saw and its
+  local response time since that data point arrived
+- Orders are collected into short batches and released to the matching engine
+  ranked by delivery clock, so a bot's network distance from the exchange does
+  not decide who trades first
+- No order is held longer than a configurable maximum (the fairness latency budget)
+"""
+import itertools
+import threading
+import time
+
+
+class DeliveryClockSequencer:
+    """
+    Batching sequencer ordering orders by (market-data id, response time).
+    - A batch opens with the first pending order and closes batch_window later
+      (never more than max_hold); everything that arrived by then is ranked and
+      released together
+    - Orders without a delivery clock rank after stamped orders, in arrival order
+    - Release runs on its own thread; submit() never blocks on matching
+    """
+    def __init__(self, release, batch_window=0.001, max_hold=0.005):
+        """
+        Args:
+            release (callable): Called with each order in release order
+            batch_window (float): Seconds a batch stays open for later, earlier-clock orders
+            max_hold (float): Upper bound on any order's hold in seconds
+        """
+        self.release = release
+        self.batch_window = batch_window
+        self.max_hold = max_hold
+        self.enabled = True
+        self._pending = []  # (arrival, seq, order)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.batches = 0
+        self.released = 0
+        self.reordered = 0
+        self.rejected = 0
+        self._hold_sum = 0.0
+        self._hold_max = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def configure(self, batch_window=None, max_hold=None, enabled=None):
+        """Change the batch window, maximum hold and/or enable flag"""
+        with self._cond:
+            if batch_window is not None:
+                self.batch_window = max(0.0, batch_window)
+            if max_hold is not None:
+                self.max_hold = max(0.0, max_hold)
+            if enabled is not None:
+                self.enabled = enabled
+            self._cond.notify()
+
+    def submit(self, order):
+        """
+        Queue an order for sequencing.
+        Args:
+            order (Order): Order with optional dc_id and response_time attributes
+        """
+        with self._cond:
+            self._pending.append((time.monotonic(), next(self._seq), order))
+            if len(self._pending) == 1:
+                self._cond.notify()
+
+    @staticmethod
+    def rank(entry):
+        """Sort key of a pending (arrival, seq, order) entry: delivery clock, then arrival"""
+        _, seq, order = entry
+        if order.dc_id is None:
+            return (1, 0, 0.0, seq)
+        return (0, order.dc_id, order.response_time or 0.0, seq)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # The batch closes a window after its first order, capped by the hold budget
+                close_at = self._pending[0][0] + (min(self.batch_window, self.max_hold) if self.enabled else 0.0)
+                delay = close_at - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(timeout=delay)
+                    continue
+                split = len(self._pending)
+                while split and self._pending[split - 1][0] > close_at:
+                    split -= 1
+                batch = self._pending[:split]
+                del self._pending[:split]
+            self._release_batch(batch)
+
+    def _release_batch(self, batch):
+        now = time.monotonic()
+        ranked = sorted(batch, key=self.rank)
+        self.batches += 1
+        for position, entry in enumerate(ranked):
+            arrival, _, order = entry
+            hold = now - arrival
+            self._hold_sum += hold
+            self._hold_max = max(self._hold_max, hold)
+            if entry is not batch[position]:
+                self.reordered += 1
+            try:
+                self.release(order)
+                self.released += 1
+            except Exception as e:
+                self.rejected += 1
+                print(f"Sequenced order {order.order_id} rejected: {e}")
+
+    def stats(self):
+        """
+        Returns sequencing statistics.
+        Returns:
+            dict: Settings, batch/order counts, orders moved by ranking, mean and max hold (ms)
+        """
+        handled = self.released + self.rejected
+        return {
+            'enabled': self.enabled,
+            'batch_window_ms': self.batch_window * 1000,
+            'max_hold_ms': self.max_hold * 1000,
+            'pending': len(self._pending),
+            'batches': self.batches,
+            'released': self.released,
+            'rejected': self.rejected,
+            'reordered': self.reordered,
+            'mean_batch_size': handled / self.batches if self.batches else 0.0,
+            'mean_hold_ms': self._hold_sum / handled * 1000 if handled else 0.0,
+            'max_hold_ms_observed': self._hold_max * 1000
+        }
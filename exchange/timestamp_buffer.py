@@ -0,0 +1,184 @@
+"""
+CloudEx Timestamp-Ordered Order Release Buffer
+- Sits in front of OrderBook.add_order at the exchange gateway
+- Orders carry a timestamp from the bot's synchronized clock
+- Each order is held until its timestamp plus a release horizon, then handed to
+  the matching engine in timestamp order (min-heap), so orders sent earlier
+  trade first regardless of network path
+- The horizon follows a high quantile of observed (arrival - timestamp) delays
+  plus the bots' reported clock-sync error, so it is only as long as needed
+- No order is held longer than max_horizon past its arrival, so a client clock
+  running ahead cannot park its orders in the buffer
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class TimestampOrderBuffer:
+    """
+    Hold-and-release buffer ordering orders by client timestamp.
+    - An order is released once the exchange clock passes timestamp + horizon
+    - The horizon is recomputed every `update_every` orders as the `quantile` of
+      recent (delay + reported clock error), clipped to [min_horizon, max_horizon]
+    - Orders arriving after their release time are released at once and counted
+      as late (they may trade behind later-stamped orders)
+    - An order still held max_horizon after its arrival (its timestamp is ahead
+      of the exchange clock) is released at once and counted as capped
+    - Delays from timestamps in the future count as 0 towards the horizon
+    - Orders without a timestamp are stamped with their arrival time
+    - Release runs on its own thread; submit() never blocks on matching
+    """
+    def __init__(self, release, quantile=0.99, min_horizon=0.0, max_horizon=0.05,
+                 initial_horizon=0.002, window=1024, update_every=32):
+        """
+        Args:
+            release (callable): Called with each order in release order
+            quantile (float): Quantile of recent delays the horizon covers
+            min_horizon (float): Lower bound on the horizon in seconds
+            max_horizon (float): Upper bound on the horizon (latency budget) in seconds
+            initial_horizon (float): Horizon used until enough delays are observed
+            window (int): Number of recent delays the quantile is taken over
+            update_every (int): Orders between horizon updates
+        """
+        self.release = release
+        self.quantile = quantile
+        self.min_horizon = min_horizon
+        self.max_horizon = max_horizon
+        self.horizon = initial_horizon
+        self.update_every = update_every
+        self.enabled = True
+        self._delays = deque(maxlen=window)
+        # Pending orders as [client_timestamp, seq, arrival, order, done] entries, shared by
+        # the timestamp heap and the arrival-ordered queue; whichever releases an entry marks it done
+        self._heap = []
+        self._arrivals = deque()
+        self._seq = itertools.count()
+        self.pending = 0
+        self._cond = threading.Condition()
+        self.submitted = 0
+        self.released = 0
+        self.rejected = 0
+        self.late = 0
+        self.capped = 0
+        self._hold_sum = 0.0
+        self._hold_max = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def configure(self, quantile=None, min_horizon=None, max_horizon=None, enabled=None):
+        """Change the horizon quantile, bounds and/or enable flag"""
+        with self._cond:
+            if quantile is not None:
+                self.quantile = quantile
+            if min_horizon is not None:
+                self.min_horizon = max(0.0, min_horizon)
+            if max_horizon is not None:
+                self.max_horizon = max(self.min_horizon, max_horizon)
+            if enabled is not None:
+                self.enabled = enabled
+            self._update_horizon()
+            self._cond.notify()
+
+    def submit(self, order):
+        """
+        Queue an order for timestamp-ordered release.
+        Args:
+            order (Order): Order with optional client_timestamp and clock_error attributes
+        """
+        arrival = time.time()
+        stamp = order.client_timestamp if order.client_timestamp is not None else arrival
+        with self._cond:
+            if order.client_timestamp is not None:
+                self._delays.append(max(0.0, arrival - stamp) + (order.clock_error or 0.0))
+            self.submitted += 1
+            if self.submitted % self.update_every == 0:
+                self._update_horizon()
+            if self.enabled and arrival >= stamp + self.horizon:
+                # Already past its release time on arrival
+                self.late += 1
+            earliest = self._heap[0][0] if self._heap else None
+            entry = [stamp, next(self._seq), arrival, order, False]
+            heapq.heappush(self._heap, entry)
+            self._arrivals.append(entry)
+            self.pending += 1
+            if earliest is None or stamp < earliest:
+                self._cond.notify()
+
+    def _update_horizon(self):
+        if self._delays:
+            horizon = float(np.quantile(np.fromiter(self._delays, dtype=float), self.quantile))
+            self.horizon = min(max(horizon, self.min_horizon), self.max_horizon)
+
+    def _next_release(self):
+        """Take the next entry due for release, or return the seconds until one is due"""
+        # Drop entries already released through the other queue
+        while self._heap and self._heap[0][4]:
+            heapq.heappop(self._heap)
+        while self._arrivals and self._arrivals[0][4]:
+            self._arrivals.popleft()
+        if not self._heap:
+            return None
+        now = time.time()
+        entry = self._heap[0]
+        oldest = self._arrivals[0]
+        release_at = entry[0] + self.horizon
+        capped_at = oldest[2] + self.max_horizon
+        if not self.enabled or release_at <= now:
+            heapq.heappop(self._heap)
+        elif capped_at <= now:
+            # Held for the whole latency budget: its timestamp is ahead of the exchange clock
+            entry = self._arrivals.popleft()
+            self.capped += 1
+        else:
+            return min(release_at, capped_at) - now
+        entry[4] = True
+        self.pending -= 1
+        return entry
+
+    def _run(self):
+        while True:
+            with self._cond:
+                entry = self._next_release()
+                while not isinstance(entry, list):
+                    self._cond.wait(timeout=entry)
+                    entry = self._next_release()
+            _, _, arrival, order, _ = entry
+            hold = time.time() - arrival
+            self._hold_sum += hold
+            self._hold_max = max(self._hold_max, hold)
+            try:
+                self.release(order)
+                self.released += 1
+            except Exception as e:
+                self.rejected += 1
+                print(f"Buffered order {order.order_id} rejected: {e}")
+
+    def stats(self):
+        """
+        Returns buffer statistics.
+        Returns:
+            dict: Settings, current horizon, order counts, late and capped orders, mean and max hold (ms)
+        """
+        handled = self.released + self.rejected
+        delays = np.fromiter(self._delays, dtype=float) if self._delays else None
+        return {
+            'enabled': self.enabled,
+            'quantile': self.quantile,
+            'horizon_ms': self.horizon * 1000,
+            'min_horizon_ms': self.min_horizon * 1000,
+            'max_horizon_ms': self.max_horizon * 1000,
+            'pending': self.pending,
+            'submitted': self.submitted,
+            'released': self.released,
+            'rejected': self.rejected,
+            'late': self.late,
+            'capped': self.capped,
+            'mean_hold_ms': self._hold_sum / handled * 1000 if handled else 0.0,
+            'max_hold_ms_observed': self._hold_max * 1000,
+            'median_delay_ms': float(np.median(delays)) * 1000 if delays is not None else None
+        }
@@ -9,16 +9,19 @@ comparing basic multicast vs. Jasper-inspired multicast approaches.
 
 import os
 import sys
-import time
 import argparse
-from scripts.comparison_framework import FairnessComparator
+from scripts.comparison_framework import FairnessComparator, BACKENDS
+from scripts.benchmark_scheduler import IMPLEMENTATIONS, build_jobs, run_jobs
 
-def run_full_benchmark(test_scenarios=None):
+def run_full_benchmark(test_scenarios=None, backend='mininet', seeds=None, workers=None):
     """
     Run a complete benchmark comparing both multicast implementations
     
     Args:
         test_scenarios: List of test scenarios to run. If None, default scenarios will be used.
+        backend: 'mininet' (measured on a Mininet network) or 'simulation' (discrete-event simulator)
+        seeds: Seeds to repeat every scenario with (None: one run per scenario)
+        workers: Concurrent jobs (default: one per core for simulation, one for mininet)
     """
     if test_scenarios is None:
         # Define default test scenarios
@@ -46,6 +49,27 @@ def run_full_benchmark(test_scenarios=None):
                 'duration': 10,
                 'message_rate': 200,  # 200 messages per second
                 'message_size': 100   # 100 bytes per message
+            },
+            {
+                'name': 'Poisson',
+                'duration': 10,
+                'message_rate': 200,  # 200 messages per second on average
+                'message_size': 100,
+                'arrival': {'process': 'poisson'}
+            },
+            {
+                'name': 'Hawkes Microburst',
+                'duration': 10,
+                'message_rate': 200,
+                'message_size': 100,
+                'arrival': {'process': 'hawkes', 'branching_ratio': 0.8, 'decay': 200.0}
+            },
+            {
+                'name': 'Market Open',
+                'duration': 10,
+                'message_rate': 100,
+                'message_size': 100,
+                'arrival': {'process': 'market_open', 'peak_multiplier': 50.0, 'decay_time': 0.5}
             }
         ]
     
@@ -55,20 +79,16 @@ def run_full_benchmark(test_scenarios=None):
     print(f"Running {len(test_scenarios)} test scenarios")
     
     # Create the comparator
-    comparator = FairnessComparator()
+    comparator = FairnessComparator(backend=backend)
     
-    # Run benchmarks for each scenario and each implementation
-    for scenario in test_scenarios:
-        print("\n" + "=" * 40)
-        print(f"Test Scenario: {scenario['name']}")
-        print("=" * 40)
-        
-        # Test all implementations with this scenario
-        for implementation in ['basic_multicast', 'jasper_multicast', 'dbo_multicast']:
-            comparator.run_benchmark(implementation, scenario)
-            
-            # Small delay between tests
-            time.sleep(1)
+    # Every (scenario, seed, implementation) run is an independent job
+    jobs = build_jobs(test_scenarios, IMPLEMENTATIONS, seeds)
+    print(f"Running {len(jobs)} jobs")
+    results = run_jobs(jobs, backend, workers)
+    
+    # Merge in job order so plots and summaries do not depend on which job finished first
+    for (_, implementation), result in zip(jobs, results):
+        comparator.record_metrics(implementation, result)
     
     # Generate comparison plots
     print("\nGenerating comparison visualizations...")
@@ -97,12 +117,18 @@ def run_full_benchmark(test_scenarios=None):
 def main():
     """Main function for standalone usage"""
     parser = argparse.ArgumentParser(description='Multicast Optimization Benchmark Suite')
-    parser.add_argument('--scenarios', type=int, default=4, help='Number of test scenarios to run (1-4)')
+    parser.add_argument('--scenarios', type=int, default=7, help='Number of test scenarios to run (1-7)')
+    parser.add_argument('--backend', type=str, default='mininet', choices=BACKENDS,
+                        help='Latency source (mininet = measured, needs root; simulation = discrete-event simulator)')
+    parser.add_argument('--seeds', type=int, default=None,
+                        help='Repeat every scenario with seeds 0..N-1')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Concurrent jobs (default: all cores for simulation, 1 for mininet)')
+    parser.add_argument('--receivers', type=int, default=4,
+                        help='Receiving hosts per scenario (e.g. 16, 64, 256 with topology/topology_factory.py)')
     
     args = parser.parse_args()
     
-    # Limit the number of scenarios based on user input
-    num_scenarios = min(max(1, args.scenarios), 4)
     
     # Define default test scenarios
     all_scenarios = [
@@ -129,14 +155,39 @@ def main():
             'duration': 10,
             'message_rate': 200,
             'message_size': 100
+        },
+        {
+            'name': 'Poisson',
+            'duration': 10,
+            'message_rate': 200,
+            'message_size': 100,
+            'arrival': {'process': 'poisson'}
+        },
+        {
+            'name': 'Hawkes Microburst',
+            'duration': 10,
+            'message_rate': 200,
+            'message_size': 100,
+            'arrival': {'process': 'hawkes', 'branching_ratio': 0.8, 'decay': 200.0}
+        },
+        {
+            'name': 'Market Open',
+            'duration': 10,
+            'message_rate': 100,
+            'message_size': 100,
+            'arrival': {'process': 'market_open', 'peak_multiplier': 50.0, 'decay_time': 0.5}
         }
     ]
     
+    # Limit the number of scenarios based on user input
+    num_scenarios = min(max(1, args.scenarios), len(all_scenarios))
+    
     # Use only the requested number of scenarios
-    selected_scenarios = all_scenarios[:num_scenarios]
+    selected_scenarios = [dict(scenario, receivers=args.receivers) for scenario in all_scenarios[:num_scenarios]]
     
     # Run the benchmark
-    run_full_benchmark(selected_scenarios)
+    seeds = list(range(args.seeds)) if args.seeds else None
+    run_full_benchmark(selected_scenarios, backend=args.backend, seeds=seeds, workers=args.workers)
 
 if __name__ == '__main__':
     main()
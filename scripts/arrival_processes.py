@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Inter-arrival processes for feed scenarios
+"""
+
+import numpy as np
+
+
+class ArrivalProcess:
+    """
+    Base class for message arrival processes
+    - Subclasses precompute a full schedule of send times as a NumPy array
+    - Schedules are relative to the start of the run, in seconds, and sorted
+    """
+    name = 'base'
+
+    def __init__(self, rate):
+        """
+        Args:
+            rate: Mean messages per second
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = float(rate)
+
+    def schedule(self, duration, rng):
+        """Return sorted send times in [0, duration)"""
+        raise NotImplementedError
+
+
+class ConstantArrivals(ArrivalProcess):
+    """Evenly spaced arrivals (the original fixed-rate scenarios)"""
+    name = 'constant'
+
+    def schedule(self, duration, rng):
+        return np.arange(0.0, duration, 1.0 / self.rate)
+
+
+class PoissonArrivals(ArrivalProcess):
+    """Homogeneous Poisson arrivals with exponential inter-arrival times"""
+    name = 'poisson'
+
+    def schedule(self, duration, rng):
+        count = rng.poisson(self.rate * duration)
+        return np.sort(rng.uniform(0.0, duration, size=count))
+
+
+class HawkesArrivals(ArrivalProcess):
+    """
+    Self-exciting Hawkes process with an exponential kernel
+    - Every arrival raises the intensity by branching_ratio * decay, decaying at rate `decay`
+    - Simulated with the branching (cluster) representation, one vectorized pass per generation
+    - Baseline intensity is chosen so the long-run mean equals `rate`
+    """
+    name = 'hawkes'
+
+    def __init__(self, rate, branching_ratio=0.7, decay=200.0):
+        """
+        Args:
+            rate: Mean messages per second
+            branching_ratio: Expected children per arrival (must be < 1)
+            decay: Kernel decay rate in 1/s (200 means bursts fade over ~5 ms)
+        """
+        super().__init__(rate)
+        if not 0 <= branching_ratio < 1:
+            raise ValueError("Branching ratio must be in [0, 1)")
+        self.branching_ratio = branching_ratio
+        self.decay = decay
+
+    def schedule(self, duration, rng):
+        baseline = self.rate * (1.0 - self.branching_ratio)
+        generation = rng.uniform(0.0, duration, size=rng.poisson(baseline * duration))
+        events = [generation]
+        while generation.size:
+            children = rng.poisson(self.branching_ratio, size=generation.size)
+            parents = np.repeat(generation, children)
+            generation = parents + rng.exponential(1.0 / self.decay, size=parents.size)
+            generation = generation[generation < duration]
+            events.append(generation)
+        return np.sort(np.concatenate(events))
+
+
+def _thinning(rate_fn, max_rate, duration, rng):
+    """Sample an inhomogeneous Poisson process by thinning a homogeneous one at max_rate"""
+    candidates = np.sort(rng.uniform(0.0, duration, size=rng.poisson(max_rate * duration)))
+    keep = rng.random(candidates.size) * max_rate < rate_fn(candidates)
+    return candidates[keep]
+
+
+class ScheduledBursts(ArrivalProcess):
+    """
+    Poisson background traffic with bursts at fixed times
+    - Each burst raises the rate to rate * burst_multiplier for burst_duration seconds
+    """
+    name = 'bursts'
+
+    def __init__(self, rate, burst_times=(1.0,), burst_duration=0.05, burst_multiplier=20.0):
+        """
+        Args:
+            rate: Background messages per second
+            burst_times: Burst start times in seconds from the start of the run
+            burst_duration: Length of each burst in seconds
+            burst_multiplier: Rate multiplier during a burst
+        """
+        super().__init__(rate)
+        self.burst_times = np.asarray(burst_times, dtype=float)
+        self.burst_duration = burst_duration
+        self.burst_multiplier = burst_multiplier
+
+    def schedule(self, duration, rng):
+        peak = self.rate * self.burst_multiplier
+
+        def rate_fn(t):
+            since = t[:, None] - self.burst_times[None, :]
+            in_burst = ((since >= 0) & (since < self.burst_duration)).any(axis=1)
+            return np.where(in_burst, peak, self.rate)
+
+        return _thinning(rate_fn, peak, duration, rng)
+
+
+class MarketOpenSpike(ArrivalProcess):
+    """
+    Market-open spike: the rate starts at rate * peak_multiplier and decays
+    exponentially to `rate` with time constant `decay_time`
+    """
+    name = 'market_open'
+
+    def __init__(self, rate, peak_multiplier=50.0, decay_time=0.5):
+        """
+        Args:
+            rate: Steady-state messages per second
+            peak_multiplier: Rate multiplier at the open
+            decay_time: Seconds for the excess rate to decay by a factor of e
+        """
+        super().__init__(rate)
+        self.peak_multiplier = peak_multiplier
+        self.decay_time = decay_time
+
+    def schedule(self, duration, rng):
+        peak = self.rate * self.peak_multiplier
+
+        def rate_fn(t):
+            return self.rate + (peak - self.rate) * np.exp(-t / self.decay_time)
+
+        return _thinning(rate_fn, peak, duration, rng)
+
+
+ARRIVAL_PROCESSES = {
+    cls.name: cls for cls in (ConstantArrivals, PoissonArrivals, HawkesArrivals,
+                              ScheduledBursts, MarketOpenSpike)
+}
+
+
+def build_schedule(test_scenario, seed=None):
+    """
+    Precompute the send-time schedule for a benchmark scenario
+
+    Args:
+        test_scenario: Scenario dict with 'duration' and 'message_rate', and an optional
+            'arrival' dict: {'process': name, **process parameters}. Scenarios without
+            'arrival' use constant spacing.
+        seed: Seed for reproducible schedules
+
+    Returns:
+        Sorted NumPy array of send times in seconds from the start of the run
+    """
+    arrival = dict(test_scenario.get('arrival') or {'process': 'constant'})
+    process_name = arrival.pop('process', 'constant')
+    if process_name not in ARRIVAL_PROCESSES:
+        raise ValueError(f"Unknown arrival process: {process_name}")
+    process = ARRIVAL_PROCESSES[process_name](test_scenario['message_rate'], **arrival)
+    rng = np.random.default_rng(seed)
+    return process.schedule(test_scenario['duration'], rng)
+
+
+def burst_intensity(timestamps, window=0.01, min_per_window=10):
+    """
+    Peak-to-mean rate ratio of a schedule
+
+    Counts arrivals in fixed windows and divides the busiest window's rate by the
+    mean rate. Constant schedules score about 1; microbursts score far higher.
+
+    Args:
+        timestamps: Sorted send times in seconds
+        window: Shortest window length in seconds
+        min_per_window: Windows are widened until the mean count per window reaches
+            this, so sparse schedules are not scored as bursty by quantization alone
+
+    Returns:
+        Peak-to-mean ratio (0.0 for an empty schedule)
+    """
+    if len(timestamps) == 0:
+        return 0.0
+    timestamps = np.asarray(timestamps)
+    span = max(timestamps[-1], window)
+    mean_rate = len(timestamps) / span
+    window = max(window, min_per_window / mean_rate)
+    counts = np.bincount((timestamps / window).astype(np.int64))
+    return float(counts.max() / (mean_rate * window))
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Asynchronous, rate-limited logging for the controller hot path
+"""
+
+import logging
+import logging.handlers
+import queue
+import time
+
+from ryu.lib import hub
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener
+    - The stock handler formats every record in the caller; here msg and args are
+      queued as-is, so %-formatting happens on the listener thread
+    - A full queue drops the record (counted) instead of blocking the caller
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def start_async_logging(logger, queue_size=65536):
+    """
+    Route a logger's records through a bounded queue to a background listener
+
+    The listener writes to the logger's own handlers, or the root handlers if it
+    has none, so output goes to the same place as before.
+
+    Args:
+        logger: Logger to make asynchronous (e.g. a RyuApp's self.logger)
+        queue_size: Maximum number of queued records before new ones are dropped
+
+    Returns:
+        The started logging.handlers.QueueListener; its `handler` attribute
+        is the queue handler (with a `dropped` count)
+    """
+    handlers = list(logger.handlers) or list(logging.getLogger().handlers) or [logging.StreamHandler()]
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = _DeferredQueueHandler(log_queue)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.handler = queue_handler
+    listener.start()
+    return listener
+
+
+class SampledLogger:
+    """
+    Rate limiter and sampler for per-packet log lines
+    - Logs at most one in every `sample_every` events, and no more than `rate`
+      lines per second on average (token bucket with `burst` capacity)
+    - Arguments are passed through for lazy %-formatting; nothing is formatted
+      for suppressed events
+    - Counts events and suppressed lines for interval summaries
+    """
+
+    def __init__(self, logger, rate=20.0, burst=50, sample_every=1):
+        """
+        Args:
+            logger: Logger to write to
+            rate: Average per-packet lines per second allowed (0 disables them)
+            burst: Lines allowed back-to-back before the rate applies
+            sample_every: Consider only every Nth event for logging
+        """
+        self.logger = logger
+        self.events = 0
+        self.suppressed = 0
+        self.configure(rate, burst, sample_every)
+
+    def configure(self, rate, burst=None, sample_every=None):
+        """Change the rate limit, burst size and/or sampling interval"""
+        self.rate = max(0.0, rate)
+        if burst is not None:
+            self.burst = max(1, burst)
+        if sample_every is not None:
+            self.sample_every = max(1, int(sample_every))
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+
+    def log(self, msg, *args, level=logging.INFO):
+        """
+        Log a per-packet event if the sampler and rate limiter allow it
+
+        Returns:
+            True if the line was logged, False if it was suppressed
+        """
+        self.events += 1
+        if self.rate <= 0 or self.events % self.sample_every:
+            self.suppressed += 1
+            return False
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+        if self._tokens < 1.0:
+            self.suppressed += 1
+            return False
+        self._tokens -= 1.0
+        self.logger.log(level, msg, *args)
+        return True
+
+    def take_counts(self):
+        """
+        Return and reset the event counters
+
+        Returns:
+            Tuple of (events, suppressed) since the previous call
+        """
+        counts = (self.events, self.suppressed)
+        self.events = 0
+        self.suppressed = 0
+        return counts
+
+
+class IntervalSummary:
+    """
+    Emit one summary log line per interval on its own Ryu green thread
+    - `summarize(elapsed)` builds the line from counters and returns it, or
+      None to skip the interval
+    """
+
+    def __init__(self, logger, summarize, interval=5.0):
+        """
+        Args:
+            logger: Logger to write to
+            summarize: Callable taking the elapsed seconds and returning a message or None
+            interval: Seconds between summaries
+        """
+        self.logger = logger
+        self.summarize = summarize
+        self.interval = interval
+        self._running = True
+        self._thread = hub.spawn(self._run)
+
+    def stop(self):
+        """Stop emitting summaries"""
+        self._running = False
+
+    def _run(self):
+        last = time.monotonic()
+        while self._running:
+            hub.sleep(self.interval)
+            now = time.monotonic()
+            try:
+                message = self.summarize(now - last)
+            except Exception:
+                self.logger.exception("Log summary failed")
+                message = None
+            last = now
+            if message:
+                self.logger.info(message)
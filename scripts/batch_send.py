@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Batched datagram sending for the traffic generator
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p),
+                ('iov_len', ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p),
+                ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.POINTER(_IOVec)),
+                ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p),
+                ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _MsgHdr),
+                ('msg_len', ctypes.c_uint)]
+
+
+def _load_sendmmsg():
+    """Return libc's sendmmsg, or None where it is not available (non-Linux, old glibc)"""
+    libc_name = ctypes.util.find_library('c')
+    if libc_name is None:
+        return None
+    try:
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        sendmmsg = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int]
+    sendmmsg.restype = ctypes.c_int
+    return sendmmsg
+
+
+_sendmmsg = _load_sendmmsg()
+
+
+class BatchSender:
+    """
+    Send many datagrams per system call on a connected UDP socket
+    - Uses sendmmsg(2) where available
+    - Falls back to one send() per datagram elsewhere
+    - Buffers must be bytearrays so their memory can be handed to the kernel without copying
+    """
+
+    def __init__(self, sock, max_batch=64, use_sendmmsg=True):
+        """
+        Initialize the sender
+
+        Args:
+            sock: UDP socket already connected to its destination
+            max_batch: Largest number of datagrams passed to one sendmmsg call
+            use_sendmmsg: Set to False to force the per-datagram fallback
+        """
+        self.sock = sock
+        self.max_batch = max_batch
+        self.use_sendmmsg = use_sendmmsg and _sendmmsg is not None
+        if self.use_sendmmsg:
+            # Header arrays are allocated once and re-pointed for every batch
+            self._iovecs = (_IOVec * max_batch)()
+            self._msgs = (_MMsgHdr * max_batch)()
+            for i in range(max_batch):
+                self._msgs[i].msg_hdr.msg_iov = ctypes.pointer(self._iovecs[i])
+                self._msgs[i].msg_hdr.msg_iovlen = 1
+
+    def send(self, buffers):
+        """
+        Send a batch of datagrams
+
+        Args:
+            buffers: Sequence of bytearray payloads
+
+        Returns:
+            Number of datagrams sent
+        """
+        if not self.use_sendmmsg:
+            for buf in buffers:
+                try:
+                    self.sock.send(buf)
+                except ConnectionRefusedError:
+                    # ICMP error left over from an earlier datagram; retry this one
+                    self.sock.send(buf)
+            return len(buffers)
+
+        sent = 0
+        fd = self.sock.fileno()
+        while sent < len(buffers):
+            chunk = buffers[sent:sent + self.max_batch]
+            # Keep the ctypes views alive until the call returns
+            views = []
+            for i, buf in enumerate(chunk):
+                view = (ctypes.c_char * len(buf)).from_buffer(buf)
+                views.append(view)
+                self._iovecs[i].iov_base = ctypes.addressof(view)
+                self._iovecs[i].iov_len = len(buf)
+            result = _sendmmsg(fd, self._msgs, len(chunk), 0)
+            del views
+            if result < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ECONNREFUSED, errno.EINTR):
+                    # Pending ICMP error from an earlier datagram, or a signal; retry the batch
+                    continue
+                raise OSError(err, os.strerror(err))
+            sent += result
+        return sent
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Scheduler running independent benchmark jobs in a process pool
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from scripts.comparison_framework import FairnessComparator
+
+IMPLEMENTATIONS = ('basic_multicast', 'jasper_multicast', 'dbo_multicast')
+
+
+def build_jobs(test_scenarios, implementations=IMPLEMENTATIONS, seeds=None):
+    """
+    Expand scenarios into (scenario, implementation, seed) jobs
+
+    Args:
+        test_scenarios: List of scenario dicts
+        implementations: Implementations to run on every scenario
+        seeds: Seeds to repeat every scenario with (None: each scenario's own seed, once)
+
+    Returns:
+        List of (scenario, implementation) pairs, the scenario carrying the job's seed,
+        in scenario, seed, implementation order
+    """
+    jobs = []
+    for scenario in test_scenarios:
+        for seed in (seeds if seeds is not None else [scenario.get('seed')]):
+            job_scenario = dict(scenario) if seed is None else dict(scenario, seed=seed)
+            for implementation in implementations:
+                jobs.append((job_scenario, implementation))
+    return jobs
+
+
+def default_workers(backend):
+    """
+    Pool size for a backend
+
+    Measured runs share the host's Open vSwitch and switch interface names, so
+    they run one at a time; simulated runs are independent and use every core.
+    """
+    if backend == 'mininet':
+        return 1
+    return os.cpu_count() or 1
+
+
+def _run_job(job):
+    """Run one job in a worker process and return its results"""
+    scenario, implementation, backend = job
+    return FairnessComparator(backend=backend).run_benchmark(implementation, scenario)
+
+
+def run_jobs(jobs, backend, workers=None):
+    """
+    Run benchmark jobs, concurrently where the backend allows
+
+    Args:
+        jobs: (scenario, implementation) pairs from build_jobs
+        backend: FairnessComparator backend
+        workers: Pool size (default: default_workers(backend))
+
+    Returns:
+        run_benchmark results, in job order whatever order the jobs finished in
+    """
+    workers = min(workers or default_workers(backend), max(1, len(jobs)))
+    if backend == 'mininet' and workers > 1:
+        raise ValueError("Measured runs share one Open vSwitch; run them with one worker")
+    tasks = [(scenario, implementation, backend) for scenario, implementation in jobs]
+    if workers == 1:
+        return [_run_job(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_job, tasks))
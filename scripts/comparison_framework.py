@@ -8,26 +8,40 @@ import numpy as np
 import matplotlib.pyplot as plt
 import time
 import subprocess
-import csv
 import os
 
+from scripts.arrival_processes import build_schedule, burst_intensity
+from scripts.event_simulator import simulate_scenario
+from scripts.latency_metrics import fairness_window, jain_index, summarize
+from scripts.results_store import PERCENTILE_COLUMNS, ResultsStore
+
+# Where latencies come from: 'mininet' measures a real run (scripts/mininet_benchmark.py),
+# 'simulation' runs the discrete-event simulator (scripts/event_simulator.py)
+BACKENDS = ('mininet', 'simulation')
+
 class FairnessComparator:
-    def __init__(self):
+    def __init__(self, backend='mininet'):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        self.backend = backend
         self.metrics = {
             'basic_multicast': {
                 'latency': [],
                 'fairness_index': [],
-                'bandwidth_efficiency': []
+                'bandwidth_efficiency': [],
+                'burst_intensity': []
             },
             'jasper_multicast': {
                 'latency': [],
                 'fairness_index': [],
-                'bandwidth_efficiency': []
+                'bandwidth_efficiency': [],
+                'burst_intensity': []
             },
             'dbo_multicast': {
                 'latency': [],
                 'fairness_index': [],
                 'bandwidth_efficiency': [],
+                'burst_intensity': [],
                 'delivery_clock_fairness': [],
                 'delivery_clock_window': []
             }
@@ -36,6 +50,8 @@ class FairnessComparator:
         # Ensure results directory exists
         if not os.path.exists(self.results_dir):
             os.makedirs(self.results_dir)
+        # Summary rows and raw samples of every run
+        self.store = ResultsStore(os.path.join(self.results_dir, 'store'))
         
     def run_benchmark(self, implementation, test_scenario):
         """
@@ -47,149 +63,135 @@ class FairnessComparator:
                 - duration: Test duration in seconds
                 - message_rate: Messages per second
                 - message_size: Size of each message in bytes
+                - arrival: Optional inter-arrival process, e.g. {'process': 'hawkes'}
+                - seed: Optional seed for the arrival schedule
+                - receivers: Optional number of receiving hosts (default 4)
+                - network / simulator: Optional SimNetwork / EventSimulator options
+                  (simulation backend)
         """
         print(f"Running benchmark for {implementation}...")
         
         # Start the controller according to implementation
+        report_url = None
         if implementation == 'basic_multicast':
             controller_cmd = "ryu-manager scripts/sdn_controller.py"
         elif implementation == 'jasper_multicast':
             controller_cmd = "ryu-manager scripts/jasper_multicast_controller.py"
+            # Jasper tunes its trees and deadline from receiver-measured latencies
+            report_url = "http://127.0.0.1:5006/api/report_delivery_latencies"
         elif implementation == 'dbo_multicast':
             controller_cmd = "ryu-manager scripts/dbo_multicast_controller.py"
         else:
             raise ValueError(f"Unknown implementation: {implementation}")
         
-        # Simulate latency measurements - in real implementation, this would come from actual network
-        if implementation == 'dbo_multicast':
-            latencies, delivery_clocks = self._simulate_dbo_latencies(test_scenario)
+        # Precompute the feed schedule so results can be labelled by burst intensity
+        schedule = build_schedule(test_scenario, seed=test_scenario.get('seed'))
+        intensity = burst_intensity(schedule)
+        test_scenario = dict(test_scenario, burst_intensity=intensity)
+        
+        if self.backend == 'simulation':
+            # Discrete-event run: per-host means, fairness averaged over every message
+            sim = simulate_scenario(implementation, test_scenario)
+            summary = sim.summary()
+            latencies = [float(x) for x in sim.receiver_latencies()]
+            # Delivery clocks are reported in seconds
+            delivery_clocks = [float(x) / 1000.0 for x in sim.delivery_clocks()] \
+                if implementation == 'dbo_multicast' else None
+            avg_latency = summary['avg_latency_ms']
+            fairness = summary['mean_jain_index']
+            bandwidth_efficiency = summary['bandwidth_efficiency']
+            matrix = sim.latencies
+            percentiles = {}
+            if matrix is None:
+                # Large runs keep no matrix for the store; their percentiles come from the streamed histogram
+                values = sim.latency_percentiles(list(PERCENTILE_COLUMNS.values()))
+                percentiles = {column: float(values[p]) for column, p in PERCENTILE_COLUMNS.items()}
+            message_arrays = {'jain': sim.jain, 'window': sim.window}
+            print(f"  Simulated {summary['messages']} messages x {summary['receivers']} receivers "
+                  f"in {summary['wall_time_s']:.2f}s ({summary['speedup']:.0f}x real time)")
+            print(f"  Queueing: controller {summary['mean_queue_delay_ms']:.3f} ms mean, "
+                  f"replication channel {summary['mean_channel_delay_ms']:.3f} ms mean "
+                  f"({summary['max_channel_delay_ms']:.3f} ms max)")
         else:
-            latencies = self._simulate_latencies(implementation, test_scenario)
-            delivery_clocks = None
-        
-        # Calculate metrics
-        avg_latency = np.mean(latencies)
-        fairness = self.calculate_jains_fairness(latencies)
-        bandwidth_efficiency = self._simulate_bandwidth_efficiency(implementation)
+            # Measured run: the controller and a Mininet network, one-way latency of every copy
+            # (imported here: Mininet is only installed where measured runs happen)
+            from scripts.mininet_benchmark import measure
+            run = measure(controller_cmd, test_scenario, report_url=report_url)
+            summary = summarize(run['latencies'], run['transmissions'])
+            latencies = [float(x) for x in summary['receiver_mean']]
+            avg_latency = summary['avg_latency']
+            fairness = summary['mean_jain']
+            bandwidth_efficiency = summary['bandwidth_efficiency']
+            matrix = run['latencies']
+            percentiles = {}
+            message_arrays = {'jain': summary['jain'], 'window': summary['window'], 'seq': run['seq'],
+                              'send_ns': run['send_ns']}
+            # Each copy's delivery clock is its arrival after the message's first delivery (seconds)
+            delivery_clocks = [float(x) / 1000.0 for x in summary['receiver_clock_mean']] \
+                if implementation == 'dbo_multicast' else None
+            print(f"  Measured {summary['messages']} messages x {summary['receivers']} receivers, "
+                  f"{summary['delivered'] * 100:.2f}% delivered (logs in {run['workdir']})")
         delivery_clock_fairness = None
         delivery_clock_window = None
         if implementation == 'dbo_multicast' and delivery_clocks is not None:
             delivery_clock_fairness = self.calculate_jains_fairness(delivery_clocks)
-            delivery_clock_window = max(delivery_clocks) - min(delivery_clocks) if len(delivery_clocks) > 1 else 0.0
-        
-        # Record metrics
-        self.metrics[implementation]['latency'].append(avg_latency)
-        self.metrics[implementation]['fairness_index'].append(fairness)
-        self.metrics[implementation]['bandwidth_efficiency'].append(bandwidth_efficiency)
-        if implementation == 'dbo_multicast':
-            self.metrics[implementation]['delivery_clock_fairness'].append(delivery_clock_fairness)
-            self.metrics[implementation]['delivery_clock_window'].append(delivery_clock_window)
+            delivery_clock_window = fairness_window(delivery_clocks) if len(delivery_clocks) > 1 else 0.0
         
         print(f"Benchmark results for {implementation}:")
         print(f"  Average Latency: {avg_latency:.3f} ms")
         print(f"  Fairness Index: {fairness:.4f}")
         print(f"  Bandwidth Efficiency: {bandwidth_efficiency:.2f}%")
+        print(f"  Burst Intensity: {intensity:.1f}x")
         if implementation == 'dbo_multicast':
             print(f"  Delivery Clock Fairness: {delivery_clock_fairness:.4f}")
             print(f"  Delivery Clock Window: {delivery_clock_window*1000:.2f} ms")
         
-        # Save results to CSV
-        self._save_results(implementation, test_scenario, {
-            'avg_latency': avg_latency,
-            'fairness': fairness,
-            'bandwidth_efficiency': bandwidth_efficiency,
-            'raw_latencies': latencies,
-            'delivery_clocks': delivery_clocks,
-            'delivery_clock_fairness': delivery_clock_fairness,
-            'delivery_clock_window': delivery_clock_window
-        })
-        
-        return {
+        result = {
             'avg_latency': avg_latency,
             'fairness': fairness,
             'bandwidth_efficiency': bandwidth_efficiency,
+            'burst_intensity': intensity,
             'delivery_clock_fairness': delivery_clock_fairness,
             'delivery_clock_window': delivery_clock_window
         }
-    
-    def _simulate_latencies(self, implementation, test_scenario):
-        """Simulate latencies for the given implementation"""
-        # Number of hosts in our star topology
-        num_hosts = 4
         
-        # Base latency in milliseconds
-        base_latency = 1.0
+        # Save the summary row and raw samples
+        self._save_results(implementation, test_scenario, dict(result, **percentiles), dict(
+            message_arrays, receiver_latency=latencies, delivery_clocks=delivery_clocks), matrix)
         
-        # Generate latencies with different patterns based on implementation
-        if implementation == 'basic_multicast':
-            # Basic multicast tends to have more variance in latencies
-            latencies = [base_latency + np.random.exponential(0.5) for _ in range(num_hosts)]
-        else:  # jasper_multicast
-            # Jasper should have more consistent latencies due to fairness optimization
-            # Still some variance but less than basic
-            latencies = [base_latency + np.random.normal(0.2, 0.1) for _ in range(num_hosts)]
-            
-        return latencies
+        self.record_metrics(implementation, result)
+        return result
     
-    def _simulate_dbo_latencies(self, test_scenario):
+    def record_metrics(self, implementation, result):
         """
-        Simulate DBO-inspired delivery: no clock sync, use logical delivery clocks
-        Returns both observed latencies and logical delivery clocks.
+        Add one run's results to the metrics used for plots and summaries
+        
+        Args:
+            implementation: Implementation the run tested
+            result: Dict returned by run_benchmark (possibly from another process)
         """
-        num_hosts = 4
-        base_latency = 1.0
-        # Simulate random network latency for each host
-        raw_latencies = [base_latency + np.random.uniform(0.0, 1.0) for _ in range(num_hosts)]
-        # Logical delivery clock for each host (arrival time minus min arrival)
-        min_arrival = min(raw_latencies)
-        delivery_clocks = [lat - min_arrival for lat in raw_latencies]
-        return raw_latencies, delivery_clocks
-    
-    def _simulate_bandwidth_efficiency(self, implementation):
-        """Simulate bandwidth efficiency for the given implementation"""
-        # Basic efficiency percentages
-        if implementation == 'basic_multicast':
-            # Basic multicast tends to be less efficient
-            return 70.0 + np.random.normal(0, 5.0)
-        elif implementation == 'jasper_multicast':
-            # Jasper should be more efficient
-            return 85.0 + np.random.normal(0, 3.0)
-        else:  # dbo_multicast
-            # DBO should be more efficient
-            return 90.0 + np.random.normal(0, 2.0)
+        self.metrics[implementation]['latency'].append(result['avg_latency'])
+        self.metrics[implementation]['fairness_index'].append(result['fairness'])
+        self.metrics[implementation]['bandwidth_efficiency'].append(result['bandwidth_efficiency'])
+        self.metrics[implementation]['burst_intensity'].append(result['burst_intensity'])
+        if implementation == 'dbo_multicast':
+            self.metrics[implementation]['delivery_clock_fairness'].append(result['delivery_clock_fairness'])
+            self.metrics[implementation]['delivery_clock_window'].append(result['delivery_clock_window'])
     
-    def _save_results(self, implementation, test_scenario, results):
-        """Save benchmark results to CSV file"""
-        timestamp = time.strftime("%Y%m%d-%H%M%S")
-        filename = f"{self.results_dir}/{implementation}_{timestamp}.csv"
-        
-        # Write test parameters and results
-        with open(filename, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Parameter', 'Value'])
-            writer.writerow(['Implementation', implementation])
-            for key, value in test_scenario.items():
-                writer.writerow([key, value])
-            writer.writerow(['Average Latency (ms)', results['avg_latency']])
-            writer.writerow(['Fairness Index', results['fairness']])
-            writer.writerow(['Bandwidth Efficiency (%)', results['bandwidth_efficiency']])
-            if implementation == 'dbo_multicast':
-                writer.writerow(['Delivery Clock Fairness', results['delivery_clock_fairness']])
-                writer.writerow(['Delivery Clock Window (ms)', results['delivery_clock_window'] * 1000 if results['delivery_clock_window'] is not None else None])
-            
-            # Write raw latencies
-            writer.writerow([])
-            writer.writerow(['Host', 'Latency (ms)'])
-            for i, latency in enumerate(results['raw_latencies']):
-                writer.writerow([f'h{i+1}', latency])
-            
-            if implementation == 'dbo_multicast' and results['delivery_clocks'] is not None:
-                writer.writerow([])
-                writer.writerow(['Host', 'Delivery Clock (ms)'])
-                for i, clock in enumerate(results['delivery_clocks']):
-                    writer.writerow([f'h{i+1}', clock * 1000])
-        
-        print(f"Results saved to {filename}")
+    def _save_results(self, implementation, test_scenario, results, arrays, latencies=None):
+        """
+        Append a run to the results store
+        
+        Args:
+            implementation: Implementation the run tested
+            test_scenario: Scenario the run used
+            results: Summary metrics returned by run_benchmark
+            arrays: Per-receiver and per-message arrays to keep with the run
+            latencies: Optional (messages x receivers) latency matrix in ms
+        """
+        run_id = self.store.append(implementation, test_scenario, results, backend=self.backend,
+                                   latencies=latencies, arrays=arrays)
+        print(f"Results saved to {self.store.root} as run {run_id}")
         
     def calculate_jains_fairness(self, latencies):
         """
@@ -198,18 +200,11 @@ class FairnessComparator:
         Jain's Fairness Index = (sum(x_i))^2 / (n * sum(x_i^2))
         - Result ranges from 1/n (worst case) to 1 (best case)
         - Value of 1 means all latencies are equal
+        - See latency_metrics.jain_index for whole (messages x receivers) matrices
         """
-        if not latencies:
+        if not len(latencies):
             return 0.0
-            
-        n = len(latencies)
-        sum_latencies = sum(latencies)
-        sum_squared = sum(x**2 for x in latencies)
-        
-        if sum_squared == 0:
-            return 1.0  # All values are 0, perfect fairness
-            
-        return (sum_latencies**2) / (n * sum_squared)
+        return jain_index(latencies)
         
     def plot_comparison(self):
         """Generate comparative visualizations of the benchmark results"""
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Queryable controller metrics served at /api/metrics
+"""
+
+import time
+
+from fairness_telemetry import LatencyHistogram
+from packet_classifier import PKT_OTHER, PKT_LLDP, PKT_IGMP, PKT_MULTICAST, PKT_UNICAST
+
+PACKET_KIND_NAMES = {
+    PKT_OTHER: 'other',
+    PKT_LLDP: 'lldp',
+    PKT_IGMP: 'igmp',
+    PKT_MULTICAST: 'multicast',
+    PKT_UNICAST: 'unicast'
+}
+
+# Histogram resolution: 0.5% relative error from 1 us to 10 s (~3200 buckets)
+HISTOGRAM_PRECISION = 0.005
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class _MetricsWindow:
+    """Counters and histograms for one measurement window (since start or last reset)"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.packet_in = dict.fromkeys(PACKET_KIND_NAMES, 0)
+        self.port_deliveries = {}
+        self.latency_histogram = LatencyHistogram(precision=HISTOGRAM_PRECISION)
+        self.window_histogram = LatencyHistogram(precision=HISTOGRAM_PRECISION)
+
+
+class ControllerMetrics:
+    """
+    Measured controller behaviour for benchmarks
+    - PacketIn counts and rates per packet kind
+    - Multicast copies delivered per port
+    - High-resolution histograms of per-copy latency (PacketIn to PacketOut) and of
+      the per-packet fairness window (latest minus earliest copy)
+    - snapshot(reset=True) returns the current window and starts a new one atomically
+    """
+
+    def __init__(self):
+        self._window = _MetricsWindow()
+
+    def count_packet_in(self, kind):
+        """Count one PacketIn of a packet_classifier kind"""
+        self._window.packet_in[kind] += 1
+
+    def count_delivery(self, port, copies=1):
+        """Count multicast copies sent out of a port"""
+        deliveries = self._window.port_deliveries
+        deliveries[port] = deliveries.get(port, 0) + copies
+
+    def record_packet(self, port_latencies, fairness_window=None):
+        """
+        Record one multicast packet once all of its copies are out
+
+        Args:
+            port_latencies: Dict of port -> latency (seconds) from PacketIn to PacketOut
+            fairness_window: Spread of the latencies in seconds; computed if not given
+        """
+        if not port_latencies:
+            return
+        window = self._window
+        for latency in port_latencies.values():
+            window.latency_histogram.record(latency)
+        if fairness_window is None:
+            values = port_latencies.values()
+            fairness_window = max(values) - min(values)
+        window.window_histogram.record(fairness_window)
+
+    def snapshot(self, reset=False, quantiles=DEFAULT_QUANTILES):
+        """
+        Return the metrics of the current window
+
+        Args:
+            reset: Start a new window after taking the snapshot
+            quantiles: Quantiles reported for each histogram
+
+        Returns:
+            Dict with the window start time and length, PacketIn counts and rates,
+            per-port delivery counts, and latency and fairness-window histograms (ms)
+        """
+        window = self._window
+        if reset:
+            # Swap first so events arriving during serialisation land in the new window
+            self._window = _MetricsWindow()
+        elapsed = max(time.time() - window.started, 1e-9)
+        packet_in = {PACKET_KIND_NAMES[kind]: count for kind, count in window.packet_in.items()}
+        total = sum(packet_in.values())
+        return {
+            'window_start': window.started,
+            'elapsed_s': elapsed,
+            'packet_in': {
+                'total': total,
+                'by_kind': packet_in,
+                'rate_per_s': total / elapsed,
+                'rate_by_kind_per_s': {name: count / elapsed for name, count in packet_in.items()}
+            },
+            'port_deliveries': {str(port): count for port, count in sorted(window.port_deliveries.items())},
+            'latency_ms': _histogram_summary(window.latency_histogram, quantiles),
+            'fairness_window_ms': _histogram_summary(window.window_histogram, quantiles),
+            'reset': reset
+        }
+
+
+def _histogram_summary(histogram, quantiles):
+    """Serialise a LatencyHistogram to a JSON-friendly dict in milliseconds"""
+    def to_ms(value):
+        return value * 1000 if value is not None else None
+
+    return {
+        'count': histogram.count,
+        'min': to_ms(histogram.min),
+        'max': to_ms(histogram.max),
+        'mean': to_ms(histogram.mean()),
+        'quantiles': {str(q): to_ms(histogram.quantile(q)) for q in quantiles},
+        'precision': HISTOGRAM_PRECISION,
+        # Non-empty buckets as [upper bound (ms), count]
+        'buckets': [[upper * 1000, count] for upper, count in histogram.buckets()]
+    }
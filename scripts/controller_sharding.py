@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Sharding datapaths across several controller instances
+"""
+
+import json
+import os
+import socket
+import time
+
+from ryu.lib import hub
+
+# Environment of one controller instance (set by scripts/run_sharded_controllers.py)
+ENV_SHARD_INDEX = 'CONTROLLER_SHARD_INDEX'
+ENV_SHARD_COUNT = 'CONTROLLER_SHARD_COUNT'
+ENV_COORD_PORT = 'CONTROLLER_COORD_PORT'
+ENV_PEERS = 'CONTROLLER_PEERS'
+
+# Each shard's Flask API listens on the controller's base port plus index * stride
+API_PORT_STRIDE = 10
+
+
+def shard_index():
+    """Index of this controller instance (0 when not sharded)"""
+    return int(os.environ.get(ENV_SHARD_INDEX, 0))
+
+
+def api_port(base_port):
+    """Flask API port of this shard for a controller whose unsharded port is base_port"""
+    return base_port + API_PORT_STRIDE * shard_index()
+
+
+def owner_of(dpid, count):
+    """Shard index owning a datapath"""
+    return dpid % count
+
+
+class ControllerShard:
+    """
+    One controller instance's share of the network
+    - Owns the datapaths with dpid % count == index: it asks the switch for the
+      MASTER role and handles its PacketIns; for every other switch it takes the
+      SLAVE role, so the switch sends it no PacketIns and PacketIn processing is
+      spread over the instances (and cores)
+    - Coordination channel: small JSON datagrams to peer instances carry
+      multicast membership changes and fairness/config updates, so every shard
+      sees the same group view and applies the same settings
+    - Peer membership goes into the app's group table: a switch forwards a group
+      to its router ports while any switch, on any shard, has members for it
+    - With a single instance (the default) roles are not touched and nothing is sent
+    """
+
+    def __init__(self, logger, app, shared_methods=()):
+        """
+        Args:
+            logger: Logger of the owning RyuApp
+            app: The RyuApp; config updates from peers call its methods
+            shared_methods: Names of app methods peers may invoke through apply_config
+        """
+        self.logger = logger
+        self.app = app
+        self.shared_methods = set(shared_methods)
+        self.index = shard_index()
+        self.count = max(1, int(os.environ.get(ENV_SHARD_COUNT, 1)))
+        self.peers = []
+        for peer in filter(None, os.environ.get(ENV_PEERS, '').split(',')):
+            host, port = peer.rsplit(':', 1)
+            self.peers.append((host, int(port)))
+        self.sent = 0
+        self.received = 0
+        self._sock = None
+        if self.count > 1 or self.peers:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.bind(('0.0.0.0', int(os.environ.get(ENV_COORD_PORT, 0))))
+            self._thread = hub.spawn(self._receive_loop)
+        self.logger.info(f"Controller shard {self.index}/{self.count}, peers {self.peers}")
+
+    def owns(self, dpid):
+        """True if this shard handles the datapath"""
+        return owner_of(dpid, self.count) == self.index
+
+    def claim_datapath(self, datapath):
+        """
+        Take the MASTER role for an owned switch and the SLAVE role otherwise
+
+        Returns:
+            True if this shard owns the switch and should program it
+        """
+        if self.count == 1:
+            return True
+        ofproto = datapath.ofproto
+        owned = self.owns(datapath.id)
+        role = ofproto.OFPCR_ROLE_MASTER if owned else ofproto.OFPCR_ROLE_SLAVE
+        # Generation ids only need to increase; the clock in microseconds does
+        datapath.send_msg(datapath.ofproto_parser.OFPRoleRequest(datapath, role, int(time.time() * 1e6)))
+        self.logger.info(f"Switch {datapath.id}: {'MASTER' if owned else 'SLAVE'} "
+                         f"(owner shard {owner_of(datapath.id, self.count)})")
+        return owned
+
+    def apply_config(self, method, *args):
+        """Call a config setter on this controller and on every peer shard"""
+        getattr(self.app, method)(*args)
+        self.publish('config', {'method': method, 'args': list(args)})
+
+    def share_membership(self, dpid, group_ips, group_table):
+        """Send the current members of changed groups on an owned switch to the peers"""
+        for group_ip in group_ips:
+            self.publish('membership', {'dpid': dpid, 'group': group_ip,
+                                        'members': sorted(group_table.get_members(dpid, group_ip))})
+
+    def publish(self, kind, data):
+        """Send one coordination message to every peer"""
+        if self._sock is None:
+            return
+        message = json.dumps({'shard': self.index, 'kind': kind, 'data': data}).encode()
+        for peer in self.peers:
+            try:
+                self._sock.sendto(message, peer)
+                self.sent += 1
+            except OSError as e:
+                self.logger.warning(f"Coordination message to {peer} failed: {e}")
+
+    def _receive_loop(self):
+        while True:
+            try:
+                message, _ = self._sock.recvfrom(65535)
+                message = json.loads(message)
+                self.received += 1
+                self._handle(message['kind'], message['data'])
+            except Exception:
+                self.logger.exception("Bad coordination message")
+
+    def _handle(self, kind, data):
+        if kind == 'membership':
+            affected = self.app.group_table.set_remote_members(data['dpid'], data['group'], data['members'])
+            # Controllers with per-group trees (Jasper) rebuild those on switches whose fan-out changed
+            sync = getattr(self.app, 'sync_multicast_trees', None)
+            if sync is not None:
+                for dpid in affected:
+                    sync(dpid, [data['group']])
+        elif kind == 'config' and data['method'] in self.shared_methods:
+            getattr(self.app, data['method'])(*data['args'])
+
+    def status(self):
+        """
+        Return this shard's view
+
+        Returns:
+            Dict with index, count, peers, message counts and remote group membership
+        """
+        return {
+            'index': self.index,
+            'count': self.count,
+            'peers': [f"{host}:{port}" for host, port in self.peers],
+            'sent': self.sent,
+            'received': self.received,
+            'remote_members': {str(dpid): {group_ip: sorted(ports) for group_ip, ports in groups.items()}
+                               for dpid, groups in self.app.group_table.remote_members.items()}
+        }
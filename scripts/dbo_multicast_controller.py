@@ -9,7 +9,14 @@ from ryu.controller import ofp_event
 from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
-from ryu.lib.packet import packet, ethernet, ether_types, ipv4, udp
+from ryu.lib.packet import packet
+from multicast_groups import MulticastGroupTable
+from fairness_telemetry import FairnessTelemetry
+from latency_metrics import delivery_clocks
+from packet_classifier import classify, PKT_OTHER, PKT_LLDP, PKT_IGMP, PKT_MULTICAST
+from controller_metrics import ControllerMetrics
+from async_logging import start_async_logging, SampledLogger, IntervalSummary
+from controller_sharding import ControllerShard, api_port
 import time
 import threading
 from flask import Flask, request, jsonify
@@ -18,16 +25,67 @@ api_app = Flask(__name__)
 controller_instance = None  # Will be set to the running controller
 
 def run_api():
-    api_app.run(host='0.0.0.0', port=5007, debug=False, use_reloader=False)
+    api_app.run(host='0.0.0.0', port=api_port(5007), debug=False, use_reloader=False)
 
 @api_app.route('/api/set_logical_clocks', methods=['POST'])
 def api_set_logical_clocks():
     enabled = bool(request.json.get('enabled', True))
     if controller_instance:
-        controller_instance.enable_logical_clocks(enabled)
+        controller_instance.shard.apply_config('enable_logical_clocks', enabled)
         return jsonify({'status': 'ok', 'enabled': enabled})
     return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
 
+@api_app.route('/api/set_proactive_multicast', methods=['POST'])
+def api_set_proactive_multicast():
+    enabled = bool(request.json.get('enabled', True))
+    if controller_instance:
+        controller_instance.shard.apply_config('enable_proactive_multicast', enabled)
+        return jsonify({'status': 'ok', 'enabled': enabled})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/fairness_stats', methods=['GET'])
+def api_fairness_stats():
+    if controller_instance:
+        return jsonify({'status': 'ok', 'fairness': controller_instance.telemetry.summary()})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/metrics', methods=['GET'])
+def api_metrics():
+    # ?reset=1 returns the current window and starts a new one
+    reset = request.args.get('reset', '0').lower() in ('1', 'true', 'yes')
+    if controller_instance:
+        return jsonify({'status': 'ok', 'metrics': controller_instance.metrics.snapshot(reset=reset)})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/set_packet_log', methods=['POST'])
+def api_set_packet_log():
+    rate = float(request.json.get('rate_per_s', 20.0))
+    sample_every = int(request.json.get('sample_every', 1))
+    if controller_instance:
+        controller_instance.shard.apply_config('set_packet_log', rate, sample_every)
+        return jsonify({'status': 'ok', 'rate_per_s': rate, 'sample_every': sample_every})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/set_router_ports', methods=['POST'])
+def api_set_router_ports():
+    # Ports of a switch that lead to other switches (multi-switch topologies)
+    dpid = int(request.json.get('dpid'))
+    ports = [int(port) for port in request.json.get('ports', [])]
+    if controller_instance:
+        controller_instance.shard.apply_config('set_router_ports', dpid, ports)
+        return jsonify({'status': 'ok', 'dpid': dpid, 'ports': ports})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/shard_status', methods=['GET'])
+def api_shard_status():
+    if controller_instance:
+        return jsonify({'status': 'ok', 'shard': controller_instance.shard.status()})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+# Setters the Flask API applies on every shard through the coordination channel
+SHARED_CONFIG_METHODS = ('enable_logical_clocks', 'enable_proactive_multicast', 'set_packet_log',
+                         'set_router_ports')
+
 class DBOMulticastController(app_manager.RyuApp):
     """
     DBO-inspired multicast controller for financial exchange simulation
@@ -39,31 +97,89 @@ class DBOMulticastController(app_manager.RyuApp):
 
     def __init__(self, *args, **kwargs):
         super(DBOMulticastController, self).__init__(*args, **kwargs)
+        # Log records are formatted and written by a background listener, not the event loop
+        self.log_listener = start_async_logging(self.logger)
         global controller_instance
         controller_instance = self
         self.mac_to_port = {}
         self.multicast_groups = {}
-        # Track per-packet delivery times (for fairness calculation)
-        self.packet_deliveries = {}
+        # Recent per-packet delivery clocks and streaming fairness aggregates (bounded)
+        self.telemetry = FairnessTelemetry()
         # DBO: Enable/disable logical clocks
         self.logical_clocks_enabled = True
+        # IGMP-driven group membership and OpenFlow group entries
+        self.group_table = MulticastGroupTable(self.logger)
+        # PacketIn rates, per-port deliveries and latency histograms for /api/metrics
+        self.metrics = ControllerMetrics()
+        # Per-packet log lines are sampled and rate-limited; totals go into interval summaries
+        self.packet_log = SampledLogger(self.logger)
+        self._summary_packets = 0
+        self.log_summary = IntervalSummary(self.logger, self.summarize_log_interval)
+        # Datapaths this instance owns when several controllers share the network; config is kept in sync
+        self.shard = ControllerShard(self.logger, self, SHARED_CONFIG_METHODS)
         self.logger.info("DBO Multicast Controller started")
 
     def enable_logical_clocks(self, enabled=True):
         self.logical_clocks_enabled = enabled
         self.logger.info(f"Logical clocks enabled: {enabled}")
 
+    def enable_proactive_multicast(self, enabled=True):
+        """Replicate multicast in the switch via OpenFlow group entries instead of PacketOut"""
+        self.group_table.set_proactive(enabled)
+        self.logger.info(f"Proactive multicast (group tables) enabled: {enabled}")
+
+    def set_router_ports(self, dpid, ports):
+        """Forward every joined group to these ports of a switch (links to other switches)"""
+        self.group_table.set_router_ports(dpid, ports)
+
+    def set_packet_log(self, rate, sample_every=1):
+        """Set the per-packet log rate limit (lines/s, 0 disables) and sampling interval"""
+        self.packet_log.configure(rate, sample_every=sample_every)
+        self.logger.info(f"Per-packet logging: {rate} lines/s, 1 in {sample_every} sampled")
+
+    def summarize_log_interval(self, elapsed):
+        """Interval summary line standing in for suppressed per-packet log lines"""
+        events, suppressed = self.packet_log.take_counts()
+        packets = self.telemetry.packets - self._summary_packets
+        self._summary_packets = self.telemetry.packets
+        if not packets and not events:
+            return None
+        line = f"DBO summary: {packets} packets in {elapsed:.1f}s ({packets / elapsed:.0f}/s)"
+        if self.telemetry.packets:
+            stats = self.telemetry.summary(quantiles=(0.99,))
+            line += (f", mean Jain {stats['mean_jain_index']:.4f}, "
+                     f"fairness window p99 {stats['fairness_window_ms']['0.99']:.3f} ms")
+        return line + f", {suppressed}/{events} log lines suppressed, {self.log_listener.handler.dropped} log records dropped"
+
     @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
     def switch_features_handler(self, ev):
         datapath = ev.msg.datapath
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
+        # Another shard programs this switch; we stay connected as a standby
+        if not self.shard.claim_datapath(datapath):
+            return
         match = parser.OFPMatch()
         actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,
                                          ofproto.OFPCML_NO_BUFFER)]
         self.add_flow(datapath, 0, match, actions)
+        self.group_table.register_datapath(datapath)
         self.logger.info(f"Switch {datapath.id} connected")
 
+    @set_ev_cls(ofp_event.EventOFPPortDescStatsReply, MAIN_DISPATCHER)
+    def port_desc_stats_reply_handler(self, ev):
+        """Learn the live ports of a newly connected switch"""
+        self.group_table.handle_port_desc(ev.msg.datapath, ev.msg.body)
+
+    @set_ev_cls(ofp_event.EventOFPPortStatus, MAIN_DISPATCHER)
+    def port_status_handler(self, ev):
+        """Track ports coming and going; a port that goes down leaves its multicast groups"""
+        datapath = ev.msg.datapath
+        if not self.shard.owns(datapath.id):
+            return
+        changed = self.group_table.handle_port_status(datapath, ev.msg)
+        self.shard.share_membership(datapath.id, changed, self.group_table)
+
     def add_flow(self, datapath, priority, match, actions, buffer_id=None):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
@@ -85,18 +201,26 @@ class DBOMulticastController(app_manager.RyuApp):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
         in_port = msg.match['in_port']
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
-        if eth.ethertype == ether_types.ETH_TYPE_LLDP:
+        # Fast path: classify from raw header bytes instead of a full ryu parse
+        kind, dst, src, ipv4_dst = classify(msg.data)
+        self.metrics.count_packet_in(kind)
+        if kind == PKT_LLDP or kind == PKT_OTHER:
             return
-        dst = eth.dst
-        src = eth.src
         dpid = datapath.id
         self.mac_to_port.setdefault(dpid, {})
         self.mac_to_port[dpid][src] = in_port
+        # IGMP reports and leaves only update group membership (the one case needing the full parser)
+        if kind == PKT_IGMP:
+            changed = self.group_table.handle_igmp(datapath, in_port, packet.Packet(msg.data))
+            self.shard.share_membership(dpid, changed, self.group_table)
+            return
         # Multicast detection (IPv4 multicast MAC)
-        if dst.startswith('01:00:5e'):
-            self.handle_dbo_multicast(msg, datapath, in_port, pkt)
+        if kind == PKT_MULTICAST:
+            # Proactive mode: the switch's group entry replicates; this packet only raced the flow install
+            if self.group_table.proactive and ipv4_dst is not None and \
+                    self.group_table.packet_out_via_group(msg, datapath, in_port, ipv4_dst):
+                return
+            self.handle_dbo_multicast(msg, datapath, in_port, ipv4_dst)
             return
         # Unicast
         if dst in self.mac_to_port[dpid]:
@@ -118,44 +242,38 @@ class DBOMulticastController(app_manager.RyuApp):
                                  in_port=in_port, actions=actions, data=data)
         datapath.send_msg(out)
 
-    def handle_dbo_multicast(self, msg, datapath, in_port, pkt):
+    def handle_dbo_multicast(self, msg, datapath, in_port, group_ip):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
         dpid = datapath.id
-        # For DBO: deliver to all ports except source, record delivery times
-        pkt_id = hash((time.time(), msg.data[:8]))  # crude unique id
+        # For DBO: deliver to the group's subscribed ports except the source, record delivery times
+        arrival = time.time()
+        pkt_id = hash((arrival, msg.data[:8]))  # crude unique id
         delivery_times = {}
-        for port in range(1, 5):  # 4-node star
-            if port != in_port:
-                actions = [parser.OFPActionOutput(port)]
-                data = None
-                if msg.buffer_id == ofproto.OFP_NO_BUFFER:
-                    data = msg.data
-                out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
-                                         in_port=in_port, actions=actions, data=data)
-                datapath.send_msg(out)
-                delivery_times[port] = time.time()
-        # Store delivery times for post-hoc fairness
+        for port in self.group_table.fanout_ports(dpid, group_ip, in_port):
+            actions = [parser.OFPActionOutput(port)]
+            data = None
+            if msg.buffer_id == ofproto.OFP_NO_BUFFER:
+                data = msg.data
+            out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
+                                     in_port=in_port, actions=actions, data=data)
+            datapath.send_msg(out)
+            delivery_times[port] = time.time()
+            self.metrics.count_delivery(port)
+        self.metrics.record_packet({port: t - arrival for port, t in delivery_times.items()})
+        # Post-hoc fairness over the delivery times, kept only in bounded telemetry
         if self.logical_clocks_enabled:
-            self.packet_deliveries[pkt_id] = delivery_times
-            self.log_dbo_fairness(pkt_id)
+            self.log_dbo_fairness(pkt_id, delivery_times)
 
-    def log_dbo_fairness(self, pkt_id):
-        if pkt_id in self.packet_deliveries:
-            deliveries = self.packet_deliveries[pkt_id]
-            if len(deliveries) < 2:
-                return
-            times = list(deliveries.values())
-            min_time = min(times)
-            logical_clocks = [t - min_time for t in times]
-            fairness = 1.0
-            if logical_clocks:
-                sum_lat = sum(logical_clocks)
-                sum_sq = sum(x**2 for x in logical_clocks)
-                n = len(logical_clocks)
-                fairness = (sum_lat**2) / (n * sum_sq) if sum_sq > 0 else 1.0
-                fairness_window = max(logical_clocks) - min(logical_clocks) if len(logical_clocks) > 1 else 0.0
-                self.logger.info(f"DBO Packet {pkt_id} - Logical Clocks: {[round(x*1000,2) for x in logical_clocks]}, Fairness Index: {fairness:.4f}, Fairness Window: {fairness_window*1000:.2f} ms")
+    def log_dbo_fairness(self, pkt_id, deliveries):
+        if len(deliveries) < 2:
+            return
+        ports = list(deliveries)
+        clocks = delivery_clocks([deliveries[port] for port in ports])
+        logical_clocks = {port: float(clock) for port, clock in zip(ports, clocks)}
+        fairness, fairness_window = self.telemetry.record(pkt_id, logical_clocks)
+        self.packet_log.log("DBO Packet %s - Logical Clocks (s) by port: %s, Fairness Index: %.4f, Fairness Window: %.2f ms",
+                            pkt_id, logical_clocks, fairness, fairness_window * 1000)
 
 # Start Flask API server in a background thread
 api_thread = threading.Thread(target=run_api, daemon=True)
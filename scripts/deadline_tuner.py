@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Adaptive hold-and-release deadline tuning for the Jasper controller
+"""
+
+import time
+from collections import deque
+
+import numpy as np
+
+from fairness_telemetry import LatencyHistogram
+
+
+class DeadlineTuner:
+    """
+    Feedback controller for the Jasper hold-and-release deadline
+    - Receivers' one-way latency samples feed per-(switch, port) histograms; each
+      decision uses the low and high latency quantiles seen since the previous decision.
+      Samples without a switch apply to that port on every switch without its own
+    - Feedforward: with every copy released at max(earliest tree slot, deadline -
+      latency estimate), predict the fairness window from those quantiles and pick
+      the smallest deadline that meets the target (or the jitter floor, if the
+      target cannot be met)
+    - Feedback: an integral term driven by measured fairness-window quantiles
+      corrects what the prediction misses, such as release slip
+    - Deadline changes are smoothed; each decision is kept in a bounded history
+    """
+
+    def __init__(self, target_window=0.0005, quantile=0.99, gain=0.3, smoothing=0.5,
+                 min_samples=20, max_deadline=0.05, tolerance=0.00005, grid_points=256, history=64):
+        """
+        Args:
+            target_window: Target fairness window (seconds)
+            quantile: Latency / window quantile the target applies to (e.g. 0.99)
+            gain: Integral gain of the measured-window feedback
+            smoothing: Fraction of the distance to the new deadline moved per decision
+            min_samples: Samples a (switch, port) needs before its quantiles are refreshed
+            max_deadline: Upper bound on the deadline (seconds)
+            tolerance: Deadline change (seconds) below which a decision counts as converged
+            grid_points: Candidate deadlines evaluated per decision
+            history: Number of recent decisions kept
+        """
+        self.target_window = target_window
+        self.quantile = quantile
+        self.gain = gain
+        self.smoothing = smoothing
+        self.min_samples = min_samples
+        self.max_deadline = max_deadline
+        self.tolerance = tolerance
+        self.grid_points = grid_points
+        self.deadline = None
+        self.bias = 0.0
+        self.updates = 0
+        self.converged_updates = 0
+        self.feasible = True
+        self.predicted_window = None
+        self.measured_window = None
+        self.history = deque(maxlen=history)
+        # (dpid, port) -> histogram of latency samples since the last decision (dpid None: any switch)
+        self._latency_histograms = {}
+        # (dpid, port) -> (low quantile, high quantile) from the latest decision with enough samples
+        self._quantiles = {}
+        self._window_histogram = LatencyHistogram()
+
+    def observe_latency(self, port, latency, dpid=None):
+        """Record one measured one-way delivery latency (seconds) for a receiver port of a switch"""
+        key = (dpid, port)
+        histogram = self._latency_histograms.get(key)
+        if histogram is None:
+            histogram = self._latency_histograms[key] = LatencyHistogram()
+        histogram.record(latency)
+
+    def observe_window(self, window):
+        """Record one measured per-packet fairness window (seconds)"""
+        self._window_histogram.record(window)
+
+    def _refresh_quantiles(self):
+        for key, histogram in self._latency_histograms.items():
+            if histogram.count >= self.min_samples:
+                self._quantiles[key] = (histogram.quantile(1.0 - self.quantile),
+                                        histogram.quantile(self.quantile))
+                histogram.reset()
+
+    def _port_quantiles(self, dpid, port, estimate):
+        """Latency quantiles of a switch port; falls back to switch-less samples, then the tree's estimate"""
+        quantiles = self._quantiles.get((dpid, port))
+        if quantiles is None:
+            quantiles = self._quantiles.get((None, port), (estimate, estimate))
+        return quantiles
+
+    def predict_windows(self, tree, deadlines, dpid=None):
+        """
+        Predict the fairness window of a tree for each candidate deadline
+
+        Args:
+            tree: FairMulticastTree whose release schedule the deadline drives
+            deadlines: 1-D array of candidate deadlines (seconds)
+            dpid: Switch the tree runs on, whose ports the latency samples are taken from
+
+        Returns:
+            Array of predicted windows (seconds), one per deadline
+        """
+        earliest = tree.earliest_releases()
+        receivers = list(earliest)
+        if not receivers:
+            return np.zeros(len(deadlines))
+        slot = np.array([earliest[r] for r in receivers])
+        estimate = np.array([tree.latencies[r] for r in receivers])
+        quantiles = np.array([self._port_quantiles(dpid, r, tree.latencies[r]) for r in receivers])
+        low, high = quantiles[:, 0], quantiles[:, 1]
+        release = np.maximum(slot, deadlines[:, None] - estimate)
+        return (release + high).max(axis=1) - (release + low).min(axis=1)
+
+    def _feedforward(self, trees):
+        """Smallest deadline meeting the target over all trees, and its predicted window"""
+        horizon = max((tree.delivery_time() for tree in trees.values()), default=0.0)
+        horizon = min(max(horizon, self.target_window), self.max_deadline)
+        deadlines = np.linspace(0.0, horizon, self.grid_points)
+        windows = np.zeros(self.grid_points)
+        for (dpid, _), tree in trees.items():
+            windows = np.maximum(windows, self.predict_windows(tree, deadlines, dpid))
+        # Beyond the horizon every copy is deadline-bound and the window stops shrinking
+        floor = windows[-1]
+        self.feasible = floor <= self.target_window
+        goal = self.target_window if self.feasible else floor + self.tolerance
+        index = int(np.argmax(windows <= goal))
+        return float(deadlines[index]), float(windows[index])
+
+    def update(self, trees):
+        """
+        Make one deadline decision
+
+        Args:
+            trees: Dict of (dpid, group_ip) -> FairMulticastTree the deadline applies to
+
+        Returns:
+            New deadline in seconds, or None if there is no latency data yet
+        """
+        self._refresh_quantiles()
+        if not self._quantiles and self._window_histogram.count == 0:
+            return None
+        feedforward, self.predicted_window = self._feedforward(trees)
+        if self._window_histogram.count:
+            self.measured_window = self._window_histogram.quantile(self.quantile)
+            self._window_histogram.reset()
+            # Integral correction: widen while measured windows overshoot, give back while they undershoot
+            self.bias = max(0.0, self.bias + self.gain * (self.measured_window - self.target_window))
+        target = min(self.max_deadline, feedforward + self.bias)
+        previous = self.deadline if self.deadline is not None else target
+        self.deadline = previous + self.smoothing * (target - previous)
+        change = abs(self.deadline - previous)
+        self.converged_updates = self.converged_updates + 1 if change < self.tolerance else 0
+        self.updates += 1
+        self.history.append({
+            'time': time.time(),
+            'deadline_ms': self.deadline * 1000,
+            'feedforward_ms': feedforward * 1000,
+            'bias_ms': self.bias * 1000,
+            'predicted_window_ms': self.predicted_window * 1000,
+            'measured_window_ms': self.measured_window * 1000 if self.measured_window is not None else None,
+            'change_ms': change * 1000
+        })
+        return self.deadline
+
+    def reset(self, deadline=None):
+        """Forget the feedback state, optionally restarting from a given deadline (seconds)"""
+        self.deadline = deadline
+        self.bias = 0.0
+        self.converged_updates = 0
+
+    def stats(self):
+        """
+        Return the tuner state, decisions and convergence
+
+        Returns:
+            Dict with target, current deadline, feedback bias, predicted and measured
+            windows (ms), feasibility, convergence and recent decisions
+        """
+        def to_ms(value):
+            return value * 1000 if value is not None else None
+
+        return {
+            'target_window_ms': self.target_window * 1000,
+            'quantile': self.quantile,
+            'deadline_ms': to_ms(self.deadline),
+            'bias_ms': self.bias * 1000,
+            'predicted_window_ms': to_ms(self.predicted_window),
+            'measured_window_ms': to_ms(self.measured_window),
+            'feasible': bool(self.feasible),
+            'updates': self.updates,
+            'converged': self.converged_updates >= 3,
+            'converged_updates': self.converged_updates,
+            'ports_with_quantiles': len(self._quantiles),
+            'history': list(self.history)
+        }
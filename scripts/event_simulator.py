@@ -0,0 +1,540 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Discrete-event simulation backend: switches, links, multicast replication and the
+Basic / Jasper / DBO forwarding policies without Mininet, OVS or root
+"""
+
+import argparse
+import heapq
+import itertools
+import time
+
+import numpy as np
+
+from scripts.arrival_processes import build_schedule
+from scripts.latency_metrics import BlockLatencyHistogram, DEFAULT_PERCENTILES, message_metrics
+from scripts.multicast_tree import FairMulticastTree
+
+POLICIES = ('basic', 'jasper', 'dbo')
+
+# Benchmark implementation name -> simulated forwarding policy
+IMPLEMENTATION_POLICIES = {
+    'basic_multicast': 'basic',
+    'jasper_multicast': 'jasper',
+    'dbo_multicast': 'dbo'
+}
+
+TOPOLOGIES = ('star', 'leafspine', 'fattree')
+
+# Event kinds, in tie-break order for events at the same instant
+_EPOCH, _ARRIVE, _DONE, _PUBLISH = range(4)
+
+
+class SimNetwork:
+    """
+    Links between the publisher and every receiver
+    - Each receiver has an access link whose base delay is drawn once (lognormal
+      around link_delay), so receivers differ the way cloud VMs or racks do
+    - Receivers sit behind a star switch, a leaf-spine fabric (hosts_per_switch per
+      leaf, publisher on leaf 0) or a fat-tree (publisher on the first edge switch);
+      each fabric hop adds fabric_delay
+    - Every link traversal adds exponential jitter; copies are lost with probability loss
+    - Paths are kept as link ids, so replication cost can be counted per link
+    """
+
+    def __init__(self, receivers, topology='star', link_delay=0.001, asymmetry=0.3, jitter=0.00005,
+                 fabric_delay=0.00005, loss=0.0, hosts_per_switch=16, base_delays=None, seed=None):
+        """
+        Args:
+            receivers: Number of receiving hosts
+            topology: 'star', 'leafspine' or 'fattree'
+            link_delay: Median access-link delay (seconds)
+            asymmetry: Lognormal sigma of access-link delays across receivers (0 = identical)
+            jitter: Mean exponential jitter per link traversal (seconds)
+            fabric_delay: Delay of one switch-to-switch hop (seconds)
+            loss: Per-copy loss probability
+            hosts_per_switch: Hosts per leaf (leafspine) or per edge switch (fattree)
+            base_delays: Explicit access-link delays (seconds), overriding link_delay/asymmetry
+            seed: Seed for the base delays and per-message sampling
+        """
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology: {topology}")
+        self.rng = np.random.default_rng(seed)
+        self.receivers = receivers
+        self.topology = topology
+        self.jitter = jitter
+        self.fabric_delay = fabric_delay
+        self.loss = loss
+        if base_delays is None:
+            base_delays = link_delay * np.exp(self.rng.normal(0.0, asymmetry, receivers + 1))
+        base_delays = np.asarray(base_delays, dtype=float)
+        if len(base_delays) == receivers:
+            base_delays = np.concatenate(([link_delay], base_delays))
+        # Index 0 is the publisher's own access link
+        self.ingress_delay = base_delays[0]
+        self.base = base_delays[1:]
+        self.paths = [self._path(i, hosts_per_switch) for i in range(receivers)]
+        self.hops = np.array([len(path) - 1 for path in self.paths])
+
+    def _path(self, receiver, per_switch):
+        """Link ids from the publisher's switch to a receiver (last one is its access link)"""
+        host = receiver + 1  # the publisher is host 0
+        access = ('access', receiver)
+        if self.topology == 'star':
+            return (access,)
+        switch = host // per_switch
+        if self.topology == 'leafspine':
+            if switch == 0:
+                return (access,)
+            # Multicast trees use spine 0
+            return (('up', 0, 0), ('down', 0, switch), access)
+        # Fat-tree: edge switches are numbered pod by pod, pods have per_switch edges
+        pod = switch // per_switch
+        if switch == 0:
+            return (access,)
+        if pod == 0:
+            return (('edge-agg', 0, 0), ('agg-edge', 0, switch), access)
+        return (('edge-agg', 0, 0), ('agg-core', 0, 0), ('core-agg', 0, pod), ('agg-edge', pod, switch), access)
+
+    def mean_path_delays(self):
+        """Expected switch-to-receiver delay of every receiver (seconds)"""
+        return self.base + self.hops * self.fabric_delay + (self.hops + 1) * self.jitter
+
+    def sample_ingress(self, count):
+        """Publisher-to-switch delays for `count` messages (seconds)"""
+        return self.ingress_delay + self.rng.exponential(self.jitter, count)
+
+    def sample_paths(self, count, order=None):
+        """
+        Switch-to-receiver delays of `count` messages
+
+        Args:
+            count: Number of messages
+            order: Receiver of each column (default: receiver order)
+
+        Returns:
+            (count, receivers) array in seconds; lost copies are NaN
+        """
+        order = np.arange(self.receivers) if order is None else order
+        hops = self.hops[order]
+        shape = (count, self.receivers)
+        delays = np.broadcast_to(self.base[order] + hops * self.fabric_delay, shape).copy()
+        if self.jitter > 0:
+            # Receivers share a handful of hop counts; a scalar shape samples far faster
+            for hop in np.unique(hops):
+                columns = hops == hop
+                size = (count, int(columns.sum()))
+                if hop == 0:
+                    jitter = self.rng.exponential(self.jitter, size)
+                else:
+                    jitter = self.rng.gamma(hop + 1, self.jitter, size)
+                if columns.all():
+                    delays += jitter
+                else:
+                    delays[:, columns] += jitter
+        if self.loss > 0:
+            delays[self.rng.random(shape) < self.loss] = np.nan
+        return delays
+
+    def link_transmissions(self, in_switch_tree):
+        """
+        Link transmissions needed to reach every receiver once
+
+        Args:
+            in_switch_tree: True if switches replicate along a tree (each link carries one
+                copy), False if the ingress switch sends one unicast copy per receiver
+        """
+        if in_switch_tree:
+            return len({link for path in self.paths for link in path})
+        return sum(len(path) for path in self.paths)
+
+
+class SimulationResult:
+    """
+    Outcome of one simulation run
+    - Per-message arrays: send time, mean latency, Jain's index over receivers and
+      fairness window (latest minus earliest delivery), all latencies in ms
+    - Per-receiver mean latency and mean DBO delivery clock (arrival after the
+      message's first delivery), in ms
+    - The full message x receiver latency matrix (ms, NaN = lost) when it fits in keep_matrix,
+      and a streaming histogram of every delivered latency (for percentiles) when it does not
+    - Queueing at the controller (PacketIn FIFO) and on the replication channel
+      (copies of earlier messages still going out), kept apart so a saturated
+      channel shows up even when the controller keeps up
+    """
+
+    def __init__(self, policy, messages, receivers):
+        self.policy = policy
+        self.send_times = np.zeros(messages)
+        self.mean_latency = np.zeros(messages)
+        self.jain = np.zeros(messages)
+        self.window = np.zeros(messages)
+        self.receiver_sum = np.zeros(receivers)
+        self.receiver_count = np.zeros(receivers)
+        self.clock_sum = np.zeros(receivers)
+        self.latencies = None
+        self.histogram = None
+        self.queue_delay_sum = 0.0
+        self.queue_delay_max = 0.0
+        self.channel_delay_sum = 0.0
+        self.channel_delay_max = 0.0
+        self.bandwidth_efficiency = 0.0
+        self.simulated_time = 0.0
+        self.wall_time = 0.0
+
+    def receiver_latencies(self):
+        """Mean latency of every receiver (ms)"""
+        with np.errstate(invalid='ignore'):
+            return self.receiver_sum / self.receiver_count
+
+    def delivery_clocks(self):
+        """Mean delivery clock of every receiver (ms after each message's first delivery)"""
+        with np.errstate(invalid='ignore'):
+            return self.clock_sum / self.receiver_count
+
+    def latency_percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """Percentiles of every delivered latency (ms): exact from the matrix, else from the streaming histogram"""
+        if self.latencies is not None:
+            delivered = self.latencies[~np.isnan(self.latencies)]
+            values = np.percentile(delivered, percentiles) if len(delivered) else np.full(len(percentiles), np.nan)
+        else:
+            values = self.histogram.percentiles(percentiles)
+        return dict(zip(percentiles, values))
+
+    def summary(self):
+        """
+        Return the run's headline numbers
+
+        Returns:
+            Dict with message/receiver counts, mean latency, mean per-message Jain's
+            index, fairness window mean and p99 (ms), bandwidth efficiency (%), mean
+            and max controller and replication-channel queueing (ms) and simulated
+            vs wall-clock time
+        """
+        messages = len(self.send_times)
+        return {
+            'policy': self.policy,
+            'messages': messages,
+            'receivers': len(self.receiver_sum),
+            'avg_latency_ms': float(np.nanmean(self.mean_latency)) if messages else 0.0,
+            'mean_jain_index': float(np.nanmean(self.jain)) if messages else 0.0,
+            'fairness_window_ms': float(np.nanmean(self.window)) if messages else 0.0,
+            'fairness_window_p99_ms': float(np.nanquantile(self.window, 0.99)) if messages else 0.0,
+            'bandwidth_efficiency': self.bandwidth_efficiency,
+            'mean_queue_delay_ms': self.queue_delay_sum / messages * 1000 if messages else 0.0,
+            'max_queue_delay_ms': self.queue_delay_max * 1000,
+            'mean_channel_delay_ms': self.channel_delay_sum / messages * 1000 if messages else 0.0,
+            'max_channel_delay_ms': self.channel_delay_max * 1000,
+            'simulated_time_s': self.simulated_time,
+            'wall_time_s': self.wall_time,
+            'speedup': self.simulated_time / self.wall_time if self.wall_time else float('inf')
+        }
+
+
+class EventSimulator:
+    """
+    Discrete-event simulation of one multicast feed
+    - Events (publish, switch arrival, controller done, epoch) run from a heap in
+      time order; each message is a handful of scalar events, never one per copy
+    - Reactive mode: every message is a PacketIn served FIFO by the controller
+      (packet_in_cost each), then its copies leave through the control channel one
+      copy_cost apart, each no earlier than its policy's release offset; proactive
+      mode replicates in the switch (switch_copy_cost apart, no controller)
+    - Policies set the release offsets: Basic sends in port order (plus optional
+      CloudEx artificial delay and per-port clock offsets), Jasper releases along a
+      FairMulticastTree toward a common deadline, DBO sends at once and is judged
+      on delivery clocks
+    - With sorted offsets, a message's channel-limited send times depend only on its
+      release time and when the channel frees up, so the event loop keeps two scalars
+      per message and each epoch turns them into (messages x receivers) delivery
+      times with NumPy, sampling all link delays in one call
+    - Jasper's tree is rebuilt every epoch from the path latencies it observed (EWMA);
+      each message keeps the send pattern it was scheduled with, even if it is
+      flushed after the rebuild
+    """
+
+    def __init__(self, network, policy='jasper', proactive=False, packet_in_cost=0.00005, copy_cost=0.000002,
+                 switch_copy_cost=0.0, hold_ms=None, fanout=4, hop_delay=0.0001, smoothing=0.2,
+                 artificial_delay_ms=0.0, clock_offsets_ms=None, epoch=1.0, keep_matrix=20000000,
+                 chunk_elements=4000000):
+        """
+        Args:
+            network: SimNetwork
+            policy: 'basic', 'jasper' or 'dbo'
+            proactive: Replicate in the switch (group tables) instead of via PacketIn/PacketOut
+            packet_in_cost: Controller time per PacketIn (seconds)
+            copy_cost: Control-channel time per PacketOut copy (seconds)
+            switch_copy_cost: Switch time per replicated copy in proactive mode (seconds)
+            hold_ms: Jasper hold-and-release deadline; None uses the tree's delivery time
+            fanout: Jasper tree fan-out
+            hop_delay: Jasper tree replication cost per level (seconds)
+            smoothing: EWMA weight of an epoch's observed latency in Jasper's estimates
+            artificial_delay_ms: Basic (CloudEx) delay added to every copy
+            clock_offsets_ms: Basic (CloudEx) per-receiver extra delay
+            epoch: Seconds between result flushes and Jasper tree rebuilds
+            keep_matrix: Keep the full latency matrix if messages x receivers is at most this
+            chunk_elements: Largest (messages x receivers) block sampled at once
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        self.network = network
+        self.policy = policy
+        self.proactive = proactive
+        self.packet_in_cost = packet_in_cost
+        self.copy_cost = switch_copy_cost if proactive else copy_cost
+        self.hold_ms = hold_ms
+        self.smoothing = smoothing
+        self.epoch = epoch
+        self.keep_matrix = keep_matrix
+        self.chunk_elements = chunk_elements
+        receivers = network.receivers
+        self.tree = FairMulticastTree(fanout=fanout, hop_delay=hop_delay)
+        # Jasper learns latencies from deliveries; it starts knowing nothing
+        self.estimates = np.zeros(receivers)
+        extra = np.full(receivers, artificial_delay_ms / 1000.0)
+        if clock_offsets_ms is not None:
+            extra = extra + np.asarray(clock_offsets_ms, dtype=float) / 1000.0
+        self.basic_offsets = extra
+        # Send patterns by version: (order, pattern), and how many scheduled messages still use each
+        self._patterns = {}
+        self._pattern_users = {}
+        self._version = -1
+        self._set_offsets()
+
+    def _set_offsets(self):
+        """Sort the policy's release offsets and precompute the channel-limited send pattern"""
+        receivers = self.network.receivers
+        if self.policy == 'jasper':
+            self.tree.build(dict(enumerate(self.estimates)))
+            deadline = None if self.hold_ms is None else self.hold_ms / 1000.0
+            schedule = self.tree.schedule(deadline)
+            order = np.array([receiver for receiver, _ in schedule])
+            offsets = np.array([offset for _, offset in schedule])
+            sort = np.argsort(offsets, kind='stable')
+            order, offsets = order[sort], offsets[sort]
+        else:
+            order = np.argsort(self.basic_offsets, kind='stable')
+            offsets = self.basic_offsets[order]
+        # Copy k leaves at c*k + release + max(G[k], channel_free - release)
+        self.order = order
+        self.steps = self.copy_cost * np.arange(receivers)
+        self.pattern = np.maximum.accumulate(offsets - self.steps)
+        # Forget earlier versions no waiting message was scheduled with
+        for version in [v for v, users in self._pattern_users.items() if not users]:
+            del self._patterns[version], self._pattern_users[version]
+        self._version += 1
+        self._patterns[self._version] = (self.order, self.pattern)
+        self._pattern_users[self._version] = 0
+
+    def run(self, send_times):
+        """
+        Simulate a feed
+
+        Args:
+            send_times: Sorted send times of the messages (seconds)
+
+        Returns:
+            SimulationResult
+        """
+        started = time.time()
+        send_times = np.asarray(send_times, dtype=float)
+        messages = len(send_times)
+        receivers = self.network.receivers
+        result = SimulationResult(self.policy, messages, receivers)
+        result.send_times = send_times
+        if messages * receivers <= self.keep_matrix:
+            result.latencies = np.empty((messages, receivers), dtype=np.float32)
+        else:
+            result.histogram = BlockLatencyHistogram()
+        ingress = self.network.sample_ingress(messages)
+        release = np.zeros(messages)
+        slack = np.zeros(messages)
+        version = np.zeros(messages, dtype=np.int64)
+        completed = np.zeros(messages, dtype=bool)
+
+        heap = []
+        seq = itertools.count()
+        if messages:
+            heapq.heappush(heap, (send_times[0], _PUBLISH, next(seq), 0))
+            heapq.heappush(heap, (self.epoch, _EPOCH, next(seq), 0))
+        controller_free = 0.0
+        channel_free = 0.0
+        flushed = 0
+        while heap:
+            now, kind, _, m = heapq.heappop(heap)
+            if kind == _PUBLISH:
+                heapq.heappush(heap, (now + ingress[m], _ARRIVE, next(seq), m))
+                if m + 1 < messages:
+                    heapq.heappush(heap, (send_times[m + 1], _PUBLISH, next(seq), m + 1))
+            elif kind == _ARRIVE:
+                if self.proactive:
+                    heapq.heappush(heap, (now, _DONE, next(seq), m))
+                    continue
+                start = max(now, controller_free)
+                wait = float(start - now)
+                result.queue_delay_sum += wait
+                result.queue_delay_max = max(result.queue_delay_max, wait)
+                controller_free = start + self.packet_in_cost
+                heapq.heappush(heap, (controller_free, _DONE, next(seq), m))
+            elif kind == _DONE:
+                release[m] = now
+                slack[m] = channel_free - now
+                # Time the channel is still busy with earlier messages' copies
+                wait = max(0.0, float(slack[m]))
+                result.channel_delay_sum += wait
+                result.channel_delay_max = max(result.channel_delay_max, wait)
+                channel_free = now + self.steps[-1] + max(self.pattern[-1], slack[m]) + self.copy_cost
+                version[m] = self._version
+                self._pattern_users[self._version] += 1
+                completed[m] = True
+            else:
+                # Jitter can reorder arrivals, so flush the prefix of completed messages
+                ready = flushed
+                while ready < messages and completed[ready]:
+                    ready += 1
+                self._flush(result, flushed, ready, release, slack, version)
+                flushed = ready
+                if self.policy == 'jasper':
+                    self._set_offsets()
+                if flushed < messages:
+                    heapq.heappush(heap, (now + self.epoch, _EPOCH, next(seq), 0))
+        self._flush(result, flushed, messages, release, slack, version)
+        result.simulated_time = float(send_times[-1]) if messages else 0.0
+        result.bandwidth_efficiency = self._bandwidth_efficiency()
+        result.wall_time = time.time() - started
+        return result
+
+    def _flush(self, result, first, last, release, slack, version):
+        """Compute deliveries and metrics of messages [first, last) in NumPy blocks"""
+        receivers = self.network.receivers
+        block = max(1, self.chunk_elements // receivers)
+        observed_sum = np.zeros(receivers)
+        observed_count = np.zeros(receivers)
+        for lo in range(first, last, block):
+            hi = min(lo + block, last)
+            versions = np.unique(version[lo:hi])
+            for v in versions:
+                # A block spans a tree rebuild only when jitter delayed a message across the epoch
+                rows = slice(lo, hi) if len(versions) == 1 else lo + np.flatnonzero(version[lo:hi] == v)
+                order, pattern = self._patterns[v]
+                sent = self.steps + release[rows, None] + np.maximum(pattern, slack[rows, None])
+                # Column k is the copy sent k-th, to receiver order[k]
+                path = self.network.sample_paths(len(sent), order)
+                latency = sent + path - result.send_times[rows, None]
+                latency *= 1000.0
+                self._record(result, rows, order, latency)
+                self._pattern_users[v] -= len(sent)
+                if self.policy == 'jasper':
+                    delivered = ~np.isnan(path)
+                    observed_sum[order] += np.where(delivered, path, 0.0).sum(axis=0)
+                    observed_count[order] += delivered.sum(axis=0)
+        if self.policy == 'jasper':
+            # Receivers report each copy's delay from leaving the switch to delivery
+            seen = observed_count > 0
+            observed = observed_sum[seen] / observed_count[seen]
+            unseen_before = self.estimates[seen] == 0.0
+            self.estimates[seen] = np.where(unseen_before, observed,
+                                            self.estimates[seen] + self.smoothing * (observed - self.estimates[seen]))
+
+    def _record(self, result, rows, order, latency):
+        """Accumulate the metrics of messages `rows` (slice or indices); latency columns follow `order`"""
+        metrics = message_metrics(latency)
+        result.mean_latency[rows] = metrics['mean']
+        result.jain[rows] = metrics['jain']
+        result.window[rows] = metrics['window']
+        result.receiver_sum[order] += metrics['receiver_sum']
+        result.receiver_count[order] += metrics['receiver_count']
+        result.clock_sum[order] += metrics['clock_sum']
+        if result.histogram is not None:
+            result.histogram.add(latency)
+        if result.latencies is not None:
+            if isinstance(rows, slice):
+                result.latencies[rows, order] = latency
+            else:
+                result.latencies[np.ix_(rows, order)] = latency
+
+    def _bandwidth_efficiency(self):
+        """
+        Share of transmitted copies that are useful deliveries (%)
+
+        Receivers need one copy each; the total also counts the publisher's uplink,
+        the fabric and, in reactive mode, the PacketIn and the PacketOuts the policy's
+        controller sends on the control channel. Proactive mode replicates in the
+        switch's group entry whatever the policy, so all policies cost the same there.
+        """
+        receivers = self.network.receivers
+        total = 1 + self.network.link_transmissions(in_switch_tree=self.proactive)
+        if not self.proactive:
+            total += 1 + self._packet_outs()
+        return 100.0 * receivers / total
+
+    def _packet_outs(self):
+        """
+        PacketOuts the policy's controller sends per message in reactive mode
+        - Basic sends every undelayed port in one PacketOut and each delayed port
+          (artificial delay or clock offset) in its own
+        - Jasper holds every tree port's copy and releases it in its own PacketOut;
+          the tree only sets release times, so it adds no copies
+        - DBO sends one PacketOut per port
+        """
+        if self.policy == 'basic':
+            delayed = int(np.count_nonzero(self.basic_offsets > 0))
+            return delayed + (1 if delayed < self.network.receivers else 0)
+        return self.network.receivers
+
+
+def simulate_scenario(implementation, test_scenario, **options):
+    """
+    Run the simulator for a benchmark scenario
+
+    Args:
+        implementation: 'basic_multicast', 'jasper_multicast' or 'dbo_multicast'
+        test_scenario: Benchmark scenario dict (duration, message_rate, arrival, seed,
+            receivers); an optional 'network' dict is passed to SimNetwork and an
+            optional 'simulator' dict to EventSimulator
+        options: Further EventSimulator arguments
+
+    Returns:
+        SimulationResult
+    """
+    seed = test_scenario.get('seed')
+    network = SimNetwork(test_scenario.get('receivers', 4), seed=seed, **test_scenario.get('network', {}))
+    simulator = EventSimulator(network, policy=IMPLEMENTATION_POLICIES[implementation],
+                               **dict(test_scenario.get('simulator', {}), **options))
+    return simulator.run(build_schedule(test_scenario, seed=seed))
+
+
+def main():
+    """Main function for standalone usage"""
+    parser = argparse.ArgumentParser(description='Discrete-event multicast fairness simulator')
+    parser.add_argument('--policy', type=str, default='jasper', choices=POLICIES, help='Forwarding policy')
+    parser.add_argument('--receivers', type=int, default=1000, help='Number of receivers')
+    parser.add_argument('--topology', type=str, default='star', choices=TOPOLOGIES, help='Network layout')
+    parser.add_argument('--rate', type=float, default=1000.0, help='Messages per second')
+    parser.add_argument('--duration', type=float, default=60.0, help='Simulated seconds')
+    parser.add_argument('--arrival', type=str, default='poisson', help='Inter-arrival process')
+    parser.add_argument('--proactive', action='store_true', help='Replicate in the switch (group tables)')
+    parser.add_argument('--hold-ms', type=float, default=None, help='Jasper deadline (default: tree delivery time)')
+    parser.add_argument('--asymmetry', type=float, default=0.3, help='Lognormal sigma of access-link delays')
+    parser.add_argument('--loss', type=float, default=0.0, help='Per-copy loss probability')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the network and the schedule')
+
+    args = parser.parse_args()
+
+    scenario = {
+        'duration': args.duration,
+        'message_rate': args.rate,
+        'arrival': {'process': args.arrival},
+        'receivers': args.receivers,
+        'seed': args.seed,
+        'network': {'topology': args.topology, 'asymmetry': args.asymmetry, 'loss': args.loss}
+    }
+    implementation = {policy: name for name, policy in IMPLEMENTATION_POLICIES.items()}[args.policy]
+    result = simulate_scenario(implementation, scenario, proactive=args.proactive, hold_ms=args.hold_ms)
+    for key, value in result.summary().items():
+        print(f"  {key}: {value:.4f}" if isinstance(value, float) else f"  {key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Bounded, streaming fairness telemetry for the multicast controllers
+"""
+
+import math
+from collections import deque
+
+from latency_metrics import fairness_window, jain_index
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram of non-negative durations (seconds)
+    - Buckets grow geometrically by (1 + precision), so every quantile is
+      accurate to within `precision` relative error
+    - Fixed memory regardless of sample count; O(1) insert
+    - Online counterpart of latency_metrics.BlockLatencyHistogram, which takes whole
+      latency matrices (ms) in the simulator
+    """
+
+    def __init__(self, min_value=1e-6, max_value=10.0, precision=0.02):
+        """
+        Args:
+            min_value: Smallest distinguishable duration; smaller values share bucket 0
+            max_value: Largest tracked duration; larger values share the last bucket
+            precision: Relative bucket width
+        """
+        self.min_value = min_value
+        self.max_value = max_value
+        self._log_base = math.log1p(precision)
+        self.num_buckets = self._bucket(max_value) + 1
+        self.counts = [0] * self.num_buckets
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, value):
+        if value <= self.min_value:
+            return 0
+        return int(math.log(value / self.min_value) / self._log_base) + 1
+
+    def bucket_upper_bound(self, index):
+        """Upper edge (seconds) of a bucket"""
+        return self.min_value * math.exp(index * self._log_base)
+
+    def record(self, value):
+        """Add one sample"""
+        index = min(self._bucket(value), self.num_buckets - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Return the q-quantile (0 <= q <= 1), or None if empty"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen > rank:
+                return min(self.bucket_upper_bound(index), self.max)
+        return self.max
+
+    def mean(self):
+        """Mean of all samples, or None if empty"""
+        return self.total / self.count if self.count else None
+
+    def buckets(self):
+        """Return the non-empty buckets as a list of (upper bound in seconds, count)"""
+        return [(self.bucket_upper_bound(index), bucket_count)
+                for index, bucket_count in enumerate(self.counts) if bucket_count]
+
+    def reset(self):
+        """Drop all samples"""
+        self.counts = [0] * self.num_buckets
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+
+class FairnessTelemetry:
+    """
+    Streaming fairness aggregates over per-packet, per-port delivery latencies
+    - Keeps only the most recent `capacity` packets' deliveries (ring buffer)
+    - Running mean of per-packet Jain's index
+    - Fairness-window histogram and per-port latency histograms for quantiles
+    - Memory is constant and each packet costs O(receivers)
+    """
+
+    def __init__(self, capacity=1024):
+        """
+        Args:
+            capacity: Number of recent packets kept in full
+        """
+        self.recent = deque(maxlen=capacity)
+        self.packets = 0
+        self._jain_sum = 0.0
+        self.window_histogram = LatencyHistogram()
+        self.port_histograms = {}
+
+    def record(self, pkt_id, port_latencies):
+        """
+        Record one multicast packet's deliveries
+
+        Args:
+            pkt_id: Packet identifier
+            port_latencies: Dict of port -> latency (seconds)
+
+        Returns:
+            Tuple of (Jain's fairness index, fairness window in seconds)
+        """
+        values = list(port_latencies.values())
+        fairness = 1.0
+        window = 0.0
+        if values:
+            fairness = jain_index(values)
+            window = fairness_window(values)
+        self.packets += 1
+        self._jain_sum += fairness
+        self.window_histogram.record(window)
+        for port, latency in port_latencies.items():
+            histogram = self.port_histograms.get(port)
+            if histogram is None:
+                histogram = self.port_histograms[port] = LatencyHistogram()
+            histogram.record(latency)
+        self.recent.append((pkt_id, port_latencies))
+        return fairness, window
+
+    def summary(self, quantiles=(0.5, 0.9, 0.99)):
+        """
+        Return the current aggregates
+
+        Returns:
+            Dict with packet count, running Jain's index, fairness-window quantiles (ms)
+            and per-port latency quantiles (ms)
+        """
+        def to_ms(value):
+            return value * 1000 if value is not None else None
+
+        return {
+            'packets': self.packets,
+            'mean_jain_index': self._jain_sum / self.packets if self.packets else None,
+            'fairness_window_ms': {str(q): to_ms(self.window_histogram.quantile(q)) for q in quantiles},
+            'port_latency_ms': {
+                str(port): {str(q): to_ms(histogram.quantile(q)) for q in quantiles}
+                for port, histogram in sorted(self.port_histograms.items())
+            }
+        }
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Capture file format for recording and replaying market-data traffic
+"""
+
+import socket
+import struct
+import time
+
+import numpy as np
+
+# File header: magic, format version, capture start time (epoch seconds)
+CAPTURE_MAGIC = b'MDFC'
+CAPTURE_VERSION = 1
+_HEADER = struct.Struct('<4sHd')
+# Record header: send offset (ns since capture start), payload length, UDP port, IPv4 address
+_RECORD = struct.Struct('<qIH4s')
+
+
+class FeedRecorder:
+    """
+    Record sent datagrams with their send times into a compact binary capture file
+    - One fixed 18-byte header per datagram, followed by the raw payload
+    - Offsets are nanoseconds from the start of the capture (monotonic clock)
+    """
+
+    def __init__(self, path):
+        """
+        Open a capture file for writing
+
+        Args:
+            path: Output file path (overwritten if it exists)
+        """
+        self.path = path
+        self._file = open(path, 'wb', buffering=1 << 20)
+        self._file.write(_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, time.time()))
+        self._start_ns = time.perf_counter_ns()
+        self.count = 0
+
+    def record(self, payload, addr):
+        """
+        Append one datagram
+
+        Args:
+            payload: Datagram bytes
+            addr: Destination (ip, port) tuple
+        """
+        offset_ns = time.perf_counter_ns() - self._start_ns
+        ip, port = addr
+        self._file.write(_RECORD.pack(offset_ns, len(payload), port, socket.inet_aton(ip)))
+        self._file.write(payload)
+        self.count += 1
+
+    def close(self):
+        """Flush and close the capture file"""
+        self._file.close()
+        print(f"Recorded {self.count} datagrams to {self.path}")
+
+
+def read_capture(path):
+    """
+    Load a capture file
+
+    Args:
+        path: Capture file path
+
+    Returns:
+        Dict with 'start_time' (epoch seconds), 'timestamps' (NumPy array of seconds
+        from the start of the capture), 'addrs' (list of (ip, port)) and 'payloads'
+        (list of bytes)
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path} is truncated: no capture header")
+    magic, version, start_time = _HEADER.unpack_from(data, 0)
+    if magic != CAPTURE_MAGIC:
+        raise ValueError(f"{path} is not a market-data capture file")
+    if version != CAPTURE_VERSION:
+        raise ValueError(f"Unsupported capture version: {version}")
+
+    offsets = []
+    addrs = []
+    payloads = []
+    addr_cache = {}
+    pos = _HEADER.size
+    while pos < len(data):
+        if pos + _RECORD.size > len(data):
+            raise ValueError(f"{path} is truncated: partial record header after {len(payloads)} datagrams")
+        offset_ns, length, port, packed_ip = _RECORD.unpack_from(data, pos)
+        pos += _RECORD.size
+        if pos + length > len(data):
+            raise ValueError(f"{path} is truncated: partial payload after {len(payloads)} datagrams")
+        payloads.append(data[pos:pos + length])
+        pos += length
+        offsets.append(offset_ns)
+        key = (packed_ip, port)
+        if key not in addr_cache:
+            addr_cache[key] = (socket.inet_ntoa(packed_ip), port)
+        addrs.append(addr_cache[key])
+    timestamps = np.asarray(offsets, dtype=np.int64) / 1e9
+    return {'start_time': start_time, 'timestamps': timestamps, 'addrs': addrs, 'payloads': payloads}
@@ -9,9 +9,18 @@ from ryu.controller import ofp_event
 from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
-from ryu.lib.packet import packet, ethernet, ether_types, ipv4, udp
+from ryu.lib.packet import packet
+from multicast_groups import MulticastGroupTable
+from packet_classifier import classify, PKT_OTHER, PKT_LLDP, PKT_IGMP, PKT_MULTICAST
+from controller_metrics import ControllerMetrics
+from async_logging import start_async_logging, SampledLogger, IntervalSummary
+from release_scheduler import ReleaseScheduler
+from fairness_telemetry import FairnessTelemetry
+from multicast_tree import FairMulticastTree
+from deadline_tuner import DeadlineTuner
+from controller_sharding import ControllerShard, api_port
+from ryu.lib import hub
 import time
-import random
 import threading
 from flask import Flask, request, jsonify
 
@@ -19,32 +28,144 @@ api_app = Flask(__name__)
 controller_instance = None  # Will be set to the running controller
 
 def run_api():
-    api_app.run(host='0.0.0.0', port=5006, debug=False, use_reloader=False)
+    api_app.run(host='0.0.0.0', port=api_port(5006), debug=False, use_reloader=False)
 
 @api_app.route('/api/set_hold_release_deadline', methods=['POST'])
 def api_set_hold_release_deadline():
     deadline = float(request.json.get('deadline_ms', 1.0))
     if controller_instance:
-        controller_instance.set_hold_release_deadline(deadline)
+        controller_instance.shard.apply_config('set_hold_release_deadline', deadline)
         return jsonify({'status': 'ok', 'deadline_ms': deadline})
     return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
 
+@api_app.route('/api/set_adaptive_deadline', methods=['POST'])
+def api_set_adaptive_deadline():
+    enabled = bool(request.json.get('enabled', True))
+    target = request.json.get('target_window_ms')
+    quantile = request.json.get('quantile')
+    if controller_instance:
+        controller_instance.shard.apply_config('enable_adaptive_deadline', enabled,
+                                               None if target is None else float(target),
+                                               None if quantile is None else float(quantile))
+        return jsonify({'status': 'ok', 'enabled': enabled, 'target_window_ms': target, 'quantile': quantile})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/report_delivery_latencies', methods=['POST'])
+def api_report_delivery_latencies():
+    # {'latencies_ms': {port: [ms, ...]}, 'fairness_windows_ms': [ms, ...], 'dpid': int,
+    #  'group': str, 'end_to_end': bool}, all optional (mininet_benchmark posts these live)
+    latencies = request.json.get('latencies_ms', {})
+    windows = request.json.get('fairness_windows_ms', [])
+    dpid = request.json.get('dpid')
+    if controller_instance:
+        controller_instance.report_delivery_latencies(
+            {int(port): [float(x) for x in samples] for port, samples in latencies.items()},
+            [float(x) for x in windows], None if dpid is None else int(dpid),
+            request.json.get('group'), bool(request.json.get('end_to_end', False)))
+        return jsonify({'status': 'ok', 'ports': len(latencies), 'windows': len(windows)})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/deadline_tuner_stats', methods=['GET'])
+def api_deadline_tuner_stats():
+    if controller_instance:
+        return jsonify({'status': 'ok', 'adaptive': controller_instance.adaptive_deadline,
+                        'tuner': controller_instance.deadline_tuner.stats()})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
 @api_app.route('/api/set_hold_release', methods=['POST'])
 def api_set_hold_release():
     enabled = bool(request.json.get('enabled', True))
     if controller_instance:
-        controller_instance.enable_hold_release(enabled)
+        controller_instance.shard.apply_config('enable_hold_release', enabled)
         return jsonify({'status': 'ok', 'enabled': enabled})
     return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
 
+@api_app.route('/api/hold_release_stats', methods=['GET'])
+def api_hold_release_stats():
+    if controller_instance:
+        return jsonify({'status': 'ok', 'scheduler': controller_instance.release_scheduler.stats()})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/fairness_stats', methods=['GET'])
+def api_fairness_stats():
+    if controller_instance:
+        return jsonify({'status': 'ok', 'fairness': controller_instance.telemetry.summary()})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
 @api_app.route('/api/set_dynamic_tree', methods=['POST'])
 def api_set_dynamic_tree():
     enabled = bool(request.json.get('enabled', True))
     if controller_instance:
-        controller_instance.enable_dynamic_tree(enabled)
+        controller_instance.shard.apply_config('enable_dynamic_tree', enabled)
         return jsonify({'status': 'ok', 'enabled': enabled})
     return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
 
+@api_app.route('/api/set_receiver_latency', methods=['POST'])
+def api_set_receiver_latency():
+    port = int(request.json.get('port'))
+    latency = float(request.json.get('latency_ms', 0.0))
+    dpid = request.json.get('dpid')
+    if controller_instance:
+        controller_instance.shard.apply_config('update_receiver_latency', port, latency,
+                                               None if dpid is None else int(dpid))
+        return jsonify({'status': 'ok', 'port': port, 'latency_ms': latency})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/multicast_tree', methods=['GET'])
+def api_multicast_tree():
+    if controller_instance:
+        # Keyed "<dpid>/<group>", with group "*" for the tree over all live ports
+        trees = {f"{dpid}/{group_ip or '*'}": tree.describe()
+                 for (dpid, group_ip), tree in controller_instance.multicast_tree.items()}
+        return jsonify({'status': 'ok', 'trees': trees})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/set_proactive_multicast', methods=['POST'])
+def api_set_proactive_multicast():
+    enabled = bool(request.json.get('enabled', True))
+    if controller_instance:
+        controller_instance.shard.apply_config('enable_proactive_multicast', enabled)
+        return jsonify({'status': 'ok', 'enabled': enabled})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/metrics', methods=['GET'])
+def api_metrics():
+    # ?reset=1 returns the current window and starts a new one
+    reset = request.args.get('reset', '0').lower() in ('1', 'true', 'yes')
+    if controller_instance:
+        return jsonify({'status': 'ok', 'metrics': controller_instance.metrics.snapshot(reset=reset)})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/set_packet_log', methods=['POST'])
+def api_set_packet_log():
+    rate = float(request.json.get('rate_per_s', 20.0))
+    sample_every = int(request.json.get('sample_every', 1))
+    if controller_instance:
+        controller_instance.shard.apply_config('set_packet_log', rate, sample_every)
+        return jsonify({'status': 'ok', 'rate_per_s': rate, 'sample_every': sample_every})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/set_router_ports', methods=['POST'])
+def api_set_router_ports():
+    # Ports of a switch that lead to other switches (multi-switch topologies)
+    dpid = int(request.json.get('dpid'))
+    ports = [int(port) for port in request.json.get('ports', [])]
+    if controller_instance:
+        controller_instance.shard.apply_config('set_router_ports', dpid, ports)
+        return jsonify({'status': 'ok', 'dpid': dpid, 'ports': ports})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/shard_status', methods=['GET'])
+def api_shard_status():
+    if controller_instance:
+        return jsonify({'status': 'ok', 'shard': controller_instance.shard.status()})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+# Setters the Flask API applies on every shard through the coordination channel
+SHARED_CONFIG_METHODS = ('set_hold_release_deadline', 'enable_adaptive_deadline', 'enable_hold_release',
+                         'enable_dynamic_tree', 'update_receiver_latency', 'enable_proactive_multicast',
+                         'set_packet_log', 'set_router_ports')
+
 class JasperMulticastController(app_manager.RyuApp):
     """
     Jasper-inspired multicast controller for financial exchange simulation
@@ -56,54 +177,210 @@ class JasperMulticastController(app_manager.RyuApp):
 
     def __init__(self, *args, **kwargs):
         super(JasperMulticastController, self).__init__(*args, **kwargs)
+        # Log records are formatted and written by a background listener, not the event loop
+        self.log_listener = start_async_logging(self.logger)
         global controller_instance
         controller_instance = self
         self.mac_to_port = {}
         # Track multicast groups and their members
         self.multicast_groups = {}
-        # Track timestamps for calculating latency
+        # Track timestamps for calculating latency (in-flight packets only)
         self.packet_timestamps = {}
-        # Maintain multicast tree (simplified for 4-node star topology)
+        # Bounded per-packet history and streaming fairness aggregates
+        self.telemetry = FairnessTelemetry()
+        # Jasper: Latency-aware fair multicast trees, (dpid, group_ip) -> FairMulticastTree;
+        # group None spans all live ports and serves groups nobody has joined
         self.multicast_tree = {}
-        # Jasper: Hold-and-release buffer (per-port)
-        self.hold_release_buffer = {}
+        # Jasper: Maximum children per tree node and replication cost per tree level (s)
+        self.tree_fanout = 4
+        self.tree_hop_delay = 0.0001
+        # Jasper: Hold-and-release scheduler (held packets wait on its deadline heap)
+        self.release_scheduler = ReleaseScheduler(self.logger)
         # Jasper: Deadline (ms) for hold-and-release (can be dynamic)
         self.hold_release_deadline_ms = 1.0  # Default 1ms
-        # Jasper: Enable dynamic tree reshuffling
+        # Jasper: Feedback tuning of the deadline from measured latency quantiles
+        self.deadline_tuner = DeadlineTuner()
+        self.adaptive_deadline = True
+        self.deadline_tuning_interval = 1.0  # seconds between decisions
+        self.deadline_tuning_thread = hub.spawn(self._deadline_tuning_loop)
+        # Jasper: Re-place receivers in the tree as their measured latencies change
         self.dynamic_tree = True
         # Jasper: Enable/disable hold-and-release
         self.hold_release_enabled = True
+        # IGMP-driven group membership and OpenFlow group entries
+        self.group_table = MulticastGroupTable(self.logger)
+        # PacketIn rates, per-port deliveries and latency histograms for /api/metrics
+        self.metrics = ControllerMetrics()
+        # Per-packet log lines are sampled and rate-limited; totals go into interval summaries
+        self.packet_log = SampledLogger(self.logger)
+        self._summary_packets = 0
+        self.log_summary = IntervalSummary(self.logger, self.summarize_log_interval)
+        # Datapaths this instance owns when several controllers share the network; config is kept in sync
+        self.shard = ControllerShard(self.logger, self, SHARED_CONFIG_METHODS)
         self.logger.info("Jasper Multicast Controller started")
 
     def set_hold_release_deadline(self, deadline_ms):
-        """Set hold-and-release deadline (ms) for all receivers"""
+        """
+        Set hold-and-release deadline (ms) for all receivers: the target delivery time
+        after PacketIn. While adaptive tuning is on, the tuner continues from this value.
+        """
         self.hold_release_deadline_ms = deadline_ms
+        self.deadline_tuner.reset(deadline_ms / 1000.0)
         self.logger.info(f"Set hold-and-release deadline: {deadline_ms} ms")
 
+    def enable_adaptive_deadline(self, enabled=True, target_window_ms=None, quantile=None):
+        """Turn deadline tuning on/off and optionally change its fairness-window target and quantile"""
+        self.adaptive_deadline = enabled
+        if target_window_ms is not None:
+            self.deadline_tuner.target_window = target_window_ms / 1000.0
+        if quantile is not None:
+            self.deadline_tuner.quantile = quantile
+        self.deadline_tuner.reset(self.hold_release_deadline_ms / 1000.0)
+        self.logger.info(f"Adaptive hold-and-release deadline enabled: {enabled} "
+                         f"(target window {self.deadline_tuner.target_window * 1000} ms, "
+                         f"quantile {self.deadline_tuner.quantile})")
+
+    def report_delivery_latencies(self, latencies_ms, windows_ms=(), dpid=None, group_ip=None, end_to_end=False):
+        """
+        Feed receiver-measured latencies and fairness windows to the tree and deadline tuner
+
+        Args:
+            latencies_ms: Dict of port -> list of one-way delivery latencies (ms)
+            windows_ms: Measured per-packet fairness windows (ms)
+            dpid: Switch the ports belong to (None: the port on every switch)
+            group_ip: Group the samples were measured on, for end_to_end
+            end_to_end: Latencies run from the publisher's send, so they include each
+                copy's hold; the port's current release offset on the group's tree (or
+                the all-ports tree) is subtracted to leave the delay after release
+        """
+        offsets = {}
+        if end_to_end and dpid is not None:
+            tree = self.multicast_tree.get((dpid, group_ip)) or self.multicast_tree.get((dpid, None))
+            if tree is not None:
+                deadline = self.hold_release_deadline_ms / 1000.0 if self.hold_release_enabled else 0.0
+                offsets = dict(tree.schedule(deadline))
+        for port, samples in latencies_ms.items():
+            offset_ms = offsets.get(port, 0.0) * 1000
+            for latency_ms in samples:
+                self.update_receiver_latency(port, max(0.0, latency_ms - offset_ms), dpid)
+        for window_ms in windows_ms:
+            self.deadline_tuner.observe_window(window_ms / 1000.0)
+
+    def _deadline_tuning_loop(self):
+        """Let the tuner move the hold-and-release deadline once per interval (own green thread)"""
+        while True:
+            hub.sleep(self.deadline_tuning_interval)
+            if not (self.adaptive_deadline and self.hold_release_enabled):
+                continue
+            try:
+                deadline = self.deadline_tuner.update(dict(self.multicast_tree))
+            except Exception:
+                self.logger.exception("Deadline tuning failed")
+                continue
+            if deadline is not None:
+                self.hold_release_deadline_ms = deadline * 1000
+
     def enable_dynamic_tree(self, enabled=True):
         self.dynamic_tree = enabled
-        self.logger.info(f"Dynamic multicast tree reshuffling set to {enabled}")
+        self.logger.info(f"Latency-driven multicast tree updates set to {enabled}")
+
+    def update_receiver_latency(self, port, latency_ms, dpid=None):
+        """
+        Feed a measured one-way latency (ms) for a receiver port into the trees containing
+        it on one switch, or on every switch if dpid is None. The deadline tuner always
+        sees the sample; the trees ignore it while dynamic_tree is off.
+        """
+        self.deadline_tuner.observe_latency(port, latency_ms / 1000.0, dpid)
+        if not self.dynamic_tree:
+            return
+        for (tree_dpid, _), tree in self.multicast_tree.items():
+            if (dpid is None or tree_dpid == dpid) and port in tree.latencies:
+                tree.update_latency(port, latency_ms / 1000.0)
 
     def enable_hold_release(self, enabled=True):
         self.hold_release_enabled = enabled
         self.logger.info(f"Hold-and-release enabled: {enabled}")
 
-    def build_fair_multicast_tree(self, dpid):
+    def enable_proactive_multicast(self, enabled=True):
+        """Replicate multicast in the switch via OpenFlow group entries instead of PacketOut"""
+        self.group_table.set_proactive(enabled)
+        self.logger.info(f"Proactive multicast (group tables) enabled: {enabled}")
+
+    def set_router_ports(self, dpid, ports):
+        """Forward every joined group to these ports of a switch (links to other switches) and resync its trees"""
+        changed = self.group_table.set_router_ports(dpid, ports)
+        self.sync_multicast_trees(dpid, changed)
+
+    def set_packet_log(self, rate, sample_every=1):
+        """Set the per-packet log rate limit (lines/s, 0 disables) and sampling interval"""
+        self.packet_log.configure(rate, sample_every=sample_every)
+        self.logger.info(f"Per-packet logging: {rate} lines/s, 1 in {sample_every} sampled")
+
+    def summarize_log_interval(self, elapsed):
+        """Interval summary line standing in for suppressed per-packet log lines"""
+        events, suppressed = self.packet_log.take_counts()
+        packets = self.telemetry.packets - self._summary_packets
+        self._summary_packets = self.telemetry.packets
+        if not packets and not events:
+            return None
+        line = f"Jasper summary: {packets} packets in {elapsed:.1f}s ({packets / elapsed:.0f}/s)"
+        if self.telemetry.packets:
+            stats = self.telemetry.summary(quantiles=(0.99,))
+            line += (f", mean Jain {stats['mean_jain_index']:.4f}, "
+                     f"fairness window p99 {stats['fairness_window_ms']['0.99']:.3f} ms")
+        return (line + f", deadline {self.hold_release_deadline_ms:.3f} ms, "
+                f"{suppressed}/{events} log lines suppressed, "
+                f"{self.release_scheduler.pending()} releases pending, "
+                f"{self.log_listener.handler.dropped} log records dropped")
+
+    def build_fair_multicast_tree(self, dpid, group_ip=None):
         """
         Build a fair multicast tree inspired by Jasper
-        For this mini-implementation, we'll create a simple tree
-        that ensures fairness by ordering the receivers
-        If dynamic_tree is enabled, reshuffle order each time.
+        - Receivers are the group's subscribed ports plus router ports to other
+          switches, or all live ports for group None
+        - Receivers are placed in a bounded fan-out tree, slowest closest to the root
+        - Each copy is released at the tree's common delivery time minus the
+          receiver's measured latency, so all copies arrive together
+        - Latency estimates are taken from the switch's all-ports tree; receivers
+          without a measurement yet start at zero latency
+        """
+        receivers = self._tree_receivers(dpid, group_ip)
+        known = self.multicast_tree.get((dpid, None))
+        tree = FairMulticastTree(fanout=self.tree_fanout, hop_delay=self.tree_hop_delay)
+        tree.build({port: known.latencies.get(port, 0.0) if known else 0.0 for port in receivers})
+        self.multicast_tree[(dpid, group_ip)] = tree
+        self.logger.info(f"Built fair multicast tree for switch {dpid}, group {group_ip or 'all ports'}: "
+                         f"{len(receivers)} receivers, fan-out {tree.fanout}, "
+                         f"delivery time {tree.delivery_time() * 1000:.3f} ms")
+        return tree
+
+    def _tree_receivers(self, dpid, group_ip):
+        if group_ip is None:
+            return self.group_table.get_ports(dpid)
+        return self.group_table.forward_ports(dpid, group_ip)
+
+    def sync_multicast_trees(self, dpid, group_ips=()):
         """
-        ports = [1, 2, 3, 4]  # Ports for our 4 hosts
-        if self.dynamic_tree:
-            import random
-            random.shuffle(ports)  # Randomize to simulate dynamic fairness
-        self.multicast_tree[dpid] = {
-            'order': ports,
-            'delay': 0.0001  # Small artificial delay between each node (0.1ms)
-        }
-        self.logger.info(f"Built fair multicast tree for switch {dpid}: {self.multicast_tree[dpid]}")
+        Apply port and membership changes to a switch's trees incrementally
+        - The all-ports tree always follows the live ports
+        - Trees of the given groups gain joined and lose departed receivers; a group's
+          tree is dropped once it has no members
+        """
+        known = self.multicast_tree.get((dpid, None))
+        for group_ip in (None,) + tuple(group_ips):
+            tree = self.multicast_tree.get((dpid, group_ip))
+            if tree is None:
+                if group_ip is None:
+                    self.build_fair_multicast_tree(dpid)
+                continue
+            receivers = self._tree_receivers(dpid, group_ip)
+            if group_ip is not None and not receivers:
+                del self.multicast_tree[(dpid, group_ip)]
+                continue
+            for port in set(tree.latencies) - receivers:
+                tree.remove_receiver(port)
+            for port in receivers - set(tree.latencies):
+                tree.add_receiver(port, known.latencies.get(port) if known else None)
 
     def add_flow(self, datapath, priority, match, actions, buffer_id=None):
         """Add a flow entry to the switch"""
@@ -128,15 +405,34 @@ class JasperMulticastController(app_manager.RyuApp):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
 
+        # Another shard programs this switch; we stay connected as a standby
+        if not self.shard.claim_datapath(datapath):
+            return
+
         # Install table-miss flow entry
         match = parser.OFPMatch()
         actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,
                                          ofproto.OFPCML_NO_BUFFER)]
         self.add_flow(datapath, 0, match, actions)
+        self.group_table.register_datapath(datapath)
         self.logger.info(f"Switch {datapath.id} connected")
-        
-        # Initialize the multicast tree for this switch
-        self.build_fair_multicast_tree(datapath.id)
+
+    @set_ev_cls(ofp_event.EventOFPPortDescStatsReply, MAIN_DISPATCHER)
+    def port_desc_stats_reply_handler(self, ev):
+        """Learn the live ports of a newly connected switch and (re)build its trees"""
+        datapath = ev.msg.datapath
+        changed = self.group_table.handle_port_desc(datapath, ev.msg.body)
+        self.sync_multicast_trees(datapath.id, changed)
+
+    @set_ev_cls(ofp_event.EventOFPPortStatus, MAIN_DISPATCHER)
+    def port_status_handler(self, ev):
+        """Track ports coming and going; a port that goes down leaves its groups and trees"""
+        datapath = ev.msg.datapath
+        if not self.shard.owns(datapath.id):
+            return
+        changed = self.group_table.handle_port_status(datapath, ev.msg)
+        self.sync_multicast_trees(datapath.id, changed)
+        self.shard.share_membership(datapath.id, changed, self.group_table)
 
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def packet_in_handler(self, ev):
@@ -152,27 +448,37 @@ class JasperMulticastController(app_manager.RyuApp):
         parser = datapath.ofproto_parser
         in_port = msg.match['in_port']
 
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        # Fast path: classify from raw header bytes instead of a full ryu parse
+        kind, dst, src, ipv4_dst = classify(msg.data)
+        self.metrics.count_packet_in(kind)
 
-        if eth.ethertype == ether_types.ETH_TYPE_LLDP:
-            # Ignore LLDP packets
+        if kind == PKT_LLDP or kind == PKT_OTHER:
+            # Ignore LLDP packets and runt frames
             return
         
-        dst = eth.dst
-        src = eth.src
         dpid = datapath.id
 
         # Learn MAC addresses to avoid flooding
         self.mac_to_port.setdefault(dpid, {})
         self.mac_to_port[dpid][src] = in_port
 
-        # Generate packet identifier for tracking
-        pkt_id = f"{src}_{dst}_{time.time()}"
-        
+        # IGMP reports and leaves only update group membership (the one case needing the full parser)
+        if kind == PKT_IGMP:
+            changed = self.group_table.handle_igmp(datapath, in_port, packet.Packet(msg.data))
+            if changed:
+                self.sync_multicast_trees(dpid, changed)
+                self.shard.share_membership(dpid, changed, self.group_table)
+            return
+
         # Check if this is a multicast packet
-        if dst.startswith('01:00:5e'):  # IPv4 multicast MAC prefix
-            self.handle_jasper_multicast(msg, datapath, in_port, pkt, pkt_id)
+        if kind == PKT_MULTICAST:  # IPv4 multicast MAC prefix
+            # Proactive mode: the switch's group entry replicates; this packet only raced the flow install
+            if self.group_table.proactive and ipv4_dst is not None and \
+                    self.group_table.packet_out_via_group(msg, datapath, in_port, ipv4_dst):
+                return
+            # Generate packet identifier for tracking
+            pkt_id = f"{src}_{dst}_{time.time()}"
+            self.handle_jasper_multicast(msg, datapath, in_port, pkt_id, ipv4_dst)
             return
             
         # Regular unicast forwarding
@@ -202,84 +508,74 @@ class JasperMulticastController(app_manager.RyuApp):
                                  in_port=in_port, actions=actions, data=data)
         datapath.send_msg(out)
 
-    def handle_jasper_multicast(self, msg, datapath, in_port, pkt, pkt_id):
+    def handle_jasper_multicast(self, msg, datapath, in_port, pkt_id, group_ip):
         """
         Handle multicast packets using Jasper-inspired fair distribution
         - Prioritizes fairness in packet delivery
-        - Uses multicast tree to determine forwarding order
-        - Adds small artificial delays to simulate fair ordering
-        - Implements hold-and-release: buffer delivery, then release after deadline
+        - Uses the group's multicast tree (its subscribed ports), or the all-ports
+          tree if nobody has joined the group, to determine forwarding order
+        - Offsets each copy by its receiver's measured latency so copies arrive together
+        - Implements hold-and-release: each port's copy waits on the release
+          scheduler and is sent at its deadline without blocking the event loop
         """
-        ofproto = datapath.ofproto
-        parser = datapath.ofproto_parser
         dpid = datapath.id
-        import time
         # Record packet arrival time
-        self.packet_timestamps[pkt_id] = {'arrival': time.time(), 'deliveries': {}}
-        # Get multicast tree for this switch
-        if dpid not in self.multicast_tree or self.dynamic_tree:
-            self.build_fair_multicast_tree(dpid)
-        tree = self.multicast_tree[dpid]
-        order = tree['order']
-        delay = tree['delay']
-        # Hold-and-release: buffer packets per port, release after deadline
-        release_time = time.time() + (self.hold_release_deadline_ms / 1000.0)
-        for i, port in enumerate(order):
+        self.packet_timestamps[pkt_id] = {'arrival': time.time(), 'deliveries': {}, 'pending': 0}
+        # Get the multicast tree for this group on this switch
+        if not self.group_table.forward_ports(dpid, group_ip):
+            if not self.group_table.flood_unknown:
+                del self.packet_timestamps[pkt_id]
+                return
+            group_ip = None
+        tree = self.multicast_tree.get((dpid, group_ip))
+        if tree is None:
+            tree = self.build_fair_multicast_tree(dpid, group_ip)
+        # Hold-and-release: each copy leaves at its tree slot or the deadline minus its receiver's
+        # latency, whichever is later; without hold-and-release every copy leaves at its slot
+        deadline = self.hold_release_deadline_ms / 1000.0 if self.hold_release_enabled else 0.0
+        for port, offset in tree.schedule(deadline):
             if port != in_port:
-                # Buffer packet for port
-                if port not in self.hold_release_buffer:
-                    self.hold_release_buffer[port] = []
-                self.hold_release_buffer[port].append((msg, datapath, in_port, parser, ofproto, pkt_id, release_time, i * delay))
-        # Immediately schedule release (in real Jasper, would be event-driven)
-        self.release_held_packets()
-        self.log_fairness_metrics(pkt_id)
-
-    def release_held_packets(self):
-        """Release held packets after their hold-and-release deadline"""
-        import time
-        now = time.time()
-        for port, pkts in list(self.hold_release_buffer.items()):
-            new_pkts = []
-            for (msg, datapath, in_port, parser, ofproto, pkt_id, release_time, extra_delay) in pkts:
-                if now >= release_time:
-                    # Apply extra delay for fair ordering
-                    if extra_delay > 0:
-                        time.sleep(extra_delay)
-                    actions = [parser.OFPActionOutput(port)]
-                    data = None
-                    if msg.buffer_id == ofproto.OFP_NO_BUFFER:
-                        data = msg.data
-                    out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
-                                             in_port=in_port, actions=actions, data=data)
-                    datapath.send_msg(out)
-                    # Record delivery time
-                    self.packet_timestamps[pkt_id]['deliveries'][port] = time.time()
-                    self.logger.info(f"Jasper multicast: released packet to port {port}")
-                else:
-                    new_pkts.append((msg, datapath, in_port, parser, ofproto, pkt_id, release_time, extra_delay))
-            if new_pkts:
-                self.hold_release_buffer[port] = new_pkts
-            else:
-                del self.hold_release_buffer[port]
+                self.packet_timestamps[pkt_id]['pending'] += 1
+                self.release_scheduler.call_later(offset, self.release_held_packet,
+                                                  msg, datapath, in_port, port, pkt_id)
+        if self.packet_timestamps[pkt_id]['pending'] == 0:
+            # No receivers besides the sender
+            del self.packet_timestamps[pkt_id]
+
+    def release_held_packet(self, msg, datapath, in_port, port, pkt_id):
+        """Release one held packet to its port (runs on the release scheduler thread)"""
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        actions = [parser.OFPActionOutput(port)]
+        data = None
+        if msg.buffer_id == ofproto.OFP_NO_BUFFER:
+            data = msg.data
+        out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
+                                 in_port=in_port, actions=actions, data=data)
+        datapath.send_msg(out)
+        # Record delivery time
+        packet_info = self.packet_timestamps[pkt_id]
+        packet_info['deliveries'][port] = time.time()
+        packet_info['pending'] -= 1
+        self.metrics.count_delivery(port)
+        self.packet_log.log("Jasper multicast: released packet to port %s", port)
+        # Fairness can only be computed once every port has been released
+        if packet_info['pending'] == 0:
+            self.log_fairness_metrics(pkt_id)
 
     def log_fairness_metrics(self, pkt_id):
         """Log the fairness metrics for a multicast packet, including fairness window"""
         if pkt_id in self.packet_timestamps:
-            packet_info = self.packet_timestamps[pkt_id]
+            # The packet is complete; only the bounded telemetry keeps it from here on
+            packet_info = self.packet_timestamps.pop(pkt_id)
             arrival = packet_info['arrival']
-            deliveries = packet_info['deliveries']
-            latencies = []
-            for port, delivery_time in deliveries.items():
-                latency = delivery_time - arrival
-                latencies.append(latency)
-            fairness = 1.0
+            latencies = {port: delivery_time - arrival
+                         for port, delivery_time in packet_info['deliveries'].items()}
             if latencies:
-                sum_latencies = sum(latencies)
-                sum_squared = sum(x**2 for x in latencies)
-                n = len(latencies)
-                fairness = (sum_latencies**2) / (n * sum_squared) if sum_squared > 0 else 1.0
-                fairness_window = max(latencies) - min(latencies) if len(latencies) > 1 else 0.0
-                self.logger.info(f"Packet {pkt_id} - Latencies: {latencies}, Fairness Index: {fairness:.4f}, Fairness Window: {fairness_window*1000:.2f} ms")
+                fairness, fairness_window = self.telemetry.record(pkt_id, latencies)
+                self.metrics.record_packet(latencies, fairness_window)
+                self.packet_log.log("Packet %s - Latencies (s) by port: %s, Fairness Index: %.4f, Fairness Window: %.2f ms",
+                                    pkt_id, latencies, fairness, fairness_window * 1000)
 
 # Start Flask API server in a background thread
 api_thread = threading.Thread(target=run_api, daemon=True)
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+One-way latency measurement: send stamps, per-host binary logs and their merge
+"""
+
+import argparse
+import json
+import signal
+import socket
+import struct
+import sys
+import time
+
+import numpy as np
+
+# Stamp prepended to measured datagrams: magic, sequence number, send time (epoch ns)
+STAMP_MAGIC = b'MDTS'
+STAMP = struct.Struct('<4sQq')
+
+# Log file header: magic, format version, role, host name
+LOG_MAGIC = b'MDLL'
+LOG_VERSION = 1
+ROLE_SEND = 0
+ROLE_RECEIVE = 1
+_HEADER = struct.Struct('<4sHB32s')
+# Log record: sequence number and time (epoch ns) - send time in send logs, arrival time in arrival logs
+_RECORD = struct.Struct('<Qq')
+RECORD_DTYPE = np.dtype([('seq', '<u8'), ('time_ns', '<i8')])
+
+# Prefix of the live report lines a receiver prints with --report-interval
+REPORT_PREFIX = 'REPORT '
+
+# Linux kernel receive timestamps (SO_TIMESTAMPNS); not exported by the socket module
+_SO_TIMESTAMPNS = getattr(socket, 'SO_TIMESTAMPNS', 35)
+_TIMESPEC = struct.Struct('@qq')
+
+
+class MeasurementLog:
+    """
+    Append-only binary log of (sequence number, epoch ns) records
+    - One 46-byte header naming the host and whether it sent or received
+    - 16 bytes per record, so a receiver can log millions of arrivals cheaply
+    """
+
+    def __init__(self, path, role, host):
+        """
+        Open a log file for writing
+
+        Args:
+            path: Output file path (overwritten if it exists)
+            role: ROLE_SEND or ROLE_RECEIVE
+            host: Name of the host writing the log (e.g. 'h2')
+        """
+        self.path = path
+        self.host = host
+        self._file = open(path, 'wb', buffering=1 << 20)
+        self._file.write(_HEADER.pack(LOG_MAGIC, LOG_VERSION, role, host.encode()[:32]))
+        self.count = 0
+
+    def log(self, seq, time_ns):
+        """Append one record"""
+        self._file.write(_RECORD.pack(seq, time_ns))
+        self.count += 1
+
+    def close(self):
+        """Flush and close the log file"""
+        self._file.close()
+
+
+class SendLog(MeasurementLog):
+    """
+    Log of sent datagrams that also stamps them
+    - Every datagram gets the next sequence number and its send time
+      prepended (STAMP.size extra bytes)
+    """
+
+    def __init__(self, path, host='h1'):
+        super().__init__(path, ROLE_SEND, host)
+
+    def stamp(self, payload):
+        """
+        Stamp and log one datagram
+
+        Args:
+            payload: Datagram bytes
+
+        Returns:
+            The stamped datagram
+        """
+        send_ns = time.time_ns()
+        stamped = STAMP.pack(STAMP_MAGIC, self.count, send_ns) + payload
+        self.log(self.count, send_ns)
+        return stamped
+
+    def stamp_into(self, buffer):
+        """Stamp and log a datagram whose first STAMP.size bytes are reserved for the stamp"""
+        send_ns = time.time_ns()
+        STAMP.pack_into(buffer, 0, STAMP_MAGIC, self.count, send_ns)
+        self.log(self.count, send_ns)
+
+
+def read_stamp(data):
+    """
+    Read the stamp of a received datagram
+
+    Returns:
+        (sequence number, send time in epoch ns), or None if the datagram is not stamped
+    """
+    if len(data) < STAMP.size:
+        return None
+    magic, seq, send_ns = STAMP.unpack_from(data)
+    if magic != STAMP_MAGIC:
+        return None
+    return seq, send_ns
+
+
+def read_log(path):
+    """
+    Load a measurement log
+
+    Returns:
+        Dict with 'role', 'host' and 'records' (structured array of seq, time_ns)
+    """
+    with open(path, 'rb') as f:
+        magic, version, role, host = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != LOG_MAGIC:
+            raise ValueError(f"{path} is not a measurement log")
+        if version != LOG_VERSION:
+            raise ValueError(f"Unsupported measurement log version: {version}")
+        records = np.fromfile(f, dtype=RECORD_DTYPE)
+    return {'role': role, 'host': host.rstrip(b'\0').decode(), 'records': records}
+
+
+def merge_logs(send_path, arrival_paths):
+    """
+    Join a send log with the receivers' arrival logs
+
+    Args:
+        send_path: Log written by the publisher's SendLog
+        arrival_paths: One arrival log per receiver
+
+    Returns:
+        Dict with 'seq' and 'send_ns' (one entry per sent message, in sequence
+        order), 'hosts' (receiver names) and 'latencies', a (messages x receivers)
+        array of one-way latencies in ms; NaN where a receiver never got the message
+    """
+    sent = read_log(send_path)['records']
+    sent = sent[np.argsort(sent['seq'], kind='stable')]
+    seqs = sent['seq']
+    send_ns = sent['time_ns']
+    latencies = np.full((len(seqs), len(arrival_paths)), np.nan)
+    hosts = []
+    for column, path in enumerate(arrival_paths):
+        arrivals = read_log(path)
+        hosts.append(arrivals['host'])
+        records = arrivals['records']
+        # Earliest copy wins when a receiver got duplicates
+        records = records[np.argsort(records['time_ns'], kind='stable')]
+        rows = np.minimum(np.searchsorted(seqs, records['seq']), max(len(seqs) - 1, 0))
+        known = (seqs[rows] == records['seq']) if len(seqs) else np.zeros(len(records), dtype=bool)
+        rows, first = np.unique(rows[known], return_index=True)
+        arrival_ns = records['time_ns'][known][first]
+        latencies[rows, column] = (arrival_ns - send_ns[rows]) / 1e6
+    return {'seq': seqs, 'send_ns': send_ns, 'hosts': hosts, 'latencies': latencies}
+
+
+def receive(group, port, path, host, duration, report=None, report_interval=1.0):
+    """
+    Join a multicast group and log the arrival time of every stamped datagram
+
+    Arrival times come from kernel receive timestamps where available, so the
+    receiver's own scheduling delay is not counted.
+
+    Args:
+        group: Multicast group address
+        port: UDP port
+        path: Arrival log file
+        host: Name of this host
+        duration: Seconds to listen for
+        report: Optional callable given the [seq, one-way latency ms] pairs of each
+            report_interval while the run is live (publisher and receiver share a clock)
+        report_interval: Seconds between report calls
+
+    Returns:
+        Number of datagrams logged
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('', port))
+    mreq = struct.pack('4sl', socket.inet_aton(group), socket.INADDR_ANY)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, _SO_TIMESTAMPNS, 1)
+        kernel_stamps = True
+    except OSError:
+        kernel_stamps = False
+
+    log = MeasurementLog(path, ROLE_RECEIVE, host)
+    buffer = bytearray(65535)
+    ancillary = socket.CMSG_SPACE(_TIMESPEC.size)
+    deadline = time.time() + duration
+    next_report = time.time() + report_interval
+    samples = []
+    try:
+        while True:
+            now = time.time()
+            if report is not None and now >= next_report:
+                report(samples)
+                samples = []
+                next_report = now + report_interval
+            remaining = deadline - now
+            if remaining <= 0:
+                break
+            sock.settimeout(min(remaining, next_report - now) if report is not None else remaining)
+            try:
+                nbytes, ancdata, _, _ = sock.recvmsg_into([buffer], ancillary)
+            except socket.timeout:
+                continue
+            arrival_ns = None
+            for level, kind, data in ancdata:
+                if kernel_stamps and level == socket.SOL_SOCKET and kind == _SO_TIMESTAMPNS:
+                    seconds, nanoseconds = _TIMESPEC.unpack_from(data)
+                    arrival_ns = seconds * 1000000000 + nanoseconds
+            if arrival_ns is None:
+                arrival_ns = time.time_ns()
+            stamp = read_stamp(memoryview(buffer)[:nbytes])
+            if stamp is not None:
+                log.log(stamp[0], arrival_ns)
+                if report is not None:
+                    samples.append([stamp[0], (arrival_ns - stamp[1]) / 1e6])
+    finally:
+        if report is not None and samples:
+            report(samples)
+        log.close()
+        sock.close()
+    return log.count
+
+
+def publish(group, port, path, host, test_scenario):
+    """
+    Send a scenario's feed with every datagram stamped and logged
+
+    Args:
+        group: Multicast group address
+        port: UDP port
+        path: Send log file
+        host: Name of this host
+        test_scenario: Scenario dict (duration, message_rate, message_size, arrival, seed)
+
+    Returns:
+        Dict of schedule-following statistics
+    """
+    # The generator sets up file logging at import, so only the publisher loads it
+    from scripts.arrival_processes import build_schedule
+    from scripts.traffic_generator import FinancialTrafficGenerator
+
+    generator = FinancialTrafficGenerator(group, port, send_log=SendLog(path, host))
+    try:
+        schedule = build_schedule(test_scenario, seed=test_scenario.get('seed'))
+        return generator.send_schedule(schedule, test_scenario.get('message_size', 100))
+    finally:
+        generator.close()
+
+
+def main():
+    """Main function for standalone usage (run on each Mininet host)"""
+    parser = argparse.ArgumentParser(description='One-way multicast latency measurement')
+    parser.add_argument('role', choices=('publish', 'receive'), help='Send the stamped feed or log arrivals')
+    parser.add_argument('--group', type=str, default='224.0.0.10', help='Multicast group address')
+    parser.add_argument('--port', type=int, default=5007, help='UDP port')
+    parser.add_argument('--out', type=str, required=True, help='Log file to write')
+    parser.add_argument('--host', type=str, default=socket.gethostname(), help='Host name recorded in the log')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to listen for (receive)')
+    parser.add_argument('--report-interval', type=float, default=None,
+                        help='Print live latency samples as REPORT lines every this many seconds (receive)')
+    parser.add_argument('--scenario', type=str, default='{}',
+                        help='Scenario as JSON, e.g. \'{"duration": 10, "message_rate": 100}\' (publish)')
+
+    args = parser.parse_args()
+
+    # Close the log cleanly when the benchmark stops this process
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    if args.role == 'receive':
+        report = None
+        if args.report_interval:
+            def report(samples):
+                print(REPORT_PREFIX + json.dumps(samples), flush=True)
+        count = receive(args.group, args.port, args.out, args.host, args.duration,
+                        report=report, report_interval=args.report_interval or 1.0)
+        print(f"{args.host}: logged {count} arrivals to {args.out}")
+    else:
+        publish(args.group, args.port, args.out, args.host, json.loads(args.scenario))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Measured benchmark runs: controller, Mininet network, stamped feed and receiver logs
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from mininet.net import Mininet
+from mininet.node import RemoteController, OVSKernelSwitch
+from mininet.link import TCLink
+
+from topology.star_topology import StarTopo
+from scripts.latency_measurement import REPORT_PREFIX, merge_logs
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Group and port of the measured feed
+MEASURE_GROUP = '224.0.0.10'
+MEASURE_PORT = 5007
+
+
+def wait_for_port(ip, port, timeout=15.0):
+    """Wait until something accepts TCP connections on ip:port"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((ip, port), timeout=1.0):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Nothing listening on {ip}:{port} after {timeout:.0f}s")
+
+
+def start_controller(controller_cmd, of_port, log_path):
+    """Start a controller (e.g. 'ryu-manager scripts/sdn_controller.py') listening on of_port"""
+    env = dict(os.environ)
+    # Controllers import their sibling modules by name
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.join(REPO_ROOT, 'scripts'), REPO_ROOT,
+                                                      env.get('PYTHONPATH')]))
+    program, *args = controller_cmd.split()
+    cmd = [program, '--ofp-tcp-listen-port', str(of_port)] + args
+    with open(log_path, 'w') as log:
+        return subprocess.Popen(cmd, cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def tx_packets(net):
+    """Total frames sent out of every switch port so far"""
+    total = 0
+    for switch in net.switches:
+        for intf in switch.intfList():
+            if intf.name == 'lo':
+                continue
+            with open(f'/sys/class/net/{intf.name}/statistics/tx_packets') as f:
+                total += int(f.read())
+    return total
+
+
+class DeliveryReporter:
+    """
+    Relay receivers' live latency samples to the controller under test
+    - Each receiver prints a REPORT line of (seq, latency ms) pairs per interval;
+      samples are posted per switch port to report_url (Jasper's
+      /api/report_delivery_latencies), which feeds its trees and deadline tuner
+    - A message every receiver reported gives a fairness window (latest minus
+      earliest delivery); messages still missing copies a round later are dropped
+    - Posting failures are counted, never raised: feedback is best effort
+    """
+
+    def __init__(self, report_url, dpid, group_ip, receivers, interval=1.0):
+        """
+        Args:
+            report_url: URL the samples are POSTed to as JSON
+            dpid: Switch the receivers' ports belong to
+            group_ip: Multicast group being measured
+            receivers: Number of receivers (copies per message)
+            interval: Seconds between posts
+        """
+        self.report_url = report_url
+        self.dpid = dpid
+        self.group_ip = group_ip
+        self.receivers = receivers
+        self.interval = interval
+        self.posted = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._latencies = {}
+        # seq -> [latencies so far, posts seen while incomplete]
+        self._pending = {}
+        self._stop = threading.Event()
+        self._threads = []
+
+    def follow(self, port, stream, log):
+        """Read a receiver's output in a thread: REPORT lines are relayed, the rest goes to its log"""
+        def run():
+            for line in iter(stream.readline, b''):
+                text = line.decode(errors='replace')
+                if not text.startswith(REPORT_PREFIX):
+                    log.write(text)
+                    continue
+                samples = json.loads(text[len(REPORT_PREFIX):])
+                with self._lock:
+                    self._latencies.setdefault(port, []).extend(latency for _, latency in samples)
+                    for seq, latency in samples:
+                        self._pending.setdefault(seq, [[], 0])[0].append(latency)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def start(self):
+        """Post once per interval until stopped"""
+        def run():
+            while not self._stop.wait(self.interval):
+                self.post()
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self._poster = thread
+
+    def stop(self):
+        """Wait for the receivers' output to end and post what is left"""
+        for thread in self._threads:
+            thread.join()
+        self._stop.set()
+        self._poster.join()
+        self.post()
+
+    def post(self):
+        """Send the samples gathered since the last post"""
+        with self._lock:
+            latencies, self._latencies = self._latencies, {}
+            windows = []
+            for seq, entry in list(self._pending.items()):
+                if len(entry[0]) >= self.receivers:
+                    windows.append(max(entry[0]) - min(entry[0]))
+                    del self._pending[seq]
+                elif entry[1]:
+                    del self._pending[seq]
+                else:
+                    entry[1] += 1
+        if not latencies and not windows:
+            return
+        body = {'dpid': self.dpid, 'group': self.group_ip, 'end_to_end': True,
+                'latencies_ms': {str(port): samples for port, samples in latencies.items()},
+                'fairness_windows_ms': windows}
+        request = urllib.request.Request(self.report_url, data=json.dumps(body).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            urllib.request.urlopen(request, timeout=5).read()
+            self.posted += 1
+        except OSError:
+            self.errors += 1
+
+
+def _module_cmd(role, *args):
+    return [sys.executable, '-m', 'scripts.latency_measurement', role,
+            '--group', MEASURE_GROUP, '--port', str(MEASURE_PORT)] + list(args)
+
+
+def measure(controller_cmd, test_scenario, workdir=None, of_port=6633, settle=2.0, drain=2.0,
+            report_url=None):
+    """
+    Run one scenario on a fresh star network and measure every delivery
+
+    Host h1 publishes the scenario's feed with stamped datagrams; every other
+    host logs its arrivals. Needs root, Open vSwitch and the controller's
+    dependencies (e.g. inside the mininet container).
+
+    Args:
+        controller_cmd: Command starting the controller under test
+        test_scenario: Scenario dict (duration, message_rate, message_size,
+            arrival, seed, receivers)
+        workdir: Directory for the logs (default: a new temporary directory)
+        of_port: OpenFlow port for the controller
+        settle: Seconds for receivers to join before the feed starts
+        drain: Seconds receivers keep listening after the feed ends
+        report_url: Controller endpoint receiving live per-port latencies and
+            fairness windows during the run (see DeliveryReporter); None sends nothing
+
+    Returns:
+        merge_logs() result plus 'transmissions' (publisher sends plus every
+        frame the switches sent during the run) and 'workdir'
+    """
+    receivers = test_scenario.get('receivers', 4)
+    workdir = workdir or tempfile.mkdtemp(prefix='measure-')
+    send_path = os.path.join(workdir, 'h1.tx')
+    # Receivers are stopped once the feed has drained; the timeout only guards against a stuck feed
+    listen = settle + test_scenario['duration'] + drain + 60.0
+    scenario = json.dumps({key: value for key, value in test_scenario.items()
+                           if isinstance(value, (str, int, float, dict, list, type(None)))})
+
+    controller = start_controller(controller_cmd, of_port, os.path.join(workdir, 'controller.log'))
+    net = None
+    logs = []
+    try:
+        wait_for_port('127.0.0.1', of_port)
+        net = Mininet(topo=StarTopo(n=receivers + 1), controller=None, switch=OVSKernelSwitch,
+                      link=TCLink, autoSetMacs=True)
+        net.addController('c0', controller=RemoteController, ip='127.0.0.1', port=of_port)
+        net.start()
+        for host in net.hosts:
+            # Hosts only have a route for their subnet; multicast needs one too
+            host.cmd(f'ip route add 224.0.0.0/4 dev {host.defaultIntf()}')
+
+        publisher, listeners = net.hosts[0], net.hosts[1:]
+        switch = net.switches[0]
+        reporter = None
+        if report_url:
+            reporter = DeliveryReporter(report_url, int(switch.dpid, 16), MEASURE_GROUP, len(listeners))
+        arrival_paths = []
+        processes = []
+        for host in listeners:
+            path = os.path.join(workdir, f'{host.name}.rx')
+            arrival_paths.append(path)
+            cmd = _module_cmd('receive', '--out', path, '--host', host.name, '--duration', str(listen))
+            log = open(os.path.join(workdir, f'{host.name}.log'), 'w')
+            logs.append(log)
+            if reporter is None:
+                processes.append(host.popen(cmd, cwd=REPO_ROOT, stdout=log, stderr=subprocess.STDOUT))
+                continue
+            process = host.popen(cmd + ['--report-interval', str(reporter.interval)], cwd=REPO_ROOT,
+                                 stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            _, switch_intf = host.connectionsTo(switch)[0]
+            reporter.follow(switch.ports[switch_intf], process.stdout, log)
+            processes.append(process)
+        if reporter is not None:
+            reporter.start()
+        # Receivers join the group and the controller learns the membership
+        time.sleep(settle)
+
+        tx_before = tx_packets(net)
+        with open(os.path.join(workdir, f'{publisher.name}.log'), 'w') as log:
+            feed = publisher.popen(
+                _module_cmd('publish', '--out', send_path, '--host', publisher.name, '--scenario', scenario),
+                cwd=REPO_ROOT, stdout=log, stderr=subprocess.STDOUT)
+        feed.wait()
+        time.sleep(drain)
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        switch_tx = tx_packets(net) - tx_before
+        if reporter is not None:
+            reporter.stop()
+            print(f"  Posted live latencies to {report_url} {reporter.posted} times ({reporter.errors} failed)")
+    finally:
+        for log in logs:
+            log.close()
+        if net is not None:
+            net.stop()
+        controller.terminate()
+        controller.wait()
+
+    run = merge_logs(send_path, arrival_paths)
+    run['transmissions'] = len(run['seq']) + switch_tx
+    run['workdir'] = workdir
+    return run
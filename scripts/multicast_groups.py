@@ -0,0 +1,353 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Port discovery, IGMP membership tracking and OpenFlow group-table programming
+shared by the controllers
+"""
+
+from ryu.lib.packet import igmp
+
+# Priority of proactive multicast flows (above learned unicast flows at priority 1)
+MULTICAST_FLOW_PRIORITY = 10
+# Proactive flows match UDP only: IGMPv1/v2 reports are addressed to the group itself
+# and must keep reaching the controller through the table-miss flow
+_UDP_PROTO = 17
+
+# IGMPv3 record types that mean "receive from any source" (join) or "receive from none" (leave)
+_V3_JOIN_TYPES = (igmp.MODE_IS_EXCLUDE, igmp.CHANGE_TO_EXCLUDE_MODE)
+_V3_LEAVE_TYPES = (igmp.MODE_IS_INCLUDE, igmp.CHANGE_TO_INCLUDE_MODE)
+
+
+class MulticastGroupTable:
+    """
+    Track live ports and multicast group membership per datapath and mirror it into the switch
+    - Live ports come from the port description reply requested on connect and from
+      port-status events; a port going down leaves all of its groups
+    - Membership is learned from IGMP v1/v2/v3 reports and v2 leaves
+    - Fan-out goes only to a group's members; groups nobody has joined go to every
+      live port while flood_unknown is set (as a snooping switch floods unknown groups)
+    - Router ports (links to other switches, configured per switch like static mrouter
+      ports) receive every group with members on this or any other switch, so traffic
+      crosses multi-switch fabrics; members on switches another controller shard owns
+      are learned from that shard (set_remote_members). Ports blocked by spanning tree
+      count as down, which keeps fan-out loop-free
+    - In proactive mode every group with members gets an OFPGT_ALL group entry and a
+      flow matching UDP to its IPv4 destination, so the switch replicates packets
+      itself and the controller only sees membership changes
+    """
+
+    def __init__(self, logger):
+        """
+        Args:
+            logger: Logger of the owning RyuApp
+        """
+        self.logger = logger
+        # dpid -> datapath, for reprogramming when the mode changes
+        self.datapaths = {}
+        # dpid -> set of live (physical, link-up) ports
+        self.ports = {}
+        # dpid -> {group_ip: set(ports)}
+        self.members = {}
+        # dpid -> {group_ip: set(ports)} on switches other controller shards program
+        self.remote_members = {}
+        # dpid -> set of ports leading to other switches
+        self.router_ports = {}
+        # Send groups without IGMP members to every live port instead of dropping them
+        self.flood_unknown = True
+        # (dpid, group_ip) -> OpenFlow group id, for groups installed on the switch
+        self.group_ids = {}
+        self._next_group_id = {}
+        self.proactive = False
+
+    def register_datapath(self, datapath):
+        """
+        Remember a connected switch, ask for its ports and install its existing
+        groups if proactive
+        """
+        self.datapaths[datapath.id] = datapath
+        self.ports.setdefault(datapath.id, set())
+        self.members.setdefault(datapath.id, {})
+        datapath.send_msg(datapath.ofproto_parser.OFPPortDescStatsRequest(datapath, 0))
+        if self.proactive:
+            for group_ip in self.forwarded_groups(datapath.id):
+                self._install_group(datapath, group_ip)
+
+    def get_members(self, dpid, group_ip):
+        """Return the set of ports subscribed to a group on a switch"""
+        return self.members.get(dpid, {}).get(group_ip, set())
+
+    def get_ports(self, dpid):
+        """Return the set of live ports of a switch"""
+        return self.ports.get(dpid, set())
+
+    def members_elsewhere(self, dpid, group_ip):
+        """True if the group has members on any switch other than `dpid`, local or a peer shard's"""
+        return any(groups.get(group_ip) for tables in (self.members, self.remote_members)
+                   for other, groups in tables.items() if other != dpid)
+
+    def forward_ports(self, dpid, group_ip):
+        """
+        Return the group's members plus the live router ports, the router ports alone if
+        its members are all behind other switches, or an empty set if it has none anywhere
+        """
+        members = self.get_members(dpid, group_ip)
+        if not members and not self.members_elsewhere(dpid, group_ip):
+            return set()
+        return members | (self.router_ports.get(dpid, set()) & self.get_ports(dpid))
+
+    def forwarded_groups(self, dpid):
+        """Groups with members on the switch or behind its router ports"""
+        groups = set(self.members.get(dpid, {}))
+        for tables in (self.members, self.remote_members):
+            for other, other_groups in tables.items():
+                if other != dpid:
+                    groups.update(group_ip for group_ip, ports in other_groups.items() if ports)
+        return sorted(groups)
+
+    def set_remote_members(self, dpid, group_ip, ports):
+        """
+        Record a group's members on a switch another controller shard owns
+
+        Returns:
+            Dpids of this shard's switches whose fan-out for the group may have changed
+        """
+        groups = self.remote_members.setdefault(dpid, {})
+        had_members = bool(groups.get(group_ip))
+        if ports:
+            groups[group_ip] = set(ports)
+        else:
+            groups.pop(group_ip, None)
+        if had_members == bool(ports):
+            return []
+        return self._refresh_elsewhere(group_ip)
+
+    def _refresh_elsewhere(self, group_ip, exclude=None):
+        """Reprogram the group on switches that forward it only because of members elsewhere"""
+        affected = [dpid for dpid in self.datapaths
+                    if dpid != exclude and not self.get_members(dpid, group_ip)]
+        if self.proactive:
+            for dpid in affected:
+                self._program_group(self.datapaths[dpid], group_ip)
+        return affected
+
+    def _program_group(self, datapath, group_ip):
+        """Install the group entry if the group is forwarded on the switch, remove it otherwise"""
+        if self.forward_ports(datapath.id, group_ip):
+            self._install_group(datapath, group_ip)
+        else:
+            self._remove_group(datapath, group_ip)
+
+    def set_router_ports(self, dpid, ports):
+        """
+        Set the ports of a switch that lead to other switches
+
+        Returns:
+            List of group addresses forwarded on the switch (their port sets changed)
+        """
+        self.router_ports[dpid] = set(ports)
+        self.logger.info(f"Switch {dpid}: router ports {sorted(ports)}")
+        groups = self.forwarded_groups(dpid)
+        datapath = self.datapaths.get(dpid)
+        if self.proactive and datapath is not None:
+            for group_ip in groups:
+                self._program_group(datapath, group_ip)
+        return groups
+
+    def fanout_ports(self, dpid, group_ip, in_port):
+        """
+        Ports a multicast packet for `group_ip` arriving on `in_port` should be copied to
+
+        Returns:
+            Sorted list of the group's members and live router ports, or of all live
+            ports if the group has no members and flood_unknown is set; the ingress
+            port is never included
+        """
+        ports = self.forward_ports(dpid, group_ip)
+        if not ports and self.flood_unknown:
+            ports = self.get_ports(dpid)
+        return sorted(port for port in ports if port != in_port)
+
+    def handle_port_desc(self, datapath, ports):
+        """
+        Update live ports from a port description reply
+
+        Args:
+            datapath: Switch the reply came from
+            ports: OFPPort entries of the reply body
+
+        Returns:
+            List of group addresses whose membership changed
+        """
+        changed = []
+        for port in ports:
+            changed.extend(self._set_port(datapath, port))
+        return changed
+
+    def handle_port_status(self, datapath, msg):
+        """
+        Update live ports from an OFPPortStatus message (port added, deleted or modified)
+
+        Returns:
+            List of group addresses whose membership changed
+        """
+        deleted = msg.reason == datapath.ofproto.OFPPR_DELETE
+        return self._set_port(datapath, msg.desc, deleted)
+
+    def _set_port(self, datapath, desc, deleted=False):
+        """Mark one port live or gone; a port that goes away leaves all of its groups"""
+        ofproto = datapath.ofproto
+        if desc.port_no > ofproto.OFPP_MAX:
+            # Reserved ports (LOCAL, CONTROLLER, ...) never receive group copies
+            return []
+        live = not deleted and not (desc.state & (ofproto.OFPPS_LINK_DOWN | ofproto.OFPPS_BLOCKED)) and \
+            not (desc.config & ofproto.OFPPC_PORT_DOWN)
+        ports = self.ports.setdefault(datapath.id, set())
+        if live == (desc.port_no in ports):
+            return []
+        if desc.port_no in self.router_ports.get(datapath.id, ()):
+            # A router port coming or going changes the fan-out of every group
+            if live:
+                ports.add(desc.port_no)
+            else:
+                ports.discard(desc.port_no)
+            self.logger.info(f"Switch {datapath.id}: router port {desc.port_no} {'up' if live else 'down'}")
+            return self.set_router_ports(datapath.id, self.router_ports[datapath.id])
+        if live:
+            ports.add(desc.port_no)
+            self.logger.info(f"Switch {datapath.id}: port {desc.port_no} up, live ports {sorted(ports)}")
+            return []
+        ports.discard(desc.port_no)
+        self.logger.info(f"Switch {datapath.id}: port {desc.port_no} down, live ports {sorted(ports)}")
+        return [group_ip for group_ip in list(self.members.get(datapath.id, {}))
+                if self._update(datapath, desc.port_no, group_ip, False)]
+
+    def handle_igmp(self, datapath, in_port, pkt):
+        """
+        Update membership from an IGMP packet received on `in_port`
+
+        Args:
+            datapath: Switch the packet came from
+            in_port: Ingress port (the member's port)
+            pkt: Parsed ryu Packet containing the IGMP message
+
+        Returns:
+            List of group addresses whose membership changed
+        """
+        changed = []
+        report = pkt.get_protocol(igmp.igmpv3_report)
+        if report is not None:
+            for record in report.records or []:
+                if record.type_ in _V3_JOIN_TYPES and not record.srcs:
+                    joined = True
+                elif record.type_ in _V3_LEAVE_TYPES and not record.srcs:
+                    joined = False
+                else:
+                    # Source-specific filters are treated as joins
+                    joined = record.type_ != igmp.BLOCK_OLD_SOURCES
+                if self._update(datapath, in_port, record.address, joined):
+                    changed.append(record.address)
+            return changed
+
+        msg = pkt.get_protocol(igmp.igmp)
+        if msg is None:
+            return changed
+        if msg.msgtype in (igmp.IGMP_TYPE_REPORT_V1, igmp.IGMP_TYPE_REPORT_V2):
+            if self._update(datapath, in_port, msg.address, True):
+                changed.append(msg.address)
+        elif msg.msgtype == igmp.IGMP_TYPE_LEAVE:
+            if self._update(datapath, in_port, msg.address, False):
+                changed.append(msg.address)
+        return changed
+
+    def _update(self, datapath, port, group_ip, joined):
+        """Apply one join/leave; reprogram the switch if membership changed"""
+        groups = self.members.setdefault(datapath.id, {})
+        ports = groups.setdefault(group_ip, set())
+        if joined == (port in ports):
+            return False
+        if joined:
+            ports.add(port)
+        else:
+            ports.discard(port)
+        self.logger.info(f"Multicast group {group_ip} on switch {datapath.id}: "
+                         f"port {port} {'joined' if joined else 'left'}, members {sorted(ports)}")
+        if not ports:
+            del groups[group_ip]
+        if self.proactive:
+            self._program_group(datapath, group_ip)
+        if len(ports) == (1 if joined else 0):
+            # First member joined or last one left: other switches' router-port fan-out follows
+            self._refresh_elsewhere(group_ip, exclude=datapath.id)
+        return True
+
+    def set_proactive(self, enabled):
+        """Switch proactive mode on or off, installing or removing all group entries"""
+        if enabled == self.proactive:
+            return
+        self.proactive = enabled
+        for dpid, datapath in self.datapaths.items():
+            for group_ip in self.forwarded_groups(dpid):
+                if enabled:
+                    self._program_group(datapath, group_ip)
+                else:
+                    self._remove_group(datapath, group_ip)
+
+    def _install_group(self, datapath, group_ip):
+        """Add or modify the OFPGT_ALL group for `group_ip` and point a flow at it"""
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        key = (datapath.id, group_ip)
+        buckets = [parser.OFPBucket(actions=[parser.OFPActionOutput(port)])
+                   for port in sorted(self.forward_ports(datapath.id, group_ip))]
+        if key in self.group_ids:
+            command = ofproto.OFPGC_MODIFY
+            group_id = self.group_ids[key]
+        else:
+            command = ofproto.OFPGC_ADD
+            group_id = self._next_group_id.get(datapath.id, 1)
+            self._next_group_id[datapath.id] = group_id + 1
+            self.group_ids[key] = group_id
+        datapath.send_msg(parser.OFPGroupMod(datapath, command, ofproto.OFPGT_ALL,
+                                             group_id, buckets))
+        if command == ofproto.OFPGC_ADD:
+            match = parser.OFPMatch(eth_type=0x0800, ip_proto=_UDP_PROTO, ipv4_dst=group_ip)
+            actions = [parser.OFPActionGroup(group_id)]
+            inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
+            datapath.send_msg(parser.OFPFlowMod(datapath=datapath,
+                                                priority=MULTICAST_FLOW_PRIORITY,
+                                                match=match, instructions=inst))
+
+    def _remove_group(self, datapath, group_ip):
+        """Delete the flow and group entry for `group_ip`, if installed"""
+        key = (datapath.id, group_ip)
+        if key not in self.group_ids:
+            return
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        group_id = self.group_ids.pop(key)
+        match = parser.OFPMatch(eth_type=0x0800, ip_proto=_UDP_PROTO, ipv4_dst=group_ip)
+        datapath.send_msg(parser.OFPFlowMod(datapath=datapath, command=ofproto.OFPFC_DELETE,
+                                            out_port=ofproto.OFPP_ANY, out_group=ofproto.OFPG_ANY,
+                                            priority=MULTICAST_FLOW_PRIORITY, match=match))
+        datapath.send_msg(parser.OFPGroupMod(datapath, ofproto.OFPGC_DELETE, ofproto.OFPGT_ALL,
+                                             group_id, []))
+
+    def packet_out_via_group(self, msg, datapath, in_port, group_ip):
+        """
+        Forward a packet that reached the controller through its installed group
+
+        Returns:
+            True if the group exists and the packet was sent, False otherwise
+        """
+        group_id = self.group_ids.get((datapath.id, group_ip))
+        if group_id is None:
+            return False
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        data = None
+        if msg.buffer_id == ofproto.OFP_NO_BUFFER:
+            data = msg.data
+        out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id, in_port=in_port,
+                                  actions=[parser.OFPActionGroup(group_id)], data=data)
+        datapath.send_msg(out)
+        return True
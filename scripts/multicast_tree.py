@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Latency-aware, bounded fan-out multicast tree for Jasper-style fair delivery
+"""
+
+import bisect
+
+
+class FairMulticastTree:
+    """
+    Overlay tree over multicast receivers that equalizes delivery time
+    - Receivers sit in a complete tree of the given fan-out, stored in
+      breadth-first order: position i has parent i // fanout - 1 (-1 is the root)
+    - A copy cannot leave before depth * hop_delay (each tree level costs one
+      replication hop), so the slowest receivers take the shallowest positions;
+      this minimizes the common delivery time T = max(depth * hop_delay + latency)
+    - Each receiver's copy is released at T - latency, so all copies land together;
+      with an explicit deadline D it is released at max(earliest, D - latency)
+    - Joins, leaves and latency updates move a single entry in the sorted order;
+      the release schedule is recomputed lazily in O(receivers)
+    """
+
+    def __init__(self, fanout=4, hop_delay=0.0001, smoothing=0.2):
+        """
+        Args:
+            fanout: Maximum children per tree node
+            hop_delay: Replication cost of one tree level (seconds)
+            smoothing: EWMA weight of a new latency sample (1.0 keeps only the latest)
+        """
+        self.fanout = max(1, fanout)
+        self.hop_delay = hop_delay
+        self.smoothing = smoothing
+        # receiver -> smoothed one-way latency (seconds)
+        self.latencies = {}
+        # (-latency, receiver), i.e. slowest first == breadth-first tree position
+        self._order = []
+        self._schedule = None
+        self._deadline_schedule = (None, None)
+        self._delivery_time = 0.0
+        self.updates = 0
+
+    def build(self, latencies):
+        """
+        Rebuild the tree from scratch
+
+        Args:
+            latencies: Dict of receiver -> one-way latency (seconds)
+        """
+        self.latencies = dict(latencies)
+        self._order = sorted((-latency, receiver) for receiver, latency in self.latencies.items())
+        self._changed()
+
+    def add_receiver(self, receiver, latency=None):
+        """
+        Add a receiver (join)
+
+        Args:
+            receiver: Receiver identifier (e.g. switch port)
+            latency: Measured latency in seconds; defaults to the current mean
+
+        Returns:
+            True if the receiver was added, False if it was already present
+        """
+        if receiver in self.latencies:
+            return False
+        if latency is None:
+            latency = sum(self.latencies.values()) / len(self.latencies) if self.latencies else 0.0
+        self.latencies[receiver] = latency
+        bisect.insort(self._order, (-latency, receiver))
+        self._changed()
+        return True
+
+    def remove_receiver(self, receiver):
+        """
+        Remove a receiver (leave)
+
+        Returns:
+            True if the receiver was removed, False if it was not present
+        """
+        latency = self.latencies.pop(receiver, None)
+        if latency is None:
+            return False
+        del self._order[bisect.bisect_left(self._order, (-latency, receiver))]
+        self._changed()
+        return True
+
+    def update_latency(self, receiver, sample):
+        """
+        Fold a latency measurement into a receiver's estimate, adding it if unknown
+
+        Args:
+            receiver: Receiver identifier
+            sample: Measured one-way latency (seconds)
+        """
+        if receiver not in self.latencies:
+            self.add_receiver(receiver, sample)
+            return
+        old = self.latencies[receiver]
+        new = old + self.smoothing * (sample - old)
+        if new == old:
+            return
+        del self._order[bisect.bisect_left(self._order, (-old, receiver))]
+        self.latencies[receiver] = new
+        bisect.insort(self._order, (-new, receiver))
+        self._changed()
+
+    def _changed(self):
+        self._schedule = None
+        self.updates += 1
+
+    def receivers(self):
+        """Receivers in breadth-first tree order (slowest first)"""
+        return [receiver for _, receiver in self._order]
+
+    def _depths(self):
+        """Depth (1 = child of the root) of each breadth-first position"""
+        depths = []
+        level_size = self.fanout
+        depth = 1
+        while len(depths) < len(self._order):
+            depths.extend([depth] * min(level_size, len(self._order) - len(depths)))
+            level_size *= self.fanout
+            depth += 1
+        return depths
+
+    def earliest_releases(self):
+        """
+        Return each receiver's earliest release offset (depth * hop_delay)
+
+        Returns:
+            Dict of receiver -> earliest release offset (seconds)
+        """
+        return {receiver: depth * self.hop_delay
+                for depth, (_, receiver) in zip(self._depths(), self._order)}
+
+    def schedule(self, deadline=None):
+        """
+        Return the release schedule
+
+        Args:
+            deadline: Target delivery time (seconds after release starts); copies are
+                released at max(earliest release, deadline - latency). None uses the
+                tree's own delivery time T, the smallest deadline no receiver misses.
+
+        Returns:
+            List of (receiver, release offset in seconds) in tree order
+        """
+        if self._schedule is None:
+            depths = self._depths()
+            self._delivery_time = max((depth * self.hop_delay - neg_latency
+                                       for depth, (neg_latency, _) in zip(depths, self._order)), default=0.0)
+            self._schedule = [(receiver, self._delivery_time + neg_latency)
+                              for neg_latency, receiver in self._order]
+            self._deadline_schedule = (None, self._schedule)
+        if deadline is None or deadline == self._delivery_time:
+            return self._schedule
+        if self._deadline_schedule[0] != deadline:
+            self._deadline_schedule = (deadline, [
+                (receiver, max(depth * self.hop_delay, deadline + neg_latency))
+                for depth, (neg_latency, receiver) in zip(self._depths(), self._order)])
+        return self._deadline_schedule[1]
+
+    def delivery_time(self):
+        """Common delivery time T (seconds after release starts)"""
+        self.schedule()
+        return self._delivery_time
+
+    def describe(self):
+        """
+        Return the tree for inspection
+
+        Returns:
+            Dict with fan-out, hop delay (ms), delivery time (ms) and, per receiver in
+            tree order, its parent, depth, latency (ms) and release offset (ms)
+        """
+        schedule = self.schedule()
+        depths = self._depths()
+        nodes = []
+        for index, (receiver, offset) in enumerate(schedule):
+            parent = index // self.fanout - 1
+            nodes.append({
+                'receiver': receiver,
+                'parent': schedule[parent][0] if parent >= 0 else None,
+                'depth': depths[index],
+                'latency_ms': self.latencies[receiver] * 1000,
+                'release_offset_ms': offset * 1000
+            })
+        return {
+            'fanout': self.fanout,
+            'hop_delay_ms': self.hop_delay * 1000,
+            'delivery_time_ms': self._delivery_time * 1000,
+            'nodes': nodes
+        }
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Rate pacing engine for the traffic generator
+"""
+
+import time
+
+
+def wait_until(deadline, spin_threshold=0.0002):
+    """
+    Block until a perf_counter deadline, sleeping for the coarse part and
+    spinning for the last `spin_threshold` seconds
+
+    Returns:
+        Lateness in seconds (0.0 or slightly above if on time)
+    """
+    remaining = deadline - time.perf_counter()
+    if remaining > spin_threshold:
+        time.sleep(remaining - spin_threshold)
+    while time.perf_counter() < deadline:
+        pass
+    return time.perf_counter() - deadline
+
+
+class RatePacer:
+    """
+    Deadline-based pacer for sending messages at a target rate
+    - Schedules every tick against an absolute deadline, so time spent
+      generating and sending does not accumulate as drift
+    - Sleeps for the coarse part of each interval and spins for the last
+      `spin_threshold` seconds to hit sub-millisecond deadlines
+    - Optionally releases `batch_size` messages per tick
+    - Records achieved rate and inter-send jitter
+    """
+
+    def __init__(self, rate, batch_size=1, spin_threshold=0.0002):
+        """
+        Initialize the pacer
+
+        Args:
+            rate: Target messages per second
+            batch_size: Messages released per tick
+            spin_threshold: Seconds before a deadline to switch from sleep to busy-wait
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1")
+        self.rate = rate
+        self.batch_size = batch_size
+        self.spin_threshold = spin_threshold
+        # Interval between ticks, each tick carrying batch_size messages
+        self.interval = batch_size / float(rate)
+        self.start_time = None
+        self.next_deadline = None
+        self.last_send = None
+        self.last_burst = 0
+        self.ticks = 0
+        self.messages = 0
+        self.late_ticks = 0
+        # Running inter-send gap statistics (Welford)
+        self._gap_count = 0
+        self._gap_mean = 0.0
+        self._gap_m2 = 0.0
+        self._gap_max = 0.0
+
+    def start(self):
+        """Start the schedule; the first tick is due immediately"""
+        self.start_time = time.perf_counter()
+        self.next_deadline = self.start_time
+        self.last_send = None
+
+    def wait(self):
+        """
+        Block until the next tick's deadline
+
+        Returns:
+            Lateness of the tick in seconds (0.0 if on time)
+        """
+        if self.start_time is None:
+            self.start()
+        lateness = wait_until(self.next_deadline, self.spin_threshold)
+        if lateness > self.interval:
+            self.late_ticks += 1
+        # Next deadline is anchored to the schedule, not to the current time
+        self.ticks += 1
+        self.next_deadline = self.start_time + self.ticks * self.interval
+        return lateness
+
+    def record_send(self, messages=1):
+        """Record that a tick's messages were sent"""
+        now = time.perf_counter()
+        if self.last_send is not None:
+            gap = now - self.last_send
+            self._gap_count += 1
+            delta = gap - self._gap_mean
+            self._gap_mean += delta / self._gap_count
+            self._gap_m2 += delta * (gap - self._gap_mean)
+            if abs(gap - self.interval) > self._gap_max:
+                self._gap_max = abs(gap - self.interval)
+        self.last_send = now
+        self.last_burst = messages
+        self.messages += messages
+
+    def stats(self):
+        """
+        Return achieved rate and jitter for the ticks sent so far
+
+        Returns:
+            Dict with target/achieved rate (msgs/s), mean gap and jitter (ms),
+            and the number of ticks that missed their deadline by a full interval
+        """
+        elapsed = 0.0
+        if self.start_time is not None and self.last_send is not None:
+            elapsed = self.last_send - self.start_time
+        achieved_rate = 0.0
+        if elapsed > 0 and self.messages > self.last_burst:
+            # The last tick's messages start the final interval, they do not end it;
+            # that tick may carry fewer than batch_size messages
+            achieved_rate = (self.messages - self.last_burst) / elapsed
+        jitter = (self._gap_m2 / self._gap_count) ** 0.5 if self._gap_count > 1 else 0.0
+        return {
+            'target_rate': self.rate,
+            'achieved_rate': achieved_rate,
+            'messages': self.messages,
+            'ticks': self.ticks,
+            'batch_size': self.batch_size,
+            'mean_gap_ms': self._gap_mean * 1000,
+            'jitter_ms': jitter * 1000,
+            'max_deviation_ms': self._gap_max * 1000,
+            'late_ticks': self.late_ticks
+        }
+
+
+class SchedulePacer:
+    """
+    Pacer that replays a precomputed schedule of send times
+    - Each send is due at start + timestamps[i], so bursts and gaps are reproduced exactly
+    - Records how late each send was relative to its scheduled time
+    """
+
+    def __init__(self, timestamps, spin_threshold=0.0002):
+        """
+        Initialize the pacer
+
+        Args:
+            timestamps: Sorted send times in seconds from the start of the run
+            spin_threshold: Seconds before a deadline to switch from sleep to busy-wait
+        """
+        self.timestamps = [float(t) for t in timestamps]
+        self.spin_threshold = spin_threshold
+        self.start_time = None
+        self.sent = 0
+        self._lateness_sum = 0.0
+        self._lateness_max = 0.0
+
+    def start(self):
+        """Start the schedule"""
+        self.start_time = time.perf_counter()
+        self.sent = 0
+
+    def wait(self, index):
+        """
+        Block until send `index` is due
+
+        Returns:
+            Lateness of the send in seconds
+        """
+        if self.start_time is None:
+            self.start()
+        deadline = self.start_time + self.timestamps[index]
+        if deadline > time.perf_counter():
+            lateness = wait_until(deadline, self.spin_threshold)
+        else:
+            lateness = time.perf_counter() - deadline
+        self.sent += 1
+        self._lateness_sum += lateness
+        if lateness > self._lateness_max:
+            self._lateness_max = lateness
+        return lateness
+
+    def stats(self):
+        """
+        Return schedule-following accuracy for the sends so far
+
+        Returns:
+            Dict with scheduled and achieved mean rate (msgs/s) and send lateness (ms)
+        """
+        elapsed = time.perf_counter() - self.start_time if self.start_time is not None else 0.0
+        span = self.timestamps[self.sent - 1] if self.sent else 0.0
+        return {
+            'messages': self.sent,
+            'scheduled_rate': self.sent / span if span > 0 else 0.0,
+            'achieved_rate': self.sent / elapsed if elapsed > 0 else 0.0,
+            'mean_lateness_ms': (self._lateness_sum / self.sent) * 1000 if self.sent else 0.0,
+            'max_lateness_ms': self._lateness_max * 1000
+        }
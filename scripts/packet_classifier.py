@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Fast-path PacketIn classification from raw Ethernet/IPv4 header bytes
+"""
+
+import socket
+
+PKT_OTHER = 0
+PKT_LLDP = 1
+PKT_IGMP = 2
+PKT_MULTICAST = 3
+PKT_UNICAST = 4
+
+_ETH_TYPE_IPV4 = 0x0800
+_ETH_TYPE_LLDP = 0x88cc
+_ETH_TYPE_VLAN = 0x8100
+_IPPROTO_IGMP = 2
+
+
+def classify(data):
+    """
+    Classify a PacketIn payload without building a ryu Packet
+
+    Only the Ethernet header (plus one optional VLAN tag) and the IPv4 protocol
+    and destination fields are read. Callers fall back to the full ryu parser
+    only for IGMP, whose contents they need.
+
+    Args:
+        data: Raw frame bytes (msg.data)
+
+    Returns:
+        Tuple of (kind, dst_mac, src_mac, ipv4_dst), where kind is one of the
+        PKT_* constants, MACs are 'aa:bb:cc:dd:ee:ff' strings and ipv4_dst is a
+        dotted-quad string or None for non-IPv4 frames
+    """
+    if len(data) < 14:
+        return PKT_OTHER, None, None, None
+    ethertype = (data[12] << 8) | data[13]
+    l3 = 14
+    if ethertype == _ETH_TYPE_VLAN and len(data) >= 18:
+        ethertype = (data[16] << 8) | data[17]
+        l3 = 18
+    if ethertype == _ETH_TYPE_LLDP:
+        return PKT_LLDP, None, None, None
+
+    dst = data[0:6].hex(':')
+    src = data[6:12].hex(':')
+    ipv4_dst = None
+    proto = None
+    if ethertype == _ETH_TYPE_IPV4 and len(data) >= l3 + 20:
+        proto = data[l3 + 9]
+        ipv4_dst = socket.inet_ntoa(data[l3 + 16:l3 + 20])
+
+    if proto == _IPPROTO_IGMP:
+        return PKT_IGMP, dst, src, ipv4_dst
+    # IPv4 multicast MAC prefix 01:00:5e
+    if data[0] == 0x01 and data[1] == 0x00 and data[2] == 0x5e:
+        return PKT_MULTICAST, dst, src, ipv4_dst
+    return PKT_UNICAST, dst, src, ipv4_dst
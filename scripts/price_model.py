@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Vectorized synthetic price-path engine for traffic generation
+"""
+
+import numpy as np
+
+# Default starting prices (USD) for the generator's stock symbols
+DEFAULT_START_PRICES = {
+    'AAPL': 190.0, 'MSFT': 420.0, 'AMZN': 180.0, 'GOOG': 170.0,
+    'META': 500.0, 'TSLA': 180.0, 'NVDA': 900.0
+}
+
+
+class PricePathModel:
+    """
+    Jump-diffusion price model for a basket of correlated symbols
+    - Log prices follow geometric Brownian motion with Merton-style jumps
+    - Symbol returns are correlated through a Cholesky factor of a constant correlation matrix
+    - An AR(1) activity factor per symbol clusters volume, volatility and tick arrivals
+    - Ticks are generated in large NumPy blocks, so RNG cost is amortized over many messages
+    """
+
+    def __init__(self, symbols, start_prices=None, volatility=0.3, drift=0.0,
+                 correlation=0.4, tick_interval=0.001, jump_rate=0.01,
+                 jump_mean=0.0, jump_std=0.005, activity_persistence=0.995,
+                 activity_std=0.05, base_volume=100, seed=None):
+        """
+        Initialize the model
+
+        Args:
+            symbols: List of stock symbols
+            start_prices: Dict of symbol -> starting price (defaults to DEFAULT_START_PRICES, else 100)
+            volatility: Annualized volatility, shared by all symbols
+            drift: Annualized drift
+            correlation: Pairwise correlation between symbol returns
+            tick_interval: Simulated seconds between ticks
+            jump_rate: Expected jumps per simulated second, per symbol
+            jump_mean: Mean log jump size
+            jump_std: Standard deviation of log jump size
+            activity_persistence: AR(1) coefficient of the activity factor (closer to 1 = longer clusters)
+            activity_std: Innovation standard deviation of the activity factor
+            base_volume: Median traded volume per tick
+            seed: Seed for reproducible paths
+        """
+        self.symbols = list(symbols)
+        n = len(self.symbols)
+        start_prices = start_prices or DEFAULT_START_PRICES
+        self.rng = np.random.default_rng(seed)
+        self.log_prices = np.log([start_prices.get(s, 100.0) for s in self.symbols])
+        self.activity = np.zeros(n)
+        self.tick_interval = tick_interval
+        self.jump_rate = jump_rate
+        self.jump_mean = jump_mean
+        self.jump_std = jump_std
+        self.activity_persistence = activity_persistence
+        self.activity_std = activity_std
+        self.base_volume = base_volume
+
+        # Per-tick diffusion parameters (volatility and drift are annualized)
+        seconds_per_year = 252 * 6.5 * 3600
+        dt = tick_interval / seconds_per_year
+        self.step_std = volatility * np.sqrt(dt)
+        self.step_drift = (drift - 0.5 * volatility ** 2) * dt
+
+        corr = np.full((n, n), correlation)
+        np.fill_diagonal(corr, 1.0)
+        self.chol = np.linalg.cholesky(corr)
+
+        # Lower-triangular AR(1) propagator for one chunk: P[t, k] = phi^(t - k)
+        self._chunk = 256
+        lags = np.arange(self._chunk)[:, None] - np.arange(self._chunk)[None, :]
+        self._ar_matrix = np.where(lags >= 0, activity_persistence ** np.maximum(lags, 0), 0.0)
+        self._ar_decay = activity_persistence ** np.arange(1, self._chunk + 1)
+
+    def _activity_paths(self, steps):
+        """Simulate the AR(1) activity factor for `steps` ticks, chunk by chunk"""
+        n = len(self.symbols)
+        shocks = self.rng.standard_normal((steps, n)) * self.activity_std
+        out = np.empty((steps, n))
+        h = self.activity
+        for start in range(0, steps, self._chunk):
+            end = min(start + self._chunk, steps)
+            length = end - start
+            out[start:end] = (self._ar_matrix[:length, :length] @ shocks[start:end]
+                              + self._ar_decay[:length, None] * h)
+            h = out[end - 1]
+        self.activity = h
+        return out
+
+    def generate_block(self, steps):
+        """
+        Generate a block of ticks, one message per step
+
+        Every step advances all symbol paths; the symbol that ticks is drawn
+        in proportion to each symbol's current activity.
+
+        Args:
+            steps: Number of ticks to generate
+
+        Returns:
+            Dict with 'symbol' (int index into symbols), 'price' and 'volume' arrays
+        """
+        n = len(self.symbols)
+        activity = self._activity_paths(steps)
+        intensity = np.exp(activity)
+
+        # Correlated diffusion, scaled by the activity factor (volatility clustering)
+        z = self.rng.standard_normal((steps, n)) @ self.chol.T
+        returns = self.step_drift + self.step_std * np.sqrt(intensity) * z
+
+        # Compound Poisson jumps
+        jump_counts = self.rng.poisson(self.jump_rate * self.tick_interval, size=(steps, n))
+        jumped = jump_counts > 0
+        if jumped.any():
+            sizes = self.rng.normal(self.jump_mean, self.jump_std, size=jumped.sum())
+            returns[jumped] += sizes * np.sqrt(jump_counts[jumped])
+
+        log_paths = self.log_prices + np.cumsum(returns, axis=0)
+        self.log_prices = log_paths[-1]
+
+        # Pick the ticking symbol per step, weighted by activity
+        cumulative = np.cumsum(intensity, axis=1)
+        u = self.rng.random(steps) * cumulative[:, -1]
+        symbol_idx = np.minimum((cumulative < u[:, None]).sum(axis=1), n - 1)
+
+        rows = np.arange(steps)
+        prices = np.exp(log_paths[rows, symbol_idx])
+        volumes = np.maximum(1, np.rint(
+            self.base_volume * intensity[rows, symbol_idx]
+            * self.rng.lognormal(0.0, 0.5, size=steps))).astype(np.int64)
+        return {'symbol': symbol_idx, 'price': prices, 'volume': volumes}
+
+
+class TickStream:
+    """
+    Stream individual ticks from pre-generated PricePathModel blocks
+    - Refills its buffers one block at a time
+    - Converts block arrays to Python lists once per block, not per tick
+    """
+
+    def __init__(self, model, block_size=65536):
+        """
+        Initialize the stream
+
+        Args:
+            model: PricePathModel to draw blocks from
+            block_size: Ticks generated per refill
+        """
+        self.model = model
+        self.block_size = block_size
+        # Generate the first block up front so it is not paid for inside a paced send loop
+        self._refill()
+
+    def _refill(self):
+        block = self.model.generate_block(self.block_size)
+        symbols = self.model.symbols
+        self._ticks = list(zip([symbols[i] for i in block['symbol'].tolist()],
+                               block['price'].tolist(),
+                               block['volume'].tolist()))
+        self._pos = 0
+
+    def next_tick(self):
+        """
+        Return the next tick
+
+        Returns:
+            Tuple of (symbol, price, volume)
+        """
+        if self._pos >= len(self._ticks):
+            self._refill()
+        tick = self._ticks[self._pos]
+        self._pos += 1
+        return tick
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Non-blocking deadline scheduler for releasing held packets from a controller
+"""
+
+import heapq
+import itertools
+import time
+
+from ryu.lib import hub
+
+
+class ReleaseScheduler:
+    """
+    Heap-based scheduler running on its own Ryu green thread
+    - Callbacks are queued with an absolute deadline and run as soon as it passes
+    - The PacketIn handler never sleeps; it only pushes onto the heap
+    - Scheduling slip (how late each callback ran) is tracked as a metric
+    """
+
+    def __init__(self, logger):
+        """
+        Args:
+            logger: Logger of the owning RyuApp
+        """
+        self.logger = logger
+        self._heap = []
+        self._seq = itertools.count()
+        self._wakeup = hub.Event()
+        self._running = True
+        self.released = 0
+        self._slip_sum = 0.0
+        self._slip_max = 0.0
+        self._thread = hub.spawn(self._run)
+
+    def call_later(self, delay, fn, *args):
+        """
+        Run fn(*args) once `delay` seconds have passed
+
+        Returns:
+            The absolute (time.monotonic) deadline of the call
+        """
+        deadline = time.monotonic() + max(0.0, delay)
+        self.call_at(deadline, fn, *args)
+        return deadline
+
+    def call_at(self, deadline, fn, *args):
+        """Run fn(*args) at a time.monotonic() deadline"""
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (deadline, next(self._seq), fn, args))
+        # Only wake the loop if this call is now the earliest one
+        if earliest is None or deadline < earliest:
+            self._wakeup.set()
+
+    def pending(self):
+        """Number of calls waiting for their deadline"""
+        return len(self._heap)
+
+    def stop(self):
+        """Stop the scheduler thread; pending calls are dropped"""
+        self._running = False
+        self._wakeup.set()
+
+    def _run(self):
+        burst = 0
+        while self._running:
+            if not self._heap:
+                self._wakeup.clear()
+                self._wakeup.wait()
+                continue
+            deadline = self._heap[0][0]
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                burst = 0
+                # Woken early if a call with an earlier deadline arrives
+                self._wakeup.clear()
+                self._wakeup.wait(timeout=delay)
+                continue
+            _, _, fn, args = heapq.heappop(self._heap)
+            slip = time.monotonic() - deadline
+            self.released += 1
+            self._slip_sum += slip
+            if slip > self._slip_max:
+                self._slip_max = slip
+            try:
+                fn(*args)
+            except Exception:
+                self.logger.exception("Release callback failed")
+            # Yield during long runs of due calls so a backlog does not starve PacketIn handling
+            burst += 1
+            if burst % 64 == 0:
+                hub.sleep(0)
+
+    def stats(self):
+        """
+        Return scheduling slip statistics
+
+        Returns:
+            Dict with released and pending counts, mean and max slip (ms)
+        """
+        return {
+            'released': self.released,
+            'pending': len(self._heap),
+            'mean_slip_ms': (self._slip_sum / self.released) * 1000 if self.released else 0.0,
+            'max_slip_ms': self._slip_max * 1000
+        }
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Columnar benchmark results store: an index of run metadata and summary rows plus raw samples per run
+"""
+
+import argparse
+import csv
+import fcntl
+import os
+import time
+import uuid
+
+import numpy as np
+
+# Index columns describing the run
+TEXT_COLUMNS = ('run_id', 'implementation', 'scenario', 'backend', 'arrival')
+SCENARIO_COLUMNS = ('duration', 'message_rate', 'message_size', 'receivers', 'seed')
+# Index columns summarizing the run (latencies in ms)
+METRIC_COLUMNS = ('created', 'messages', 'avg_latency', 'fairness', 'bandwidth_efficiency', 'burst_intensity',
+                  'delivery_clock_fairness', 'delivery_clock_window', 'latency_p50', 'latency_p90',
+                  'latency_p99', 'latency_p999')
+INDEX_COLUMNS = TEXT_COLUMNS + SCENARIO_COLUMNS + METRIC_COLUMNS
+PERCENTILE_COLUMNS = {'latency_p50': 50, 'latency_p90': 90, 'latency_p99': 99, 'latency_p999': 99.9}
+
+
+def _number(value):
+    """Index value of a numeric field; NaN for missing ones"""
+    try:
+        return float(value) if value is not None and value != '' else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class ResultsStore:
+    """
+    Append-only store of benchmark runs
+    - index.npz holds one row per run: scenario parameters and summary metrics,
+      one NumPy array per column, so filtering all runs is a few vector compares
+    - runs/<run_id>.npz holds the run's per-receiver and per-message arrays, and
+      runs/<run_id>-latencies.npy the raw (messages x receivers) float32 latency matrix
+      (ms, NaN = lost), loaded memory-mapped
+    - Appends take a file lock and replace the index atomically, so concurrent
+      benchmark jobs can share one store
+    """
+
+    def __init__(self, root='results/store'):
+        """
+        Args:
+            root: Store directory (created if missing)
+        """
+        self.root = root
+        self.runs_dir = os.path.join(root, 'runs')
+        self.index_path = os.path.join(root, 'index.npz')
+        os.makedirs(self.runs_dir, exist_ok=True)
+
+    def index(self):
+        """
+        Load the index
+
+        Returns:
+            Dict of column name -> array with one entry per run, in append order
+        """
+        if not os.path.exists(self.index_path):
+            return {column: np.array([], dtype=str if column in TEXT_COLUMNS else float)
+                    for column in INDEX_COLUMNS}
+        with np.load(self.index_path) as index:
+            return {column: index[column] for column in INDEX_COLUMNS}
+
+    def query(self, **filters):
+        """
+        Select index rows, e.g. query(implementation='jasper_multicast', message_rate=200)['latency_p99']
+
+        Args:
+            filters: Column name -> required value
+
+        Returns:
+            Dict of column name -> array of the matching runs
+        """
+        index = self.index()
+        mask = np.ones(len(index['run_id']), dtype=bool)
+        for column, value in filters.items():
+            if column not in index:
+                raise KeyError(f"Unknown index column: {column}")
+            mask &= index[column] == value
+        return {column: values[mask] for column, values in index.items()}
+
+    def latencies(self, run_id):
+        """Raw (messages x receivers) latency matrix of a run (ms, memory-mapped), or None if not kept"""
+        path = os.path.join(self.runs_dir, f'{run_id}-latencies.npy')
+        return np.load(path, mmap_mode='r') if os.path.exists(path) else None
+
+    def arrays(self, run_id):
+        """Per-receiver and per-message arrays of a run (e.g. 'receiver_latency', 'jain', 'window')"""
+        with np.load(os.path.join(self.runs_dir, f'{run_id}.npz')) as arrays:
+            return dict(arrays)
+
+    def append(self, implementation, test_scenario, results, backend='', latencies=None, arrays=None):
+        """
+        Add one run
+
+        Args:
+            implementation: Implementation the run tested
+            test_scenario: Scenario dict (name, duration, message_rate, message_size, arrival, ...)
+            results: Summary metrics (avg_latency, fairness, bandwidth_efficiency, ...);
+                latency_p50..latency_p999 are taken from here unless `latencies` is given
+            backend: Backend that produced the run
+            latencies: Optional (messages x receivers) latency matrix in ms; its exact
+                percentiles fill latency_p50..latency_p999
+            arrays: Optional dict of further per-run arrays to keep
+
+        Returns:
+            The new run's id
+        """
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{implementation}-{uuid.uuid4().hex[:8]}"
+        arrays = {key: np.asarray(value) for key, value in (arrays or {}).items() if value is not None}
+        row = {
+            'run_id': run_id,
+            'implementation': implementation,
+            'scenario': str(test_scenario.get('name', '')),
+            'backend': backend,
+            'arrival': str(test_scenario.get('arrival', {}).get('process', 'constant'))
+        }
+        row.update({column: _number(test_scenario.get(column)) for column in SCENARIO_COLUMNS})
+        row.update({column: _number(results.get(column)) for column in METRIC_COLUMNS})
+        row['created'] = time.time()
+        row['messages'] = _number(results.get('messages'))
+        if latencies is not None:
+            latencies = np.asarray(latencies, dtype=np.float32)
+            np.save(os.path.join(self.runs_dir, f'{run_id}-latencies.npy'), latencies)
+            delivered = latencies[~np.isnan(latencies)]
+            row['messages'] = latencies.shape[0]
+            if len(delivered):
+                for column, value in zip(PERCENTILE_COLUMNS, np.percentile(delivered, list(PERCENTILE_COLUMNS.values()))):
+                    row[column] = float(value)
+        np.savez(os.path.join(self.runs_dir, f'{run_id}.npz'), **arrays)
+        self._append_row(row)
+        return run_id
+
+    def _append_row(self, row):
+        """Add a row to the index under the store lock"""
+        with open(os.path.join(self.root, 'index.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            index = self.index()
+            columns = {column: np.append(index[column], row[column]) for column in INDEX_COLUMNS}
+            partial = self.index_path + '.partial.npz'
+            np.savez(partial, **columns)
+            os.replace(partial, self.index_path)
+
+    def import_csv(self, path):
+        """
+        Add a run from a per-run CSV file written by earlier versions of the comparator
+
+        Returns:
+            The new run's id
+        """
+        with open(path, newline='') as f:
+            rows = list(csv.reader(f))
+        parameters = {}
+        hosts = []
+        section = 'parameters'
+        for row in rows:
+            if not row:
+                continue
+            if row[0] == 'Host':
+                section = row[1]
+                continue
+            if section == 'parameters' and len(row) >= 2:
+                parameters[row[0]] = row[1]
+            elif section == 'Latency (ms)':
+                hosts.append(_number(row[1]))
+        implementation = parameters.pop('Implementation', '')
+        results = {
+            'avg_latency': parameters.pop('Average Latency (ms)', None),
+            'fairness': parameters.pop('Fairness Index', None),
+            'bandwidth_efficiency': parameters.pop('Bandwidth Efficiency (%)', None),
+            'burst_intensity': parameters.get('burst_intensity'),
+            'delivery_clock_fairness': parameters.pop('Delivery Clock Fairness', None),
+            'delivery_clock_window': _number(parameters.pop('Delivery Clock Window (ms)', None)) / 1000.0
+        }
+        # The arrival process was written as a dict's repr; only its name is indexed
+        arrival = parameters.pop('arrival', '')
+        process = arrival.split("'process': '")[1].split("'")[0] if "'process': '" in arrival else 'constant'
+        return self.append(implementation, dict(parameters, arrival={'process': process}), results,
+                           backend='csv', arrays={'receiver_latency': hosts})
+
+
+def main():
+    """Main function for standalone usage"""
+    parser = argparse.ArgumentParser(description='Benchmark results store')
+    parser.add_argument('--store', type=str, default='results/store', help='Store directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    importer = subparsers.add_parser('import', help='Add per-run CSV files from older benchmark runs')
+    importer.add_argument('paths', nargs='+', help='CSV files')
+    query = subparsers.add_parser('query', help='Print matching runs, e.g. query implementation=jasper_multicast message_rate=200')
+    query.add_argument('filters', nargs='*', help='column=value pairs')
+    query.add_argument('--columns', type=str, default='run_id,implementation,scenario,message_rate,avg_latency,latency_p99,fairness',
+                       help='Comma-separated columns to print')
+
+    args = parser.parse_args()
+
+    store = ResultsStore(args.store)
+    if args.command == 'import':
+        for path in args.paths:
+            print(f"{path} -> {store.import_csv(path)}")
+        return
+    filters = {}
+    for item in args.filters:
+        column, value = item.split('=', 1)
+        filters[column] = value if column in TEXT_COLUMNS else float(value)
+    rows = store.query(**filters)
+    columns = args.columns.split(',')
+    print('\t'.join(columns))
+    for values in zip(*(rows[column] for column in columns)):
+        print('\t'.join(str(value) for value in values))
+
+
+if __name__ == '__main__':
+    main()
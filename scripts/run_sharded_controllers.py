@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Launcher for several controller instances sharing one network
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from controller_sharding import (API_PORT_STRIDE, ENV_COORD_PORT, ENV_PEERS, ENV_SHARD_COUNT,
+                                 ENV_SHARD_INDEX)
+
+CONTROLLERS = {
+    'basic': ('scripts/sdn_controller.py', 5005),
+    'jasper': ('scripts/jasper_multicast_controller.py', 5006),
+    'dbo': ('scripts/dbo_multicast_controller.py', 5007)
+}
+
+
+def shard_env(index, count, coord_base, host='127.0.0.1'):
+    """Environment of shard `index`: its identity, coordination port and the peers' ports"""
+    env = dict(os.environ)
+    env[ENV_SHARD_INDEX] = str(index)
+    env[ENV_SHARD_COUNT] = str(count)
+    env[ENV_COORD_PORT] = str(coord_base + index)
+    env[ENV_PEERS] = ','.join(f"{host}:{coord_base + peer}" for peer in range(count) if peer != index)
+    # Controllers import their sibling modules by name
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, ['scripts', env.get('PYTHONPATH')]))
+    return env
+
+
+def start_shards(controller, count, of_port=6633, coord_base=7100):
+    """
+    Start `count` ryu-manager processes, one per shard
+
+    Shard i listens for switches on of_port + i and serves its Flask API on the
+    controller's usual port + 10 * i. Each switch must be pointed at every shard
+    (e.g. topology/ with one RemoteController per port); the owning shard becomes
+    its OpenFlow MASTER and the others stay connected as SLAVEs.
+
+    Returns:
+        List of Popen handles
+    """
+    app, api_base = CONTROLLERS[controller]
+    processes = []
+    for index in range(count):
+        cmd = ['ryu-manager', '--ofp-tcp-listen-port', str(of_port + index), app]
+        processes.append(subprocess.Popen(cmd, env=shard_env(index, count, coord_base)))
+        print(f"Shard {index}: OpenFlow port {of_port + index}, API port {api_base + API_PORT_STRIDE * index}, "
+              f"coordination port {coord_base + index}")
+    return processes
+
+
+def main():
+    """Main function for standalone usage"""
+    parser = argparse.ArgumentParser(description='Run several controller instances, each owning a share of the switches')
+    parser.add_argument('--controller', type=str, default='jasper', choices=sorted(CONTROLLERS),
+                        help='Controller implementation')
+    parser.add_argument('--shards', type=int, default=os.cpu_count() or 1, help='Number of controller instances')
+    parser.add_argument('--of-port', type=int, default=6633, help='OpenFlow port of shard 0 (shard i uses of-port + i)')
+    parser.add_argument('--coord-port', type=int, default=7100,
+                        help='Coordination port of shard 0 (shard i uses coord-port + i)')
+
+    args = parser.parse_args()
+
+    processes = start_shards(args.controller, max(1, args.shards), args.of_port, args.coord_port)
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+    sys.exit(max(process.returncode or 0 for process in processes))
+
+
+if __name__ == '__main__':
+    main()
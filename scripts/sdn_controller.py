@@ -9,7 +9,14 @@ from ryu.controller import ofp_event
 from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
-from ryu.lib.packet import packet, ethernet, ether_types, ipv4, udp
+from ryu.lib.packet import packet
+from multicast_groups import MulticastGroupTable
+from packet_classifier import classify, PKT_OTHER, PKT_LLDP, PKT_IGMP, PKT_MULTICAST
+from controller_metrics import ControllerMetrics
+from async_logging import start_async_logging, SampledLogger, IntervalSummary
+from release_scheduler import ReleaseScheduler
+from controller_sharding import ControllerShard, api_port
+import time
 
 # --- Flask API for runtime parameter updates ---
 import threading
@@ -19,13 +26,13 @@ api_app = Flask(__name__)
 controller_instance = None  # Will be set to the running controller
 
 def run_api():
-    api_app.run(host='0.0.0.0', port=5005, debug=False, use_reloader=False)
+    api_app.run(host='0.0.0.0', port=api_port(5005), debug=False, use_reloader=False)
 
 @api_app.route('/api/set_artificial_delay', methods=['POST'])
 def api_set_artificial_delay():
     delay = float(request.json.get('delay_ms', 0.0))
     if controller_instance:
-        controller_instance.set_artificial_delay(delay)
+        controller_instance.shard.apply_config('set_artificial_delay', delay)
         return jsonify({'status': 'ok', 'delay_ms': delay})
     return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
 
@@ -34,12 +41,63 @@ def api_set_clock_offset():
     port = int(request.json.get('port'))
     offset = float(request.json.get('offset_ms', 0.0))
     if controller_instance:
-        controller_instance.set_clock_offset(port, offset)
+        controller_instance.shard.apply_config('set_clock_offset', port, offset)
         return jsonify({'status': 'ok', 'port': port, 'offset_ms': offset})
     return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
 
+@api_app.route('/api/set_proactive_multicast', methods=['POST'])
+def api_set_proactive_multicast():
+    enabled = bool(request.json.get('enabled', True))
+    if controller_instance:
+        controller_instance.shard.apply_config('enable_proactive_multicast', enabled)
+        return jsonify({'status': 'ok', 'enabled': enabled})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/delay_queue_stats', methods=['GET'])
+def api_delay_queue_stats():
+    if controller_instance:
+        return jsonify({'status': 'ok', 'scheduler': controller_instance.release_scheduler.stats()})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/metrics', methods=['GET'])
+def api_metrics():
+    # ?reset=1 returns the current window and starts a new one
+    reset = request.args.get('reset', '0').lower() in ('1', 'true', 'yes')
+    if controller_instance:
+        return jsonify({'status': 'ok', 'metrics': controller_instance.metrics.snapshot(reset=reset)})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/set_packet_log', methods=['POST'])
+def api_set_packet_log():
+    rate = float(request.json.get('rate_per_s', 20.0))
+    sample_every = int(request.json.get('sample_every', 1))
+    if controller_instance:
+        controller_instance.shard.apply_config('set_packet_log', rate, sample_every)
+        return jsonify({'status': 'ok', 'rate_per_s': rate, 'sample_every': sample_every})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/set_router_ports', methods=['POST'])
+def api_set_router_ports():
+    # Ports of a switch that lead to other switches (multi-switch topologies)
+    dpid = int(request.json.get('dpid'))
+    ports = [int(port) for port in request.json.get('ports', [])]
+    if controller_instance:
+        controller_instance.shard.apply_config('set_router_ports', dpid, ports)
+        return jsonify({'status': 'ok', 'dpid': dpid, 'ports': ports})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
+@api_app.route('/api/shard_status', methods=['GET'])
+def api_shard_status():
+    if controller_instance:
+        return jsonify({'status': 'ok', 'shard': controller_instance.shard.status()})
+    return jsonify({'status': 'error', 'reason': 'controller not running'}), 500
+
 # --- End Flask API ---
 
+# Setters the Flask API applies on every shard through the coordination channel
+SHARED_CONFIG_METHODS = ('set_artificial_delay', 'set_clock_offset', 'enable_proactive_multicast', 'set_packet_log',
+                         'set_router_ports')
+
 class FinancialExchangeController(app_manager.RyuApp):
     """
     Basic SDN controller for financial exchange simulation
@@ -50,15 +108,28 @@ class FinancialExchangeController(app_manager.RyuApp):
 
     def __init__(self, *args, **kwargs):
         super(FinancialExchangeController, self).__init__(*args, **kwargs)
+        # Log records are formatted and written by a background listener, not the event loop
+        self.log_listener = start_async_logging(self.logger)
         global controller_instance
         controller_instance = self
         self.mac_to_port = {}
         # Track multicast groups
         self.multicast_groups = {}
         # CloudEx: Simulated clock offsets per host (for fairness experiments)
-        self.clock_offsets = {1: 0.0, 2: 0.0, 3: 0.0, 4: 0.0}  # ms offset per port
+        self.clock_offsets = {}  # ms offset per port; ports without an entry have none
         # CloudEx: Artificial delay (ms) for fairness tuning
         self.artificial_delay_ms = 0.0
+        # CloudEx: Delayed copies wait here until arrival + their port's delay
+        self.release_scheduler = ReleaseScheduler(self.logger)
+        # IGMP-driven group membership and OpenFlow group entries
+        self.group_table = MulticastGroupTable(self.logger)
+        # PacketIn rates, per-port deliveries and latency histograms for /api/metrics
+        self.metrics = ControllerMetrics()
+        # Per-packet log lines are sampled and rate-limited; totals go into interval summaries
+        self.packet_log = SampledLogger(self.logger)
+        self.log_summary = IntervalSummary(self.logger, self.summarize_log_interval)
+        # Datapaths this instance owns when several controllers share the network; config is kept in sync
+        self.shard = ControllerShard(self.logger, self, SHARED_CONFIG_METHODS)
         self.logger.info("Financial Exchange Controller started")
 
     def set_artificial_delay(self, delay_ms):
@@ -71,6 +142,29 @@ class FinancialExchangeController(app_manager.RyuApp):
         self.clock_offsets[port] = offset_ms
         self.logger.info(f"Set clock offset for port {port}: {offset_ms} ms")
 
+    def enable_proactive_multicast(self, enabled=True):
+        """Replicate multicast in the switch via OpenFlow group entries instead of PacketOut"""
+        self.group_table.set_proactive(enabled)
+        self.logger.info(f"Proactive multicast (group tables) enabled: {enabled}")
+
+    def set_router_ports(self, dpid, ports):
+        """Forward every joined group to these ports of a switch (links to other switches)"""
+        self.group_table.set_router_ports(dpid, ports)
+
+    def set_packet_log(self, rate, sample_every=1):
+        """Set the per-packet log rate limit (lines/s, 0 disables) and sampling interval"""
+        self.packet_log.configure(rate, sample_every=sample_every)
+        self.logger.info(f"Per-packet logging: {rate} lines/s, 1 in {sample_every} sampled")
+
+    def summarize_log_interval(self, elapsed):
+        """Interval summary line standing in for suppressed per-packet log lines"""
+        packets, suppressed = self.packet_log.take_counts()
+        if not packets:
+            return None
+        return (f"Multicast summary: {packets} packets in {elapsed:.1f}s ({packets / elapsed:.0f}/s), "
+                f"{suppressed} log lines suppressed, {self.release_scheduler.pending()} delayed copies pending, "
+                f"{self.log_listener.handler.dropped} log records dropped")
+
     @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
     def switch_features_handler(self, ev):
         """Handle switch features reply to install table-miss flow entry"""
@@ -78,13 +172,32 @@ class FinancialExchangeController(app_manager.RyuApp):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
 
+        # Another shard programs this switch; we stay connected as a standby
+        if not self.shard.claim_datapath(datapath):
+            return
+
         # Install table-miss flow entry
         match = parser.OFPMatch()
         actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,
                                          ofproto.OFPCML_NO_BUFFER)]
         self.add_flow(datapath, 0, match, actions)
+        self.group_table.register_datapath(datapath)
         self.logger.info(f"Switch {datapath.id} connected")
 
+    @set_ev_cls(ofp_event.EventOFPPortDescStatsReply, MAIN_DISPATCHER)
+    def port_desc_stats_reply_handler(self, ev):
+        """Learn the live ports of a newly connected switch"""
+        self.group_table.handle_port_desc(ev.msg.datapath, ev.msg.body)
+
+    @set_ev_cls(ofp_event.EventOFPPortStatus, MAIN_DISPATCHER)
+    def port_status_handler(self, ev):
+        """Track ports coming and going; a port that goes down leaves its multicast groups"""
+        datapath = ev.msg.datapath
+        if not self.shard.owns(datapath.id):
+            return
+        changed = self.group_table.handle_port_status(datapath, ev.msg)
+        self.shard.share_membership(datapath.id, changed, self.group_table)
+
     def add_flow(self, datapath, priority, match, actions, buffer_id=None):
         """Add a flow entry to the switch"""
         ofproto = datapath.ofproto
@@ -115,24 +228,33 @@ class FinancialExchangeController(app_manager.RyuApp):
         parser = datapath.ofproto_parser
         in_port = msg.match['in_port']
 
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        # Fast path: classify from raw header bytes instead of a full ryu parse
+        kind, dst, src, ipv4_dst = classify(msg.data)
+        self.metrics.count_packet_in(kind)
 
-        if eth.ethertype == ether_types.ETH_TYPE_LLDP:
-            # Ignore LLDP packets
+        if kind == PKT_LLDP or kind == PKT_OTHER:
+            # Ignore LLDP packets and runt frames
             return
         
-        dst = eth.dst
-        src = eth.src
         dpid = datapath.id
 
         # Learn MAC addresses to avoid flooding
         self.mac_to_port.setdefault(dpid, {})
         self.mac_to_port[dpid][src] = in_port
 
+        # IGMP reports and leaves only update group membership (the one case needing the full parser)
+        if kind == PKT_IGMP:
+            changed = self.group_table.handle_igmp(datapath, in_port, packet.Packet(msg.data))
+            self.shard.share_membership(dpid, changed, self.group_table)
+            return
+
         # Check if this is a multicast packet
-        if dst.startswith('01:00:5e'):  # IPv4 multicast MAC prefix
-            self.handle_multicast(msg, datapath, in_port, pkt)
+        if kind == PKT_MULTICAST:  # IPv4 multicast MAC prefix
+            # Proactive mode: the switch's group entry replicates; this packet only raced the flow install
+            if self.group_table.proactive and ipv4_dst is not None and \
+                    self.group_table.packet_out_via_group(msg, datapath, in_port, ipv4_dst):
+                return
+            self.handle_multicast(msg, datapath, in_port, ipv4_dst)
             return
             
         # Regular unicast forwarding
@@ -162,27 +284,59 @@ class FinancialExchangeController(app_manager.RyuApp):
                                  in_port=in_port, actions=actions, data=data)
         datapath.send_msg(out)
 
-    def handle_multicast(self, msg, datapath, in_port, pkt):
-        """Handle multicast packets - basic implementation with CloudEx-inspired delay and clock offset"""
+    def handle_multicast(self, msg, datapath, in_port, group_ip):
+        """
+        Handle multicast packets - basic implementation with CloudEx-inspired delay and clock offset
+        - Copies go only to the group's subscribed ports (all live ports if nobody joined)
+        - Ports without delay are served immediately in one PacketOut
+        - Every other port's copy is queued on the release scheduler and leaves at
+          arrival + artificial_delay_ms + its own clock offset, independently of the others
+        """
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        # Per-packet delivery record, shared by this call and the scheduled releases
+        packet_info = {'arrival': time.time(), 'latencies': {}, 'pending': 0}
+        immediate = []
+        for port in self.group_table.fanout_ports(datapath.id, group_ip, in_port):
+            # CloudEx: Add artificial delay and simulated clock offset
+            total_delay = self.artificial_delay_ms + self.clock_offsets.get(port, 0.0)
+            if total_delay > 0:
+                packet_info['pending'] += 1
+                self.release_scheduler.call_later(total_delay / 1000.0, self.release_to_port,
+                                                  msg, datapath, in_port, port, packet_info)
+            else:
+                immediate.append(parser.OFPActionOutput(port))
+        if immediate:
+            data = None
+            if msg.buffer_id == ofproto.OFP_NO_BUFFER:
+                data = msg.data
+            out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
+                                     in_port=in_port, actions=immediate, data=data)
+            datapath.send_msg(out)
+            latency = time.time() - packet_info['arrival']
+            for action in immediate:
+                packet_info['latencies'][action.port] = latency
+                self.metrics.count_delivery(action.port)
+            if packet_info['pending'] == 0:
+                self.metrics.record_packet(packet_info['latencies'])
+        self.packet_log.log("Multicast packet for %s forwarded from port %s with CloudEx delay/offsets", group_ip, in_port)
+
+    def release_to_port(self, msg, datapath, in_port, port, packet_info):
+        """Send a delayed multicast copy to one port (runs on the release scheduler thread)"""
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
-        dpid = datapath.id
-        actions = []
-        for port in range(1, 5):  # Assuming 4-node star topology
-            if port != in_port:
-                # CloudEx: Add artificial delay and simulated clock offset
-                total_delay = self.artificial_delay_ms + self.clock_offsets.get(port, 0.0)
-                if total_delay > 0:
-                    import time
-                    time.sleep(total_delay / 1000.0)  # convert ms to s
-                actions.append(parser.OFPActionOutput(port))
         data = None
         if msg.buffer_id == ofproto.OFP_NO_BUFFER:
             data = msg.data
         out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
-                                 in_port=in_port, actions=actions, data=data)
+                                 in_port=in_port, actions=[parser.OFPActionOutput(port)], data=data)
         datapath.send_msg(out)
-        self.logger.info(f"Multicast packet forwarded to all ports from {in_port} with CloudEx delay/offsets")
+        packet_info['latencies'][port] = time.time() - packet_info['arrival']
+        packet_info['pending'] -= 1
+        self.metrics.count_delivery(port)
+        # The packet's fairness window is known once its last delayed copy is out
+        if packet_info['pending'] == 0:
+            self.metrics.record_packet(packet_info['latencies'])
 
 # Start Flask API server in a background thread
 api_thread = threading.Thread(target=run_api, daemon=True)
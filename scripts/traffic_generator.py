@@ -9,9 +9,16 @@ import socket
 import struct
 import time
 import argparse
-import threading
+import multiprocessing
 import logging
 
+from scripts.pacing import RatePacer, SchedulePacer
+from scripts.batch_send import BatchSender
+from scripts.price_model import PricePathModel, TickStream
+from scripts.arrival_processes import ARRIVAL_PROCESSES, build_schedule, burst_intensity
+from scripts.feed_capture import FeedRecorder, read_capture
+from scripts.latency_measurement import STAMP
+
 logging.basicConfig(filename='/app/scripts/bot_output.log',
                     format='[BOT %(threadName)s] %(message)s',
                     level=logging.INFO)
@@ -20,11 +27,24 @@ class FinancialTrafficGenerator:
     """
     Generate financial exchange traffic for testing multicast implementations
     - Creates simulated stock price updates
+    - Streams prices from a vectorized jump-diffusion model
     - Supports multicast transmission
     """
     
-    def __init__(self, multicast_ip='224.0.0.10', port=5007):
-        """Initialize the traffic generator"""
+    def __init__(self, multicast_ip='224.0.0.10', port=5007, symbols=None, price_model=None, recorder=None,
+                 send_log=None):
+        """
+        Initialize the traffic generator
+        
+        Args:
+            multicast_ip: Multicast group address
+            port: UDP port
+            symbols: Stock symbols to simulate (defaults to the seven large caps below)
+            price_model: PricePathModel to stream ticks from (defaults to one over `symbols`)
+            recorder: Optional FeedRecorder that captures every sent datagram
+            send_log: Optional SendLog that stamps every datagram with a sequence number
+                and send time for one-way latency measurement
+        """
         self.multicast_ip = multicast_ip
         self.port = port
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
@@ -32,7 +52,16 @@ class FinancialTrafficGenerator:
         self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
         
         # List of stock symbols for simulation
-        self.stock_symbols = ['AAPL', 'MSFT', 'AMZN', 'GOOG', 'META', 'TSLA', 'NVDA']
+        self.stock_symbols = symbols or ['AAPL', 'MSFT', 'AMZN', 'GOOG', 'META', 'TSLA', 'NVDA']
+        
+        # Ticks are pre-generated in blocks and streamed one message at a time
+        self.ticks = TickStream(price_model or PricePathModel(self.stock_symbols))
+        
+        # Capture of sent datagrams for later replay
+        self.recorder = recorder
+        
+        # Sequence/send-time stamping for latency measurement
+        self.send_log = send_log
         
         print(f"Financial Traffic Generator initialized - Multicast IP: {multicast_ip}, Port: {port}")
     
@@ -46,14 +75,8 @@ class FinancialTrafficGenerator:
         Returns:
             Byte string containing stock update data
         """
-        # Select a random stock symbol
-        symbol = random.choice(self.stock_symbols)
-        
-        # Generate a random price (between $50 and $1000)
-        price = random.uniform(50.0, 1000.0)
-        
-        # Generate a random volume
-        volume = random.randint(1, 1000)
+        # Next tick from the pre-generated price paths
+        symbol, price, volume = self.ticks.next_tick()
         
         # Timestamp
         timestamp = time.time()
@@ -68,7 +91,15 @@ class FinancialTrafficGenerator:
         # Return the complete message
         return (header + padding).encode('utf-8')
     
-    def send_updates(self, count, rate, size_bytes=100):
+    def _send(self, data):
+        """Send one datagram to the multicast group, stamping it if measuring and capturing it if recording"""
+        if self.send_log is not None:
+            data = self.send_log.stamp(data)
+        self.sock.sendto(data, (self.multicast_ip, self.port))
+        if self.recorder is not None:
+            self.recorder.record(data, (self.multicast_ip, self.port))
+    
+    def send_updates(self, count, rate, size_bytes=100, batch_size=1):
         """
         Send a series of stock updates to the multicast group
         
@@ -76,55 +107,286 @@ class FinancialTrafficGenerator:
             count: Number of updates to send
             rate: Updates per second
             size_bytes: Size of each update in bytes
+            batch_size: Updates sent back-to-back on each pacing tick
+        
+        Returns:
+            Dict of pacing statistics (achieved rate, jitter)
         """
-        interval = 1.0 / rate
+        pacer = RatePacer(rate, batch_size=batch_size)
         
-        print(f"Sending {count} stock updates at {rate} updates/second ({size_bytes} bytes each)...")
+        print(f"Sending {count} stock updates at {rate} updates/second ({size_bytes} bytes each, batch {batch_size})...")
         
-        for i in range(count):
-            # Generate and send the update
-            update_data = self.generate_stock_update(size_bytes)
-            self.sock.sendto(update_data, (self.multicast_ip, self.port))
+        # Log progress roughly every second of traffic instead of every 10 sends
+        log_every = max(10, int(rate))
+        sent = 0
+        pacer.start()
+        while sent < count:
+            # Wait for the next deadline; generation and send time are absorbed by the schedule
+            pacer.wait()
+            burst = min(batch_size, count - sent)
+            for _ in range(burst):
+                update_data = self.generate_stock_update(size_bytes)
+                self._send(update_data)
+            pacer.record_send(burst)
+            sent += burst
             
             # Log progress periodically
-            if (i + 1) % 10 == 0 or i == 0 or i == count - 1:
-                print(f"Sent update {i+1}/{count}")
-            
-            # Sleep to maintain the desired rate
-            time.sleep(interval)
+            if sent == burst or sent % log_every < burst or sent == count:
+                print(f"Sent update {sent}/{count}")
+        
+        stats = pacer.stats()
+        print(f"Completed sending {count} updates - achieved rate: {stats['achieved_rate']:.1f} updates/second, "
+              f"jitter: {stats['jitter_ms']:.3f} ms, late ticks: {stats['late_ticks']}")
+        return stats
+    
+    def send_schedule(self, timestamps, size_bytes=100):
+        """
+        Send one stock update at each time of a precomputed schedule
+        
+        Args:
+            timestamps: Sorted send times in seconds from the start of the run
+            size_bytes: Size of each update in bytes
+        
+        Returns:
+            Dict of schedule-following statistics (achieved rate, lateness)
+        """
+        pacer = SchedulePacer(timestamps)
+        count = len(timestamps)
+        
+        print(f"Sending {count} stock updates on a precomputed schedule "
+              f"(burst intensity {burst_intensity(timestamps):.1f}x, {size_bytes} bytes each)...")
+        
+        pacer.start()
+        for i in range(count):
+            pacer.wait(i)
+            update_data = self.generate_stock_update(size_bytes)
+            self._send(update_data)
+        
+        stats = pacer.stats()
+        print(f"Completed sending {count} updates - achieved rate: {stats['achieved_rate']:.1f} updates/second, "
+              f"mean lateness: {stats['mean_lateness_ms']:.3f} ms, max lateness: {stats['max_lateness_ms']:.3f} ms")
+        return stats
+    
+    def build_payload_pool(self, pool_size, size_bytes=100):
+        """
+        Pre-build a pool of stock update payloads for batched sending
+        
+        The timestamp field of each payload is left as a fixed-width slot
+        that is filled in just before the payload is sent. When measuring
+        latency, each payload also starts with room for the send stamp.
+        
+        Args:
+            pool_size: Number of payloads to build
+            size_bytes: Size of each payload in bytes
+        
+        Returns:
+            Tuple of (list of bytearray payloads, list of timestamp slot offsets)
+        """
+        payloads = []
+        offsets = []
+        prefix = b'\0' * STAMP.size if self.send_log is not None else b''
+        for _ in range(pool_size):
+            symbol, price, volume = self.ticks.next_tick()
+            header = f"{symbol},{price:.2f},{volume},"
+            offsets.append(len(prefix) + len(header))
+            message = header + '0' * TIMESTAMP_WIDTH
+            padding = 'X' * max(0, size_bytes - len(message))
+            payloads.append(bytearray(prefix + (message + padding).encode('utf-8')))
+        return payloads, offsets
+    
+    def send_updates_batched(self, count, rate, size_bytes=100, batch_size=32, pool_size=4096):
+        """
+        Send stock updates from a pre-built payload pool, several datagrams per system call
+        
+        Args:
+            count: Number of updates to send
+            rate: Updates per second
+            size_bytes: Size of each update in bytes
+            batch_size: Updates handed to the kernel per pacing tick
+            pool_size: Number of pre-built payloads cycled through
+        
+        Returns:
+            Dict of pacing statistics (achieved rate, jitter)
+        """
+        payloads, offsets = self.build_payload_pool(pool_size, size_bytes)
+        # Connected UDP sockets let sendmmsg skip the per-datagram address
+        self.sock.connect((self.multicast_ip, self.port))
+        sender = BatchSender(self.sock, max_batch=batch_size)
+        pacer = RatePacer(rate, batch_size=batch_size)
+        
+        sent = 0
+        cursor = 0
+        pacer.start()
+        while sent < count:
+            pacer.wait()
+            burst = min(batch_size, count - sent)
+            batch = []
+            # One timestamp per batch: the whole batch leaves in a single system call
+            stamp = (b'%.6f' % time.time()).rjust(TIMESTAMP_WIDTH, b'0')
+            for _ in range(burst):
+                payload = payloads[cursor]
+                offset = offsets[cursor]
+                payload[offset:offset + TIMESTAMP_WIDTH] = stamp
+                if self.send_log is not None:
+                    self.send_log.stamp_into(payload)
+                batch.append(payload)
+                cursor = (cursor + 1) % pool_size
+            sender.send(batch)
+            if self.recorder is not None:
+                for payload in batch:
+                    self.recorder.record(bytes(payload), (self.multicast_ip, self.port))
+            pacer.record_send(burst)
+            sent += burst
+        
+        return pacer.stats()
+    
+    def replay_capture(self, path, speed=1.0, retarget=False):
+        """
+        Replay a recorded capture file
+        
+        Datagrams are sent byte-for-byte as recorded, with the original spacing
+        divided by `speed`.
+        
+        Args:
+            path: Capture file written by FeedRecorder
+            speed: Replay speed multiplier (1.0 = real time); 0 sends as fast as possible
+            retarget: Send to this generator's group/port instead of the recorded destinations
+        
+        Returns:
+            Dict of schedule-following statistics (achieved rate, lateness)
+        """
+        capture = read_capture(path)
+        payloads = capture['payloads']
+        addrs = capture['addrs']
+        count = len(payloads)
+        if retarget:
+            addrs = [(self.multicast_ip, self.port)] * count
+        if speed and speed > 0:
+            # Spacing is kept relative to the first datagram, not to when the capture was opened
+            timestamps = capture['timestamps'] - (capture['timestamps'][0] if count else 0.0)
+            timestamps = timestamps / speed
+        else:
+            timestamps = [0.0] * count
+        pacer = SchedulePacer(timestamps)
+        
+        label = f"{speed}x" if speed and speed > 0 else "max speed"
+        print(f"Replaying {count} datagrams from {path} at {label}...")
         
-        print(f"Completed sending {count} updates")
+        pacer.start()
+        for i in range(count):
+            pacer.wait(i)
+            self.sock.sendto(payloads[i], addrs[i])
+        
+        stats = pacer.stats()
+        print(f"Completed replay - achieved rate: {stats['achieved_rate']:.1f} datagrams/second, "
+              f"mean lateness: {stats['mean_lateness_ms']:.3f} ms")
+        return stats
     
     def close(self):
-        """Close the socket"""
+        """Close the socket, any capture file and any send log"""
         self.sock.close()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self.send_log is not None:
+            self.send_log.close()
+            self.send_log = None
+
+def _bot_task(rate, size, count):
+    """Run a single traffic generator bot (executed in its own process)"""
+    gen = FinancialTrafficGenerator(MULTICAST_GRP, MULTICAST_PORT)
+    try:
+        logging.info(f"Bot starting: rate={rate}, size={size}, count={count}")
+        gen.send_updates(count=count, rate=rate, size_bytes=size)
+        logging.info(f"Bot finished: rate={rate}, size={size}, count={count}")
+    finally:
+        gen.close()
 
 def start_bots():
     """
     Start 4 traffic generator bots with random rates and message sizes.
+    Each bot runs in its own process so bots are not serialized by the GIL.
     """
     rates = [10, 100, 200]
     sizes = [10, 100, 1000]
-    bot_threads = []
+    bot_procs = []
     for i in range(4):
         rate = random.choice(rates)
         size = random.choice(sizes)
         count = 100  # Number of updates per bot
-        def bot_task(rate=rate, size=size, count=count):
-            gen = FinancialTrafficGenerator(MULTICAST_GRP, MULTICAST_PORT)
-            try:
-                logging.info(f"Bot starting: rate={rate}, size={size}, count={count}")
-                gen.send_updates(count=count, rate=rate, size_bytes=size)
-                logging.info(f"Bot finished: rate={rate}, size={size}, count={count}")
-            finally:
-                gen.close()
-        t = threading.Thread(target=bot_task, daemon=True)
-        t.start()
-        bot_threads.append(t)
+        p = multiprocessing.Process(target=_bot_task, args=(rate, size, count), daemon=True)
+        p.start()
+        bot_procs.append(p)
     print(f"[DEBUG] Started 4 bots with random rates and sizes.")
     # Optionally join bots if you want to wait for completion
-    # for t in bot_threads:
-    #     t.join()
+    # for p in bot_procs:
+    #     p.join()
+
+def _multicore_worker(worker_id, symbols, multicast_ip, port, count, rate, size_bytes, batch_size, result_queue):
+    """Send one worker's share of the feed and report its pacing statistics"""
+    gen = None
+    try:
+        gen = FinancialTrafficGenerator(multicast_ip, port, symbols=symbols)
+        stats = gen.send_updates_batched(count, rate, size_bytes, batch_size=batch_size)
+    except Exception as e:
+        # Always report back so the parent never waits on a dead worker
+        stats = {'achieved_rate': 0.0, 'messages': 0, 'error': str(e)}
+    finally:
+        if gen is not None:
+            gen.close()
+    stats['worker'] = worker_id
+    stats['symbols'] = symbols
+    stats['channel'] = f"{multicast_ip}:{port}"
+    result_queue.put(stats)
+
+def run_multicore_generators(workers, count, rate, size_bytes=100, batch_size=32, channels=None, symbols=None):
+    """
+    Generate traffic from several processes, one per core
+    
+    Symbols are split round-robin across workers, and each worker sends to one
+    of the given multicast channels. The total count and rate are divided
+    evenly between workers.
+    
+    Args:
+        workers: Number of generator processes
+        count: Total number of updates to send
+        rate: Aggregate updates per second
+        size_bytes: Size of each update in bytes
+        batch_size: Updates sent per system call
+        channels: List of (multicast_ip, port) tuples; defaults to the market data group
+        symbols: Stock symbols to split across workers
+    
+    Returns:
+        List of per-worker pacing statistics
+    """
+    if channels is None:
+        channels = [(MULTICAST_GRP, MULTICAST_PORT)]
+    if symbols is None:
+        symbols = ['AAPL', 'MSFT', 'AMZN', 'GOOG', 'META', 'TSLA', 'NVDA']
+    result_queue = multiprocessing.Queue()
+    procs = []
+    for i in range(workers):
+        worker_symbols = symbols[i % len(symbols)::workers] or [symbols[i % len(symbols)]]
+        multicast_ip, port = channels[i % len(channels)]
+        worker_count = count // workers + (1 if i < count % workers else 0)
+        p = multiprocessing.Process(
+            target=_multicore_worker,
+            args=(i, worker_symbols, multicast_ip, port, worker_count,
+                  rate / workers, size_bytes, batch_size, result_queue),
+            daemon=True)
+        p.start()
+        procs.append(p)
+    results = [result_queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+    results.sort(key=lambda r: r['worker'])
+    for r in results:
+        if 'error' in r:
+            print(f"Worker {r['worker']} failed: {r['error']}")
+    total_rate = sum(r['achieved_rate'] for r in results)
+    print(f"Multi-core generator finished: {workers} workers, {count} updates, "
+          f"aggregate rate {total_rate:.1f} updates/second")
+    return results
 
 def main():
     """Main function for standalone usage"""
@@ -134,15 +396,52 @@ def main():
     parser.add_argument('--size', type=int, default=100, help='Size of each update in bytes')
     parser.add_argument('--ip', type=str, default='224.0.0.10', help='Multicast IP address')
     parser.add_argument('--port', type=int, default=5007, help='UDP port')
+    parser.add_argument('--batch', type=int, default=None,
+                        help='Updates sent per pacing tick (default: 1, or 32 with --workers > 1)')
+    parser.add_argument('--workers', type=int, default=1, help='Generator processes (batched sends when > 1)')
+    parser.add_argument('--arrival', type=str, default='constant', choices=sorted(ARRIVAL_PROCESSES),
+                        help='Inter-arrival process (rate is the mean rate)')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the arrival schedule')
+    parser.add_argument('--record', type=str, default=None, help='Capture sent datagrams to this file')
+    parser.add_argument('--replay', type=str, default=None, help='Replay a capture file instead of generating')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier (0 = as fast as possible)')
+    parser.add_argument('--retarget', action='store_true', help='Replay to --ip/--port instead of the recorded destinations')
     
     args = parser.parse_args()
     
-    generator = FinancialTrafficGenerator(args.ip, args.port)
+    if args.workers > 1 and (args.record or args.replay):
+        parser.error("--record and --replay run in a single process; use --workers 1")
+    if args.record and args.replay:
+        parser.error("--replay sends recorded datagrams as-is and cannot --record them")
+    if args.workers > 1 and (args.arrival != 'constant' or args.seed is not None):
+        parser.error("--arrival and --seed schedules run in a single process; use --workers 1")
+    
+    if args.workers > 1:
+        batch_size = max(args.batch, 1) if args.batch is not None else 32
+        run_multicore_generators(args.workers, args.count, args.rate, args.size,
+                                 batch_size=batch_size, channels=[(args.ip, args.port)])
+        return
+    
+    recorder = FeedRecorder(args.record) if args.record else None
+    generator = FinancialTrafficGenerator(args.ip, args.port, recorder=recorder)
     try:
-        generator.send_updates(args.count, args.rate, args.size)
+        if args.replay:
+            generator.replay_capture(args.replay, speed=args.speed, retarget=args.retarget)
+        elif args.arrival == 'constant':
+            generator.send_updates(args.count, args.rate, args.size, batch_size=args.batch if args.batch is not None else 1)
+        else:
+            scenario = {
+                'duration': args.count / args.rate,
+                'message_rate': args.rate,
+                'arrival': {'process': args.arrival}
+            }
+            generator.send_schedule(build_schedule(scenario, seed=args.seed), args.size)
     finally:
         generator.close()
 
+# Width of the fixed timestamp slot in pre-built payloads ('%.6f' of time.time())
+TIMESTAMP_WIDTH = 17
+
 # Market Data Broadcaster for SDN Multicast Demo
 MULTICAST_GRP = '224.1.1.1'
 MULTICAST_PORT = 5007
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Per-link latency, jitter and loss profiles applied through TCLink parameters
+"""
+
+import fnmatch
+import json
+import threading
+import time
+
+import numpy as np
+
+# Profile fields and the TCLink parameter each becomes
+_FIELDS = ('delay', 'jitter', 'loss', 'bw')
+
+
+def _link_name(node1, node2):
+    return f'{node1}-{node2}'
+
+
+def _matches(pattern, node1, node2):
+    """True if the pattern matches either endpoint or the link name in either direction"""
+    return any(fnmatch.fnmatchcase(name, pattern)
+               for name in (node1, node2, _link_name(node1, node2), _link_name(node2, node1)))
+
+
+def sample_value(spec, rng):
+    """
+    Draw one value from a profile field
+
+    Args:
+        spec: A number, a string such as '1ms' (returned as is), or a distribution:
+            {'dist': 'normal', 'mean', 'std'}, {'dist': 'lognormal', 'median', 'sigma'},
+            {'dist': 'uniform', 'low', 'high'}, {'dist': 'exponential', 'offset', 'scale'}
+            or {'dist': 'empirical', 'samples': [...]} (resampled measurements)
+        rng: numpy Generator
+
+    Returns:
+        The drawn value (never negative), or the string unchanged
+    """
+    if not isinstance(spec, dict):
+        return spec
+    dist = spec.get('dist', 'normal')
+    if dist == 'normal':
+        value = rng.normal(spec['mean'], spec.get('std', 0.0))
+    elif dist == 'lognormal':
+        value = spec['median'] * np.exp(rng.normal(0.0, spec.get('sigma', 0.0)))
+    elif dist == 'uniform':
+        value = rng.uniform(spec['low'], spec['high'])
+    elif dist == 'exponential':
+        value = spec.get('offset', 0.0) + rng.exponential(spec['scale'])
+    elif dist == 'empirical':
+        value = rng.choice(spec['samples'])
+    else:
+        raise ValueError(f"Unknown distribution: {dist}")
+    return max(0.0, float(value))
+
+
+def tc_params(values):
+    """Turn sampled profile values (delay/jitter in ms, loss in %, bw in Mbit/s) into TCLink parameters"""
+    params = {}
+    for field in _FIELDS:
+        value = values.get(field)
+        if value is None:
+            continue
+        if field in ('delay', 'jitter') and not isinstance(value, str):
+            value = f'{value:.3f}ms'
+        params[field] = value
+    return params
+
+
+class LinkProfiles:
+    """
+    Latency profiles for the links of a topology, loaded from a JSON file
+    - 'default' and each rule in 'links' set any of delay, jitter (ms), loss (%)
+      and bw (Mbit/s); values are fixed or drawn from a distribution, e.g. one
+      fitted to cloud VM latency measurements
+    - A rule's 'match' is a node-name pattern ('h*' for every host's access link)
+      or a link pattern ('leaf*-spine*'); later rules override earlier ones
+    - Each link draws its values once, from its own seeded stream, so a profile
+      gives every run the same latency asymmetry
+    - Time-varying profiles: each 'timeline' step ({'at': seconds, 'links': [rules]})
+      adds rules that override the earlier ones from then on, and 'resample_every'
+      redraws every link's distributions periodically; each change reconfigures
+      the running links in place
+    """
+
+    def __init__(self, spec):
+        """
+        Args:
+            spec: Parsed profile (see the class docstring)
+        """
+        self.spec = spec
+        self.seed = spec.get('seed', 0)
+        self.default = spec.get('default', {})
+        self.rules = list(spec.get('links', []))
+        self.timeline = sorted(spec.get('timeline', []), key=lambda step: step['at'])
+        self.resample_every = spec.get('resample_every')
+        # (node1, node2) -> numpy Generator, so redraws continue each link's own stream
+        self._rngs = {}
+
+    def _rng(self, node1, node2):
+        key = tuple(sorted((node1, node2)))
+        if key not in self._rngs:
+            # Seed from the link's name, independent of the order links are visited
+            name = _link_name(*key)
+            self._rngs[key] = np.random.default_rng([self.seed] + [ord(c) for c in name])
+        return self._rngs[key]
+
+    def params_for(self, node1, node2):
+        """
+        Draw TCLink parameters for one link
+
+        Args:
+            node1, node2: Endpoint names
+
+        Returns:
+            Dict of TCLink parameters (delay, jitter, loss, bw) set by the profile
+        """
+        fields = dict(self.default)
+        for rule in self.rules:
+            if _matches(rule.get('match', '*'), node1, node2):
+                fields.update({field: rule[field] for field in _FIELDS if field in rule})
+        rng = self._rng(node1, node2)
+        return tc_params({field: sample_value(spec, rng) for field, spec in fields.items()})
+
+    def apply(self, topo):
+        """Set the profile's parameters on every link of a Topo before the network is built"""
+        for node1, node2, info in topo.links(withInfo=True):
+            info.update(self.params_for(node1, node2))
+
+    def start(self, net):
+        """
+        Run the timeline and periodic redraws against a started network
+
+        Returns:
+            (thread, stop event), or None if the profile does not vary over time
+        """
+        if not self.timeline and not self.resample_every:
+            return None
+        stop = threading.Event()
+        thread = threading.Thread(target=self._run, args=(net, stop), daemon=True)
+        thread.start()
+        return thread, stop
+
+    def _run(self, net, stop):
+        start = time.time()
+        steps = list(self.timeline)
+        next_resample = self.resample_every
+        while not stop.is_set():
+            elapsed = time.time() - start
+            due = [step for step in steps if step['at'] <= elapsed]
+            if due:
+                steps = steps[len(due):]
+                for step in due:
+                    self.rules = self.rules + list(step.get('links', []))
+                self.reconfigure(net)
+            elif next_resample is not None and elapsed >= next_resample:
+                next_resample += self.resample_every
+                self.reconfigure(net)
+            wakeups = [step['at'] for step in steps[:1]]
+            if next_resample is not None:
+                wakeups.append(next_resample)
+            if not wakeups:
+                return
+            stop.wait(max(0.0, min(wakeups) - (time.time() - start)))
+
+    def reconfigure(self, net):
+        """Redraw and apply every link's parameters on a running network"""
+        for link in net.links:
+            node1, node2 = link.intf1.node.name, link.intf2.node.name
+            params = dict(link.intf1.params)
+            params.update(self.params_for(node1, node2))
+            # TCIntf.config replaces the interface's qdiscs, so pass every parameter again
+            link.intf1.config(**params)
+            link.intf2.config(**params)
+            link.intf1.params.update(params)
+            link.intf2.params.update(params)
+
+
+def load_profiles(path):
+    """Load link profiles from a JSON file"""
+    with open(path) as f:
+        return LinkProfiles(json.load(f))
@@ -13,26 +13,19 @@ from mininet.link import TCLink
 
 class StarTopo(Topo):
     """
-    Simple 4-node star topology:
+    Simple star topology (4 hosts by default):
         - 1 central switch (s1)
-        - 4 hosts (h1, h2, h3, h4)
+        - n hosts (h1 ... hn)
         - All hosts connected to central switch
     """
-    def build(self):
+    def build(self, n=4, bw=10, delay='1ms'):
         # Add central switch
         s1 = self.addSwitch('s1')
         
-        # Add 4 hosts
-        h1 = self.addHost('h1')
-        h2 = self.addHost('h2')
-        h3 = self.addHost('h3')
-        h4 = self.addHost('h4')
-        
-        # Add links with high bandwidth and low latency to simulate financial exchange
-        self.addLink(h1, s1, bw=10, delay='1ms')  # 10 Gbps, 1ms delay
-        self.addLink(h2, s1, bw=10, delay='1ms')
-        self.addLink(h3, s1, bw=10, delay='1ms')
-        self.addLink(h4, s1, bw=10, delay='1ms')
+        # Add hosts, each on its own link with high bandwidth and low latency to simulate financial exchange
+        for i in range(1, n + 1):
+            host = self.addHost(f'h{i}')
+            self.addLink(host, s1, bw=bw, delay=delay)  # 10 Gbps, 1ms delay by default
 
 def createNetwork():
     """Create and configure the network"""
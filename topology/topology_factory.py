@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+"""
+Mini-Project: Multicast Optimization for SDN in Financial Exchanges
+Topology factory: star, leaf-spine and fat-tree layouts at configurable scale
+"""
+
+import argparse
+import json
+import math
+import time
+import urllib.request
+from functools import partial
+
+from mininet.topo import Topo
+from mininet.net import Mininet
+from mininet.node import RemoteController, OVSKernelSwitch
+from mininet.cli import CLI
+from mininet.log import setLogLevel, info
+from mininet.link import TCLink
+
+from star_topology import StarTopo
+from link_profiles import load_profiles
+
+
+class FabricTopo(Topo):
+    """
+    Base for multi-switch topologies
+    - Switches get sequential datapath ids, so names can be descriptive
+      (spine1, leaf1, ...) without colliding dpids
+    - Links between switches form loops, so these topologies run with spanning tree
+    """
+    has_loops = True
+
+    def addFabricSwitch(self, name):
+        """Add a switch with the next datapath id"""
+        self._next_dpid = getattr(self, '_next_dpid', 0) + 1
+        return self.addSwitch(name, dpid=f'{self._next_dpid:016x}')
+
+    def addHosts(self, switches, n, per_switch, bw, delay):
+        """Attach up to n hosts, per_switch to each switch in order"""
+        count = 0
+        for switch in switches:
+            for _ in range(per_switch):
+                if count == n:
+                    return
+                count += 1
+                host = self.addHost(f'h{count}')
+                self.addLink(host, switch, bw=bw, delay=delay)
+
+
+class LeafSpineTopo(FabricTopo):
+    """
+    Two-tier leaf-spine (Clos) topology:
+        - `spines` spine switches, `leaves` leaf switches
+        - Every leaf connected to every spine
+        - n hosts spread evenly over the leaves (h1 ... hn)
+    """
+    def build(self, n=16, leaves=4, spines=2, bw=10, delay='1ms', fabric_bw=None, fabric_delay=None):
+        spine_switches = [self.addFabricSwitch(f'spine{i}') for i in range(1, spines + 1)]
+        leaf_switches = [self.addFabricSwitch(f'leaf{i}') for i in range(1, leaves + 1)]
+        for leaf in leaf_switches:
+            for spine in spine_switches:
+                self.addLink(leaf, spine, bw=fabric_bw or bw, delay=fabric_delay or delay)
+        self.addHosts(leaf_switches, n, math.ceil(n / leaves), bw, delay)
+
+
+class FatTreeTopo(FabricTopo):
+    """
+    k-ary fat-tree topology (k even):
+        - (k/2)^2 core switches and k pods of k/2 aggregation and k/2 edge switches
+        - Each edge switch connects to every aggregation switch of its pod,
+          aggregation switch j of every pod to cores j*k/2 ... (j+1)*k/2 - 1
+        - Up to k^3/4 hosts, k/2 per edge switch (h1 ... hn; default: all of them)
+    """
+    def build(self, k=4, n=None, bw=10, delay='1ms', fabric_bw=None, fabric_delay=None):
+        if k < 2 or k % 2:
+            raise ValueError(f"Fat-tree arity must be even, got {k}")
+        half = k // 2
+        capacity = k ** 3 // 4
+        n = capacity if n is None else n
+        if n > capacity:
+            raise ValueError(f"A {k}-ary fat-tree holds at most {capacity} hosts, got {n}")
+        link = dict(bw=fabric_bw or bw, delay=fabric_delay or delay)
+        cores = [self.addFabricSwitch(f'core{i}') for i in range(1, half * half + 1)]
+        edges = []
+        for pod in range(k):
+            aggs = [self.addFabricSwitch(f'agg{pod * half + j + 1}') for j in range(half)]
+            pod_edges = [self.addFabricSwitch(f'edge{pod * half + j + 1}') for j in range(half)]
+            for j, agg in enumerate(aggs):
+                for core in cores[j * half:(j + 1) * half]:
+                    self.addLink(agg, core, **link)
+                for edge in pod_edges:
+                    self.addLink(edge, agg, **link)
+            edges.extend(pod_edges)
+        self.addHosts(edges, n, half, bw, delay)
+
+
+def fat_tree_arity(n):
+    """Smallest even k whose fat-tree holds n hosts"""
+    k = 2
+    while k ** 3 // 4 < n:
+        k += 2
+    return k
+
+
+# name -> builder(n, link params, layout options), n = number of hosts
+TOPOLOGIES = {
+    'star': lambda n, bw, delay, **_: StarTopo(n=n, bw=bw, delay=delay),
+    'leafspine': lambda n, leaves=None, spines=None, **params: LeafSpineTopo(
+        n=n, leaves=leaves or max(2, math.ceil(n / 16)), spines=spines or 2, **params),
+    'fattree': lambda n, k=None, leaves=None, spines=None, **params: FatTreeTopo(
+        k=k or fat_tree_arity(n), n=n, **params)
+}
+
+
+def build_topology(name, n, bw=10, delay='1ms', fabric_bw=None, fabric_delay=None, **layout):
+    """
+    Build a topology by name
+
+    Args:
+        name: 'star', 'leafspine' or 'fattree'
+        n: Number of hosts
+        bw: Host link bandwidth (Mbit/s)
+        delay: Host link delay
+        fabric_bw: Switch-to-switch bandwidth (defaults to bw)
+        fabric_delay: Switch-to-switch delay (defaults to delay)
+        layout: leaves/spines for leafspine, k for fattree; others are ignored
+
+    Returns:
+        Mininet Topo
+    """
+    if name not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology: {name}")
+    if name == 'leafspine':
+        layout.pop('k', None)
+    return TOPOLOGIES[name](n, bw=bw, delay=delay, fabric_bw=fabric_bw, fabric_delay=fabric_delay, **layout)
+
+
+def router_ports(net):
+    """
+    Return the switch-to-switch ports of a started network
+
+    Returns:
+        Dict of dpid -> sorted list of ports leading to other switches
+    """
+    ports = {}
+    for link in net.links:
+        intfs = (link.intf1, link.intf2)
+        if all(intf.node in net.switches for intf in intfs):
+            for intf in intfs:
+                ports.setdefault(int(intf.node.dpid, 16), []).append(intf.node.ports[intf])
+    return {dpid: sorted(switch_ports) for dpid, switch_ports in ports.items()}
+
+
+def announce_router_ports(net, api_url):
+    """Tell the controller which switch ports lead to other switches"""
+    for dpid, ports in router_ports(net).items():
+        request = urllib.request.Request(f'{api_url}/api/set_router_ports',
+                                         data=json.dumps({'dpid': dpid, 'ports': ports}).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        urllib.request.urlopen(request, timeout=5).read()
+    info(f'*** Router ports sent to {api_url}\n')
+
+
+def createNetwork(topo, controllers=(('127.0.0.1', 6633),), api_url=None, stp_wait=35.0, profiles=None):
+    """
+    Create, start and open a CLI on a network
+
+    Args:
+        topo: Mininet Topo (see build_topology)
+        controllers: (ip, port) of each controller; every switch connects to all of them
+        api_url: Controller API base URL to send router ports to (multi-switch topologies)
+        stp_wait: Seconds to let spanning tree converge on topologies with loops
+        profiles: LinkProfiles setting per-link delay/jitter/loss (see link_profiles.py)
+    """
+    if profiles is not None:
+        profiles.apply(topo)
+    loops = getattr(topo, 'has_loops', False)
+    net = Mininet(
+        topo=topo,
+        controller=None,
+        switch=partial(OVSKernelSwitch, stp=loops),
+        link=TCLink,
+        autoSetMacs=True
+    )
+    for i, (ip, port) in enumerate(controllers):
+        net.addController(f'c{i}', controller=RemoteController, ip=ip, port=port)
+
+    net.start()
+
+    if loops:
+        info(f'*** Waiting {stp_wait:.0f}s for spanning tree to converge\n')
+        time.sleep(stp_wait)
+        if api_url:
+            announce_router_ports(net, api_url)
+
+    timeline = profiles.start(net) if profiles is not None else None
+    if timeline is not None:
+        info('*** Time-varying link profile running\n')
+
+    info(f'*** Network started: {len(net.hosts)} hosts, {len(net.switches)} switches\n')
+    info('*** Type "exit" to shut down the network\n')
+
+    CLI(net)
+
+    if timeline is not None:
+        timeline[1].set()
+    net.stop()
+
+
+def main():
+    """Main function for standalone usage"""
+    parser = argparse.ArgumentParser(description='Mininet topology factory')
+    parser.add_argument('topology', type=str, nargs='?', default='star', choices=sorted(TOPOLOGIES),
+                        help='Topology layout')
+    parser.add_argument('--hosts', type=int, default=16, help='Number of hosts (e.g. 16, 64, 256)')
+    parser.add_argument('--leaves', type=int, default=None, help='Leaf switches (leafspine; default hosts/16)')
+    parser.add_argument('--spines', type=int, default=None, help='Spine switches (leafspine; default 2)')
+    parser.add_argument('--k', type=int, default=None, help='Fat-tree arity (fattree; default smallest that fits)')
+    parser.add_argument('--bw', type=float, default=10, help='Host link bandwidth (Mbit/s)')
+    parser.add_argument('--delay', type=str, default='1ms', help='Host link delay')
+    parser.add_argument('--fabric-bw', type=float, default=None, help='Switch-to-switch bandwidth (default --bw)')
+    parser.add_argument('--fabric-delay', type=str, default=None, help='Switch-to-switch delay (default --delay)')
+    parser.add_argument('--controllers', type=str, default='127.0.0.1:6633',
+                        help='Comma-separated controller ip:port list (one per shard)')
+    parser.add_argument('--api', type=str, default=None,
+                        help='Controller API URL to send router ports to, e.g. http://127.0.0.1:5006')
+    parser.add_argument('--profile', type=str, default=None,
+                        help='JSON file of per-link latency/jitter/loss profiles (e.g. topology/profiles/cloud_vm.json)')
+    parser.add_argument('--stp-wait', type=float, default=35.0, help='Seconds to wait for spanning tree')
+
+    args = parser.parse_args()
+
+    topo = build_topology(args.topology, args.hosts, bw=args.bw, delay=args.delay,
+                          fabric_bw=args.fabric_bw, fabric_delay=args.fabric_delay,
+                          leaves=args.leaves, spines=args.spines, k=args.k)
+    controllers = []
+    for controller in args.controllers.split(','):
+        ip, port = controller.rsplit(':', 1)
+        controllers.append((ip, int(port)))
+    profiles = load_profiles(args.profile) if args.profile else None
+    createNetwork(topo, controllers, api_url=args.api, stp_wait=args.stp_wait, profiles=profiles)
+
+
+if __name__ == '__main__':
+    setLogLevel('info')
+    main()
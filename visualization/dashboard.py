@@ -301,19 +301,34 @@ features = {
 }
 competition_running = False
 
+# Rows shown for each run: (label, results store index column)
+RESULT_ROWS = [
+    ('Implementation', 'implementation'),
+    ('Scenario', 'scenario'),
+    ('Backend', 'backend'),
+    ('Message Rate', 'message_rate'),
+    ('Receivers', 'receivers'),
+    ('Average Latency (ms)', 'avg_latency'),
+    ('p99 Latency (ms)', 'latency_p99'),
+    ('Fairness Index', 'fairness'),
+    ('Bandwidth Efficiency (%)', 'bandwidth_efficiency')
+]
+
 @app.route('/api/results')
 def api_results():
-    import glob
-    import csv
-    results_dir = os.path.join(os.path.dirname(__file__), '..', 'results')
-    # Find all csv files, sort by modified time descending
-    csv_files = sorted(glob.glob(os.path.join(results_dir, '*.csv')), key=os.path.getmtime, reverse=True)[:5]
+    from scripts.results_store import ResultsStore
+    store = ResultsStore(os.path.join(os.path.dirname(__file__), '..', 'results', 'store'))
+    index = store.index()
+    # Five most recent runs, straight from the index columns
+    latest = index['created'].argsort()[::-1][:5]
     all_results = []
-    for path in csv_files:
-        with open(path, 'r') as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-            all_results.append({'filename': os.path.basename(path), 'rows': rows})
+    for row in latest:
+        rows = [['Parameter', 'Value']]
+        for label, column in RESULT_ROWS:
+            value = index[column][row].item()
+            # Missing metrics are NaN in the index; JSON has no NaN
+            rows.append([label, None if value != value else value])
+        all_results.append({'filename': str(index['run_id'][row]), 'rows': rows})
     return jsonify({'results': all_results})
 
 @app.route('/', methods=['GET', 'POST'])